@@ -0,0 +1,182 @@
+"""
+Üretim loglaması için handler, formatter ve filtreler.
+
+- KuyrukHandler kayıtları sınırlı bir kuyruğa bırakır; dosyaya veya stderr'e yazma
+  ayrı bir thread'de (QueueListener) yapılır, böylece istek thread'i disk G/Ç'si
+  beklemez. Kuyruk doluysa kayıt beklemeden düşürülür ve sayılır.
+- JSONFormatter her kaydı tek satırlık JSON olarak yazar; istek ölçümü gibi
+  kayda eklenmiş 'olcum' alanı da JSON'a dahil edilir.
+- OrneklemeFiltresi ayrıntılı (INFO ve altı) kayıtların yalnızca belirli bir
+  oranını geçirir; WARNING ve üstü her zaman geçer.
+
+settings.LOGGING loglama_ayari ile oluşturulur; mod ve seviyeler core/settings.py'de ortam
+değişkenleriyle seçilir.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+KUYRUK_BOYUTU = 10000
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Kaydı {"zaman", "seviye", "logger", "mesaj", ...} alanlarıyla tek satır JSON'a çevirir
+    """
+
+    def format(self, record):
+        veri = {
+            'zaman': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'seviye': record.levelname,
+            'logger': record.name,
+            'mesaj': record.getMessage(),
+            'modul': record.module,
+            'satir': record.lineno,
+        }
+        olcum = getattr(record, 'olcum', None)
+        if olcum is not None:
+            veri['olcum'] = olcum
+        if record.exc_info:
+            veri['hata'] = self.formatException(record.exc_info)
+        return json.dumps(veri, ensure_ascii=False, default=str)
+
+
+class OrneklemeFiltresi(logging.Filter):
+    """
+    INFO ve altındaki kayıtların yalnızca 'oran' kadarını (0-1) geçirir
+    """
+
+    def __init__(self, oran=1.0):
+        super().__init__()
+        self.oran = float(oran)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.oran >= 1:
+            return True
+        return random.random() < self.oran
+
+
+class KuyrukHandler(QueueHandler):
+    """
+    Kayıtları kuyruğa bırakıp hedefe (stderr veya dosya) arka plandaki bir thread'de yazan handler.
+    Biçimlendirme çağıran thread'de yapılır; yazıcı yalnızca hazır satırı yazar.
+    """
+
+    def __init__(self, hedef='stderr', kuyruk_boyutu=KUYRUK_BOYUTU):
+        super().__init__(queue.Queue(kuyruk_boyutu))
+        if hedef == 'stderr':
+            yazici = logging.StreamHandler(sys.stderr)
+        else:
+            yazici = WatchedFileHandler(hedef, encoding='utf-8')
+        yazici.setFormatter(logging.Formatter('%(message)s'))
+        self.dusurulen = 0
+        self.dinleyici = QueueListener(self.queue, yazici)
+        self.dinleyici.start()
+        atexit.register(self.kapat)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dusurulen += 1
+
+    def kapat(self):
+        """
+        Kuyrukta kalan kayıtları yazıp yazıcı thread'ini durdurur
+        """
+        if self.dinleyici._thread is not None:
+            self.dinleyici.stop()
+            for yazici in self.dinleyici.handlers:
+                yazici.close()
+
+    def close(self):
+        self.kapat()
+        super().close()
+
+
+def seviyeleri_oku(metin, varsayilan):
+    """
+    'django=WARNING,hesaplama=INFO' biçimindeki metni {logger: seviye} sözlüğüne çevirir
+    """
+    seviyeler = dict(varsayilan)
+    for parca in filter(None, (parca.strip() for parca in metin.split(','))):
+        ad, _, seviye = parca.partition('=')
+        seviyeler[ad.strip()] = seviye.strip().upper()
+    return seviyeler
+
+
+ORNEKLENEN_LOGGERLAR = ('hesaplama.istek', 'core.views')
+
+
+def loglama_ayari(uretim=False, dosya='', seviyeler='', ornekleme=None):
+    """
+    settings.LOGGING sözlüğünü oluşturur.
+
+    uretim: JSON satırları kuyruk üzerinden arka planda yazılır, django WARNING'den başlar
+    dosya: kayıtların yazılacağı dosya (verilirse her iki modda da kuyruk kullanılır)
+    seviyeler: seviyeleri_oku biçiminde logger bazında seviyeler
+    ornekleme: ORNEKLENEN_LOGGERLAR'ın INFO kayıtlarından yazılacak oran (varsayılan üretimde 0.1)
+    """
+    log_seviyeleri = seviyeleri_oku(seviyeler, {
+        'django': 'WARNING' if uretim else 'INFO',
+        'hesaplama': 'INFO' if uretim else 'DEBUG',
+        # İstek başına ölçüm satırları geliştirmede ve testlerde konsolu doldurmasın diye
+        # yalnızca üretimde (JSON) yazılır; geliştirmede DJANGO_LOG_SEVIYELERI ile açılabilir
+        'hesaplama.istek': 'INFO' if uretim else 'WARNING',
+        'core': 'INFO',
+        'core.views': 'INFO',
+    })
+    if ornekleme in (None, ''):
+        ornekleme = 0.1 if uretim else 1
+    handler = 'kuyruk' if uretim or dosya else 'console'
+
+    ayar = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'verbose': {
+                'format': '{levelname} {asctime} {module} {message}',
+                'style': '{',
+            },
+            'simple': {
+                'format': '{levelname} {message}',
+                'style': '{',
+            },
+            'json': {
+                '()': 'core.loglama.JSONFormatter',
+            },
+        },
+        'filters': {
+            'ornekleme': {
+                '()': 'core.loglama.OrneklemeFiltresi',
+                'oran': float(ornekleme),
+            },
+        },
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'formatter': 'verbose',
+            },
+        },
+        'loggers': {
+            ad: {
+                'handlers': [handler],
+                'level': seviye,
+                'filters': ['ornekleme'] if ad in ORNEKLENEN_LOGGERLAR else [],
+                'propagate': False,
+            }
+            for ad, seviye in log_seviyeleri.items()
+        },
+    }
+    if handler == 'kuyruk':
+        ayar['handlers']['kuyruk'] = {
+            '()': 'core.loglama.KuyrukHandler',
+            'hedef': dosya or 'stderr',
+            'formatter': 'json' if uretim else 'verbose',
+        }
+    return ayar
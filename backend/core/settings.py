@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from core.loglama import loglama_ayari
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -54,6 +57,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # İstek başına sorgu sayısı ve süreleri (Server-Timing başlığı ve log); diğer middleware'leri de kapsasın diye en başta
+    'hesaplama.istek_olcumu.IstekOlcumuMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware ekledik (CommonMiddleware'den önce olmalı)
@@ -89,12 +94,113 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+#
+# Veritabanı ortam değişkenleriyle seçilir. DJANGO_DB_ENGINE verilmezse yerel SQLite
+# dosyası varsayılan (rollback journal) modda kullanılır; WAL için DJANGO_SQLITE_PROFIL=wal
+# verilmelidir (bkz. SQLITE_PROFILI). Üretimde PostgreSQL:
+#   DJANGO_DB_ENGINE=postgresql DJANGO_DB_NAME=pomo DJANGO_DB_USER=pomo
+#   DJANGO_DB_PASSWORD=... DJANGO_DB_HOST=db.internal DJANGO_DB_PORT=5432
+# DJANGO_DB_CONN_MAX_AGE: kalıcı bağlantı süresi (saniye, varsayılan 60)
+# DJANGO_DB_POOL: bağlantı havuzu modu
+#   yok       - her worker kendi kalıcı bağlantılarını kullanır (varsayılan)
+#   psycopg   - süreç içi psycopg havuzu (psycopg[pool] gerekir; kalıcı bağlantı kapatılır)
+#   pgbouncer - transaction modunda PgBouncer arkasında çalışma (sunucu taraflı cursor kapatılır)
+# DJANGO_DB_REPLICA_HOSTS: virgülle ayrılmış okuma replikaları; tarife ve komisyon
+#   okumaları bu replikalara yönlendirilir (bkz. hesaplama/yonlendirici.py)
+DB_MOTORU = os.environ.get('DJANGO_DB_ENGINE', 'sqlite3')
+
+if DB_MOTORU in ('postgresql', 'postgres'):
+    DB_HAVUZ_MODU = os.environ.get('DJANGO_DB_POOL', 'yok')
+
+    def _postgresql_ayari(host):
+        ayar = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'pomo'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'pomo'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': host,
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DJANGO_DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
+        if DB_HAVUZ_MODU == 'psycopg':
+            # Django'nun psycopg havuzu kalıcı bağlantılarla birlikte kullanılamaz
+            ayar['CONN_MAX_AGE'] = 0
+            ayar['OPTIONS']['pool'] = {
+                'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX', 10)),
+                'timeout': int(os.environ.get('DJANGO_DB_POOL_TIMEOUT', 10)),
+            }
+        elif DB_HAVUZ_MODU == 'pgbouncer':
+            # Transaction havuzunda isimli cursor'lar ve prepared statement'lar bağlantılar arasında taşınmaz
+            ayar['DISABLE_SERVER_SIDE_CURSORS'] = True
+        return ayar
+
+    DATABASES = {
+        'default': _postgresql_ayari(os.environ.get('DJANGO_DB_HOST', 'localhost')),
+    }
+    for sira, replika_host in enumerate(filter(None, os.environ.get('DJANGO_DB_REPLICA_HOSTS', '').split(',')), 1):
+        DATABASES[f'replica_{sira}'] = _postgresql_ayari(replika_host.strip())
+        # Testlerde replika ayrı veritabanı olarak oluşturulmaz, birincile yönlendirilir
+        DATABASES[f'replica_{sira}']['TEST'] = {'MIRROR': 'default'}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Yazma kilidi alınamazsa hemen hata vermek yerine beklenecek süre (saniye)
+                'timeout': int(os.environ.get('DJANGO_DB_TIMEOUT', 20)),
+            },
+        }
+    }
+
+# Tek sunuculu SQLite kurulumları için isteğe bağlı PRAGMA profili (klasik, wal, performans).
+# Her yeni bağlantıda uygulanır; bkz. hesaplama/sqlite_profili.py ve benchmark_sqlite_profilleri komutu.
+SQLITE_PROFILI = os.environ.get('DJANGO_SQLITE_PROFIL', '')
+
+DATABASE_ROUTERS = ['hesaplama.yonlendirici.OkumaReplikasiYonlendiricisi']
+# Replikaya yönlendirilen tablolara yazıldıktan sonra bu süre boyunca okumalar birincilde yapılır
+REPLIKA_GECIKME_PAYI = float(os.environ.get('DJANGO_DB_REPLICA_LAG', 5))
+
+
+# Cache ayarları
+# Varsayılan süreç içi LocMemCache'tir ve yalnızca tek worker'lı kurulumlar içindir. Birden
+# fazla worker çalışıyorsa Redis/Memcached zorunludur: derlenmiş tarifeler ve arama indeksleri
+# worker'lar arasında cache'teki sürüm numaralarıyla geçersiz kılınır (`check --deploy` uyarır).
+# Örnek: DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#        DJANGO_CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'pomo-hesaplama'),
+        'TIMEOUT': int(os.environ.get('DJANGO_CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': os.environ.get('DJANGO_CACHE_KEY_PREFIX', ''),
     }
 }
+# Süreç içi derlenmiş tarifelerin ve arama indekslerinin en fazla kullanılacağı süre (saniye);
+# sürüm bildirimi kaçırılsa bile eski veri bu sürenin sonunda yenilenir
+SUREC_ONBELLEGI_MAKSIMUM_YAS = int(os.environ.get('SUREC_ONBELLEGI_MAKSIMUM_YAS', 60))
+
+# Pazar yeri ve sürüm türü başına saklanan eski (etkinliğini yitirmiş) veri sürümü sayısı;
+# daha eskileri yeni bir sürüm etkinleştirildiğinde silinir (bkz. hesaplama/versiyonlar.py)
+VERI_VERSIYONU_SAKLAMA_SAYISI = int(os.environ.get('VERI_VERSIYONU_SAKLAMA_SAYISI', 20))
+
+# Hesaplama geçmişi kayıtları arka planda toplu yazılır (bkz. hesaplama/gecmis_kaydedici.py).
+# Kayıtların istek içinde anında yazılması için 0 verilebilir.
+HESAPLAMA_GECMIS_ARKA_PLANDA = os.environ.get('HESAPLAMA_GECMIS_ARKA_PLANDA', '1') == '1'
+
+# Görünüm bazında süre ve sorgu sayısı histogramlarını /api/hesap/metrikler/ adresinde
+# Prometheus metin biçiminde sunar. Değerler worker süreci başınadır; endpoint
+# yalnızca iç ağdan erişilebilecek şekilde yayınlanmalıdır.
+ISTEK_OLCUMU_PROMETHEUS = os.environ.get('ISTEK_OLCUMU_PROMETHEUS', '0') == '1'
+# Metriklere yönetici girişi olmadan erişebilecek adresler (ör. Prometheus sunucusu), virgülle ayrılmış
+ISTEK_OLCUMU_PROMETHEUS_IZINLI_IPLER = [
+    adres.strip() for adres in os.environ.get('ISTEK_OLCUMU_PROMETHEUS_IZINLI_IPLER', '').split(',') if adres.strip()
+]
 
 
 # Password validation
@@ -187,45 +293,22 @@ REST_AUTH = {
 }
 
 # Logging configuration
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
-        },
-    },
-    'handlers': {
-        'console': {
-            'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
-        },
-        'file': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'debug.log',
-            'formatter': 'verbose',
-        },
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',
-            'propagate': True,
-        },
-        'hesaplama': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
-            'propagate': True,
-        },
-    },
-}
+# DJANGO_LOG_MODU=gelistirme (varsayılan): okunabilir metin, doğrudan konsola yazılır.
+# DJANGO_LOG_MODU=uretim: JSON satırları kuyruk üzerinden arka plandaki bir thread'de
+#   stderr'e (veya DJANGO_LOG_DOSYASI'na) yazılır; istek thread'i disk G/Ç'si beklemez.
+# DJANGO_LOG_DOSYASI: kayıtlar dosyaya yazılsın isteniyorsa yolu (her iki modda da kuyruk kullanılır)
+# DJANGO_LOG_SEVIYELERI: logger bazında seviyeler, ör. "django=WARNING,hesaplama=INFO,django.db.backends=DEBUG"
+#   İstek ölçüm satırları (hesaplama.istek) yalnızca üretim modunda varsayılan olarak yazılır;
+#   geliştirmede "hesaplama.istek=INFO" ile açılabilir.
+# DJANGO_LOG_ORNEKLEME: istek başına yazılan ayrıntılı loglardan (hesaplama.istek, core.views)
+#   yazılacak oran (0-1); WARNING ve üstü her zaman yazılır. Benchmark: benchmark_loglama komutu.
+LOG_URETIM = os.environ.get('DJANGO_LOG_MODU', 'gelistirme') == 'uretim'
+LOGGING = loglama_ayari(
+    uretim=LOG_URETIM,
+    dosya=os.environ.get('DJANGO_LOG_DOSYASI', ''),
+    seviyeler=os.environ.get('DJANGO_LOG_SEVIYELERI', ''),
+    ornekleme=os.environ.get('DJANGO_LOG_ORNEKLEME'),
+)
 
 # CORS izin verilen metodlar
 CORS_ALLOW_METHODS = [
@@ -8,30 +8,24 @@ from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from rest_framework.authtoken.models import Token
-import traceback
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 @api_view(['POST'])
 def registration_view(request):
-    logger.info('=== Registration Request Received ===')
-    logger.info(f'Request Method: {request.method}')
-    logger.info(f'Request Headers: {dict(request.headers)}')
-    logger.info(f'Request Data: {request.data}')
-    logger.info(f'Request Content Type: {request.content_type}')
-    logger.info(f'Request User: {request.user}')
+    # İstek başlıkları ve gövdesi (şifreler dahil) loglanmaz; yalnızca örneklenen kısa bir kayıt yazılır
+    logger.info('Kayıt isteği alındı: %s', request.content_type)
     
     try:
         # Registration logic will be handled by dj-rest-auth
-        logger.info('Processing registration request...')
         
         # Validate required fields
         required_fields = ['username', 'email', 'password1', 'password2']
         missing_fields = [field for field in required_fields if field not in request.data]
         
         if missing_fields:
-            logger.error(f'Missing required fields: {missing_fields}')
+            logger.info('Missing required fields: %s', missing_fields)
             return Response(
                 {"detail": f"Missing required fields: {', '.join(missing_fields)}"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -41,7 +35,7 @@ def registration_view(request):
         try:
             validate_email(request.data.get('email'))
         except ValidationError:
-            logger.error('Invalid email format')
+            logger.info('Invalid email format')
             return Response(
                 {"email": "Geçerli bir email adresi giriniz."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -50,7 +44,7 @@ def registration_view(request):
         # Validate username
         username = request.data.get('username', '')
         if len(username) < 3:
-            logger.error('Username too short')
+            logger.info('Username too short')
             return Response(
                 {"username": "Kullanıcı adı en az 3 karakter olmalıdır."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -58,7 +52,7 @@ def registration_view(request):
         
         # Check if username exists
         if User.objects.filter(username=username).exists():
-            logger.error('Username already exists')
+            logger.info('Username already exists')
             return Response(
                 {"username": "Bu kullanıcı adı zaten kullanılıyor."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -66,7 +60,7 @@ def registration_view(request):
         
         # Check if email exists
         if User.objects.filter(email=request.data.get('email')).exists():
-            logger.error('Email already exists')
+            logger.info('Email already exists')
             return Response(
                 {"email": "Bu email adresi zaten kullanılıyor."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -77,14 +71,14 @@ def registration_view(request):
         password2 = request.data.get('password2', '')
         
         if len(password1) < 6:
-            logger.error('Password too short')
+            logger.info('Password too short')
             return Response(
                 {"password1": "Şifre en az 6 karakter olmalıdır."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         if password1 != password2:
-            logger.error('Passwords do not match')
+            logger.info('Passwords do not match')
             return Response(
                 {"password2": "Şifreler eşleşmiyor."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -98,11 +92,7 @@ def registration_view(request):
         )
         
     except Exception as e:
-        logger.error('=== Registration Error ===')
-        logger.error(f'Error Type: {type(e).__name__}')
-        logger.error(f'Error Message: {str(e)}')
-        logger.error(f'Request Data: {request.data}')
-        logger.error(f'Request Headers: {dict(request.headers)}')
+        logger.exception('Registration error: %s', type(e).__name__)
         return Response(
             {"detail": str(e)},
             status=status.HTTP_400_BAD_REQUEST
@@ -111,23 +101,13 @@ def registration_view(request):
 @api_view(['POST'])
 def google_auth_view(request):
     try:
-        logger.info('=== Google Auth Request Received ===')
-        logger.info('Request data:', request.data)
-        
         email = request.data.get('email')
         username = request.data.get('username')
         photo_url = request.data.get('photo_url')
         google_id = request.data.get('google_id')
 
-        logger.info('Extracted data:', {
-            'email': email,
-            'username': username,
-            'photo_url': photo_url,
-            'google_id': google_id
-        })
-
         if not email:
-            logger.error('Email is missing')
+            logger.info('Email is missing')
             return Response(
                 {"email": "Email adresi gereklidir."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -142,7 +122,7 @@ def google_auth_view(request):
             }
         )
 
-        logger.info(f'User {"created" if created else "found"}: {user.username}')
+        logger.info('Google auth user %s: %s', 'created' if created else 'found', user.pk)
 
         # Eğer kullanıcı yeni oluşturulduysa
         if created:
@@ -154,7 +134,6 @@ def google_auth_view(request):
 
         # Token oluştur veya mevcut token'ı al
         token, _ = Token.objects.get_or_create(user=user)
-        logger.info('Token created/retrieved successfully')
 
         response_data = {
             'key': token.key,
@@ -165,16 +144,10 @@ def google_auth_view(request):
             }
         }
         
-        logger.info('Sending response:', response_data)
         return Response(response_data)
 
     except Exception as e:
-        logger.error('Google authentication error:', str(e))
-        logger.error('Error details:', {
-            'type': type(e).__name__,
-            'message': str(e),
-            'traceback': traceback.format_exc()
-        })
+        logger.exception('Google authentication error: %s', type(e).__name__)
         return Response(
             {"detail": str(e)},
             status=status.HTTP_400_BAD_REQUEST
@@ -4,16 +4,18 @@ from .models import (
     Kategori, AltKategori, UrunGrubu, KomisyonOrani,
     Hesaplamalar, KargoHesaplamaGecmisi, HesaplamaKategoriSeviyeleri,
     HesaplamaKategoriler, HesaplamaKomisyonOranlari,
-    KategoriYolu
+    KategoriYolu, VeriVersiyonu, GecmisBaglantisi
 )
 
 # Register your models here.
 @admin.register(Pazaryeri)
 class PazaryeriAdmin(admin.ModelAdmin):
-    list_display = ('id', 'pazar_ismi', 'aktif')
+    list_display = ('id', 'pazar_ismi', 'aktif', 'aktif_kargo_versiyonu', 'aktif_komisyon_versiyonu')
     list_filter = ('aktif',)
     search_fields = ('pazar_ismi',)
     list_display_links = ('id', 'pazar_ismi')
+    raw_id_fields = ('aktif_kargo_versiyonu', 'aktif_komisyon_versiyonu')
+    list_select_related = ('aktif_kargo_versiyonu', 'aktif_komisyon_versiyonu')
 
 @admin.register(KargoFirma)
 class KargoFirmaAdmin(admin.ModelAdmin):
@@ -94,10 +96,12 @@ class HesaplamaKategorilerAdmin(admin.ModelAdmin):
 
 @admin.register(HesaplamaKomisyonOranlari)
 class HesaplamaKomisyonOranlariAdmin(admin.ModelAdmin):
-    list_display = ('pazar_yeri', 'kategori_1', 'kategori_2', 'kategori_3', 'kategori_4', 'komisyon_orani', 'gecerlilik_tarihi')
-    list_filter = ('pazar_yeri', 'gecerlilik_tarihi')
-    search_fields = ('pazar_yeri__pazar_ismi', 'kategori_1__adi', 'kategori_2__adi', 'kategori_3__adi', 'kategori_4__adi')
-    ordering = ('pazar_yeri', 'kategori_1', 'kategori_2', 'kategori_3', 'kategori_4')
+    list_display = ('pazar_yeri', 'kategori_yolu_metni', 'derinlik', 'komisyon_orani', 'gecerlilik_tarihi')
+    list_filter = ('pazar_yeri', 'derinlik', 'gecerlilik_tarihi')
+    search_fields = ('pazar_yeri__pazar_ismi', 'kategori_yolu_metni')
+    ordering = ('pazar_yeri', 'kategori_yolu_metni')
+    readonly_fields = ('kategori_yolu_metni', 'derinlik', 'yaprak_kategori')
+    list_select_related = ('pazar_yeri',)
 
 @admin.register(KategoriYolu)
 class KategoriYoluAdmin(admin.ModelAdmin):
@@ -109,3 +113,23 @@ class KategoriYoluAdmin(admin.ModelAdmin):
     search_fields = ('ad', 'pazar_yeri__pazar_ismi')
     raw_id_fields = ('ust_kategori',)
     autocomplete_fields = ('pazar_yeri',)
+
+@admin.register(VeriVersiyonu)
+class VeriVersiyonuAdmin(admin.ModelAdmin):
+    """
+    Kargo tarifesi ve komisyon tablosu sürümleri için admin panel ayarları.
+    Sürüm etkinleştirme API üzerinden (admin/veri-versiyonlari/<id>/etkinlestir/) yapılır.
+    """
+    list_display = ('id', 'pazar_yeri', 'tur', 'aciklama', 'olusturma_tarihi', 'gecerlilik_tarihi', 'gecerlilik_bitis_tarihi')
+    list_filter = ('tur', 'pazar_yeri')
+    search_fields = ('aciklama', 'pazar_yeri__pazar_ismi')
+    readonly_fields = ('olusturma_tarihi', 'gecerlilik_tarihi', 'gecerlilik_bitis_tarihi')
+
+@admin.register(GecmisBaglantisi)
+class GecmisBaglantisiAdmin(admin.ModelAdmin):
+    """
+    Misafir hesaplamaları kullanıcıya bağlanmış hesaplar. Kayıt silinirse bağlama bir sonraki girişte tekrar yapılır.
+    """
+    list_display = ('kullanici', 'email_normalize', 'baglama_tarihi')
+    search_fields = ('kullanici__username', 'email_normalize')
+    readonly_fields = ('baglama_tarihi',)
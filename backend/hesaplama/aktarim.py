@@ -0,0 +1,309 @@
+"""
+Excel dosyalarından tarife ve komisyon verilerini toplu olarak içe aktaran işlemler.
+
+Dosya bir kez matrise çevrilir, eşleştirmeler bellekte yapılır ve kayıtlar
+tek bir transaction içinde bulk_create ile yazılır. Her içe aktarma mevcut
+verileri silmek yerine yeni bir VeriVersiyonu oluşturur; sürüm istenirse aynı
+transaction içinde etkinleştirilir (bkz. versiyonlar.py).
+"""
+import logging
+import time
+from decimal import Decimal
+
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    DesiKgDeger, DesiKgKargoUcret, KargoFirma, PazaryeriKargofirma,
+    HesaplamaKategoriler, HesaplamaKomisyonOranlari, VeriVersiyonu
+)
+from .versiyonlar import versiyonu_etkinlestir
+
+logger = logging.getLogger(__name__)
+
+TOPLU_KAYIT_BOYUTU = 1000
+
+
+def kargo_firmasi_eslestir(kargo_firma_adi, kargo_firmalari):
+    """
+    Verilen kargo firma adına en uygun eşleşmeyi bellekteki firma listesinden bulur.
+    """
+    # Kargo firma adını normalize et (küçük harfe çevir)
+    normalized_input = kargo_firma_adi.lower().strip()
+
+    # HepsiJET ve HepsiJET XL için özel kontrol
+    if 'hepsijet' in normalized_input:
+        aranan = 'HepsiJET XL' if 'xl' in normalized_input else 'HepsiJET'
+        return next((firma for firma in kargo_firmalari if firma.firma_ismi == aranan), None)
+
+    # Diğer firmalar için içinde geçme kontrolü
+    for firma in kargo_firmalari:
+        # Mevcut firma adını normalize et
+        normalized_firma = firma.firma_ismi.lower().strip()
+
+        # Tam eşleşme kontrolü
+        if normalized_input == normalized_firma:
+            return firma
+
+        # İçinde geçme kontrolü (HepsiJET ve HepsiJET XL hariç)
+        if firma.firma_ismi not in ['HepsiJET', 'HepsiJET XL']:
+            if normalized_firma in normalized_input or normalized_input in normalized_firma:
+                return firma
+
+    # Eşleşme bulunamadıysa None döndür
+    return None
+
+
+def _ucret_sutununu_temizle(sutun):
+    """
+    Ücret sütununu sayıya çevirir; ₺ işareti ve ondalık virgül temizlenir,
+    sayıya çevrilemeyen hücreler NaN olur.
+    """
+    if pd.api.types.is_numeric_dtype(sutun):
+        return sutun.astype(float)
+    temiz = sutun.where(sutun.isna(), sutun.astype(str).str.replace('₺', '', regex=False)
+                        .str.replace(',', '.', regex=False).str.strip())
+    return pd.to_numeric(temiz, errors='coerce')
+
+
+def kargo_tarifesi_aktar(pazar_yeri, df, aciklama='', etkinlestir=True):
+    """
+    Desi/Kg satırları ve kargo firması sütunlarından oluşan tabloyu pazar yerinin
+    kargo tarifesinin yeni bir sürümü olarak kaydeder. Tüm kayıtlar tek
+    transaction içinde yazılır; etkinlestir True ise sürüm aynı transaction
+    içinde aktif yapılır. İşlem istatistiklerini döndürür.
+    """
+    baslangic = time.perf_counter()
+
+    # Desi sütununu al, boş satırları at; aynı desi tekrar ederse ilk satır geçerlidir
+    desi_sutunu = df.columns[0]
+    df = df[df[desi_sutunu].notna()].copy()
+    df[desi_sutunu] = df[desi_sutunu].astype(float)
+    df = df.drop_duplicates(subset=desi_sutunu, keep='first')
+    desi_values = df[desi_sutunu].tolist()
+
+    # Kargo firma adlarını temizle (satır sonları ve fazla boşluklar)
+    kargo_sutunlari = [
+        (' '.join(str(firma).replace('\n', ' ').split()), firma)
+        for firma in df.columns[1:]
+    ]
+
+    # Ücret matrisi: satırlar desi değerleri, sütunlar kargo firmaları
+    ucret_matrisi = pd.concat(
+        [_ucret_sutununu_temizle(df[orijinal_firma]) for _, orijinal_firma in kargo_sutunlari],
+        axis=1
+    ).to_numpy() if kargo_sutunlari else None
+
+    with transaction.atomic():
+        # Kargo firmalarını tek seferde çöz, eşleşmeyenleri oluştur
+        kargo_firmalari = list(KargoFirma.objects.all())
+        sutun_firmalari = []
+        olusturulan_firma_sayisi = 0
+        for temiz_firma, _ in kargo_sutunlari:
+            kargo_firma = kargo_firmasi_eslestir(temiz_firma, kargo_firmalari)
+            if not kargo_firma:
+                # Baş harfleri büyük yap
+                formatted_firma = ' '.join(word.capitalize() for word in temiz_firma.split())
+                kargo_firma = KargoFirma.objects.create(firma_ismi=formatted_firma, aktif=True)
+                kargo_firmalari.append(kargo_firma)
+                olusturulan_firma_sayisi += 1
+            sutun_firmalari.append(kargo_firma)
+
+        versiyon = VeriVersiyonu.objects.create(pazar_yeri=pazar_yeri, tur=VeriVersiyonu.KARGO, aciklama=aciklama)
+
+        # Pazar yeri - kargo firma ilişkileri: aktif sürümdeki firmalar korunur, dosyadakiler eklenir
+        mevcut_iliskiler = set(
+            PazaryeriKargofirma.objects.aktif().filter(pazar_yeri=pazar_yeri).values_list('kargo_firma_id', flat=True)
+        )
+        sutun_firma_idleri = {firma.id for firma in sutun_firmalari}
+        PazaryeriKargofirma.objects.bulk_create([
+            PazaryeriKargofirma(pazar_yeri=pazar_yeri, kargo_firma_id=kargo_firma_id, versiyon=versiyon)
+            for kargo_firma_id in sorted(mevcut_iliskiler | sutun_firma_idleri)
+        ])
+
+        # Desi değerlerini sürüm için oluştur
+        desiler = DesiKgDeger.objects.bulk_create([
+            DesiKgDeger(pazar_yeri=pazar_yeri, desi_degeri=desi_degeri, versiyon=versiyon)
+            for desi_degeri in desi_values
+        ], batch_size=TOPLU_KAYIT_BOYUTU)
+        desi_kg_degerleri = {desi.desi_degeri: desi.id for desi in desiler}
+
+        # Kargo ücretlerini tek seferde oluştur; boş veya sayı olmayan hücreler atlanır.
+        # Aynı firmaya eşleşen birden fazla sütun varsa dolu olan ilk hücre geçerlidir.
+        ucretler = []
+        eklenenler = set()
+        for satir, desi_degeri in enumerate(desi_values):
+            desi_kg_deger_id = desi_kg_degerleri[desi_degeri]
+            for sutun, kargo_firma in enumerate(sutun_firmalari):
+                ucret = ucret_matrisi[satir, sutun]
+                if pd.isna(ucret) or (desi_kg_deger_id, kargo_firma.id) in eklenenler:
+                    continue
+                eklenenler.add((desi_kg_deger_id, kargo_firma.id))
+                ucretler.append(DesiKgKargoUcret(
+                    pazar_yeri=pazar_yeri,
+                    kargo_firma=kargo_firma,
+                    desi_kg_deger_id=desi_kg_deger_id,
+                    ucret=Decimal(str(round(float(ucret), 2))),
+                    versiyon=versiyon
+                ))
+        DesiKgKargoUcret.objects.bulk_create(ucretler, batch_size=TOPLU_KAYIT_BOYUTU)
+
+        # Etkinleştirme derlenmiş tarifeyi de geçersiz kılar
+        onceki_versiyon_id = versiyonu_etkinlestir(versiyon) if etkinlestir else None
+
+    sonuc = {
+        'versiyon': versiyon.id,
+        'etkinlestirildi': etkinlestir,
+        'onceki_versiyon': onceki_versiyon_id,
+        'islenen_desi_sayisi': len(desi_values),
+        'islenen_kargo_firma_sayisi': len(sutun_firmalari),
+        'olusturulan_desi_sayisi': len(desiler),
+        'olusturulan_kargo_firma_sayisi': olusturulan_firma_sayisi,
+        'eklenen_ucret_sayisi': len(ucretler),
+        'atlanan_hucre_sayisi': len(desi_values) * len(sutun_firmalari) - len(ucretler),
+        'sure_ms': round((time.perf_counter() - baslangic) * 1000, 1),
+    }
+    logger.info(f"{pazar_yeri.pazar_ismi} kargo tarifesi içe aktarıldı: {sonuc}")
+    return sonuc
+
+
+def _komisyon_sutununu_temizle(sutun):
+    """
+    Komisyon oranı sütununu sayıya çevirir; yüzde işareti ve ondalık virgül temizlenir.
+    """
+    temiz = sutun.astype(str).str.replace('%', '', regex=False).str.strip().str.replace(',', '.', regex=False)
+    return pd.to_numeric(temiz, errors='coerce')
+
+
+def _kategori_yollarini_oku(df, kategori_seviyesi):
+    """
+    Her satırın kategori yolunu isim demeti olarak döndürür.
+    Boş hücre yolun bittiği yer kabul edilir.
+    """
+    yollar = []
+    for isimler in df[[f'Kategori Ağacı {i}' for i in range(1, kategori_seviyesi + 1)]].itertuples(index=False):
+        yol = []
+        for isim in isimler:
+            if pd.isna(isim) or not str(isim).strip():
+                break
+            yol.append(str(isim).strip())
+        yollar.append(tuple(yol))
+    return yollar
+
+
+def _ic_ice_kume_numaralari(yollar):
+    """
+    Kategori yollarını ön sıralı (preorder) gezerek iç içe küme (nested set)
+    numaralarını hesaplar. Her yol için (sol, sag, doğrudan alt kategori sayısı) döndürür.
+    """
+    numaralar = {}
+    alt_kategori_sayilari = dict.fromkeys(yollar, 0)
+    sayac = 1
+    yigin = []
+
+    def kapat():
+        nonlocal sayac
+        numaralar[yigin.pop()][1] = sayac
+        sayac += 1
+
+    # İsim demetleri sıralandığında her yol, alt yollarından hemen önce gelir
+    for yol in sorted(yollar):
+        while yigin and yol[:len(yigin[-1])] != yigin[-1]:
+            kapat()
+        numaralar[yol] = [sayac, None]
+        sayac += 1
+        if len(yol) > 1:
+            alt_kategori_sayilari[yol[:-1]] += 1
+        yigin.append(yol)
+    while yigin:
+        kapat()
+
+    return {yol: (sol, sag, alt_kategori_sayilari[yol]) for yol, (sol, sag) in numaralar.items()}
+
+
+def komisyon_tablosu_aktar(pazar_yeri, kategori_seviyesi, df, aciklama='', etkinlestir=True):
+    """
+    Kategori ağacı sütunları ve komisyon oranından oluşan tabloyu pazar yerinin
+    komisyon tablosunun yeni bir sürümü olarak kaydeder. Kategori ağacı benzersiz
+    yollardan bellekte seviye seviye kurulur ve her seviye tek bulk_create ile
+    yazılır. etkinlestir True ise sürüm aynı transaction içinde aktif yapılır;
+    önceki sürüm geri dönüş için saklanır. İşlem istatistiklerini döndürür.
+    """
+    baslangic = time.perf_counter()
+
+    komisyon_oranlari = _komisyon_sutununu_temizle(df['Komisyon Oranı'])
+    yollar = _kategori_yollarini_oku(df, kategori_seviyesi)
+
+    hatali_satirlar = [
+        satir_no for satir_no, (yol, oran) in enumerate(zip(yollar, komisyon_oranlari), 2)
+        if not yol or pd.isna(oran)
+    ]
+    if hatali_satirlar:
+        raise ValueError(
+            f'Kategori veya komisyon oranı okunamayan satırlar: {", ".join(map(str, hatali_satirlar[:20]))}'
+        )
+
+    with transaction.atomic():
+        versiyon = VeriVersiyonu.objects.create(pazar_yeri=pazar_yeri, tur=VeriVersiyonu.KOMISYON, aciklama=aciklama)
+
+        # Kategori ağacını seviye seviye oluştur; anahtar kök kategoriden itibaren isim yoludur
+        kategoriler = {}
+        seviye_sayilari = {}
+        numaralar = _ic_ice_kume_numaralari({yol[:seviye] for yol in yollar for seviye in range(1, len(yol) + 1)})
+        for seviye in range(1, kategori_seviyesi + 1):
+            seviye_yollari = list(dict.fromkeys(yol[:seviye] for yol in yollar if len(yol) >= seviye))
+            olusturulanlar = HesaplamaKategoriler.objects.bulk_create([
+                HesaplamaKategoriler(
+                    adi=yol[-1],
+                    ust_kategori=kategoriler.get(yol[:-1]),
+                    seviye=seviye,
+                    pazar_yeri=pazar_yeri,
+                    versiyon=versiyon,
+                    sol=numaralar[yol][0],
+                    sag=numaralar[yol][1],
+                    alt_kategori_sayisi=numaralar[yol][2]
+                )
+                for yol in seviye_yollari
+            ], batch_size=TOPLU_KAYIT_BOYUTU)
+            kategoriler.update(zip(seviye_yollari, olusturulanlar))
+            seviye_sayilari[seviye] = len(olusturulanlar)
+
+        # Komisyon oranlarını tek seferde oluştur; geçerlilik tarihi etkinleştirmede güncellenir
+        gecerlilik_tarihi = timezone.now().date()
+        komisyonlar = []
+        for yol, komisyon_orani in zip(yollar, komisyon_oranlari):
+            yol_kategorileri = [kategoriler[yol[:seviye]] for seviye in range(1, len(yol) + 1)]
+            yaprak_kategori = yol_kategorileri[-1]
+            yol_kategorileri += [None] * (4 - len(yol_kategorileri))
+            # bulk_create save() çağırmadığı için yol alanları burada doldurulur
+            komisyonlar.append(HesaplamaKomisyonOranlari(
+                pazar_yeri=pazar_yeri,
+                kategori_1=yol_kategorileri[0],
+                kategori_2=yol_kategorileri[1],
+                kategori_3=yol_kategorileri[2],
+                kategori_4=yol_kategorileri[3],
+                kategori_yolu_metni=' > '.join(yol),
+                derinlik=len(yol),
+                yaprak_kategori=yaprak_kategori,
+                komisyon_orani=Decimal(str(round(float(komisyon_orani), 2))),
+                gecerlilik_tarihi=gecerlilik_tarihi,
+                versiyon=versiyon
+            ))
+        HesaplamaKomisyonOranlari.objects.bulk_create(komisyonlar, batch_size=TOPLU_KAYIT_BOYUTU)
+
+        # Etkinleştirme kategori arama indeksini de geçersiz kılar
+        onceki_versiyon_id = versiyonu_etkinlestir(versiyon) if etkinlestir else None
+
+    sonuc = {
+        'versiyon': versiyon.id,
+        'etkinlestirildi': etkinlestir,
+        'onceki_versiyon': onceki_versiyon_id,
+        'islenen_satir_sayisi': len(yollar),
+        'olusturulan_kategori_sayisi': sum(seviye_sayilari.values()),
+        'seviye_bazinda_kategori_sayisi': seviye_sayilari,
+        'eklenen_komisyon_sayisi': len(komisyonlar),
+        'sure_ms': round((time.perf_counter() - baslangic) * 1000, 1),
+    }
+    logger.info(f"{pazar_yeri.pazar_ismi} komisyon oranları içe aktarıldı: {sonuc}")
+    return sonuc
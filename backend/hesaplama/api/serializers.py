@@ -2,10 +2,11 @@ from rest_framework import serializers
 from hesaplama.models import (
     Pazaryeri, KargoFirma, DesiKgDeger, DesiKgKargoUcret, PazaryeriKargofirma,
     Kategori, AltKategori, UrunGrubu, KomisyonOrani, HesaplamaKategoriler, HesaplamaKomisyonOranlari,
-    KategoriYolu, Hesaplamalar, KargoHesaplamaGecmisi, HesaplamaKategoriSeviyeleri
+    KategoriYolu, Hesaplamalar, KargoHesaplamaGecmisi, HesaplamaKategoriSeviyeleri, VeriVersiyonu
 )
 from decimal import Decimal, InvalidOperation
 from django.contrib.auth import get_user_model
+from hesaplama.fiyat_tarama import TARANABILEN_DEGISKENLER, MAKSIMUM_IZGARA_NOKTASI, izgara_nokta_sayisi
 
 class PazaryeriSerializer(serializers.ModelSerializer):
     class Meta:
@@ -67,6 +68,37 @@ class KargoUcretHesaplamaSerializer(serializers.Serializer):
         }
         return data
 
+class KargoKarsilastirmaSerializer(serializers.Serializer):
+    """
+    Bir pazar yerindeki tüm aktif kargo firmalarının ücretlerini karşılaştırmak için serializer.
+    Desi/kg değeri doğrudan ya da ürün ölçülerinden (en, boy, yükseklik) hesaplanarak verilebilir.
+    """
+    pazar_yeri = serializers.PrimaryKeyRelatedField(queryset=Pazaryeri.objects.filter(aktif=True))
+    desi_kg_degeri = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    en = serializers.FloatField(min_value=0, required=False)
+    boy = serializers.FloatField(min_value=0, required=False)
+    yukseklik = serializers.FloatField(min_value=0, required=False)
+    net_agirlik = serializers.FloatField(min_value=0, required=False, default=0)
+
+    def validate(self, attrs):
+        olculer = [attrs.get(alan) for alan in ('en', 'boy', 'yukseklik')]
+        if attrs.get('desi_kg_degeri') is None and None in olculer:
+            raise serializers.ValidationError(
+                'desi_kg_degeri veya en, boy ve yukseklik alanlarının tamamı girilmelidir.'
+            )
+        return attrs
+
+    def to_representation(self, instance):
+        """
+        Form verilerini ve seçenekleri döndürür
+        """
+        return {
+            'pazar_yerleri': [
+                {'id': pazar_yeri.id, 'pazar_ismi': pazar_yeri.pazar_ismi}
+                for pazar_yeri in Pazaryeri.objects.filter(aktif=True)
+            ]
+        }
+
 # Kategori ve komisyon oranları için serializer'lar
 class KategoriSerializer(serializers.ModelSerializer):
     class Meta:
@@ -112,7 +144,7 @@ class KategoriKomisyonBulmaSerializer(serializers.Serializer):
         required=True
     )
     kategori_1 = serializers.PrimaryKeyRelatedField(
-        queryset=HesaplamaKategoriler.objects.all(),
+        queryset=HesaplamaKategoriler.objects.aktif(),
         required=True
     )
 
@@ -143,7 +175,7 @@ class KategoriKomisyonBulmaSerializer(serializers.Serializer):
                 data['pazar_yeri'] = pazar_yeri.id
                 
                 # Seviye 1 kategorileri getir (sadece seçilen pazar yerine ait)
-                kategori_1_list = HesaplamaKategoriler.objects.filter(
+                kategori_1_list = HesaplamaKategoriler.objects.aktif().filter(
                     pazar_yeri=pazar_yeri,
                     seviye=1
                 ).order_by('adi')
@@ -247,7 +279,12 @@ class KargoUcretEklemeSerializer(serializers.Serializer):
     excel_dosya = serializers.FileField(
         required=True,
         help_text="Excel dosyasını yükleyiniz"
-    ) 
+    )
+    etkinlestir = serializers.BooleanField(
+        required=False,
+        default=True,
+        help_text="Yüklenen sürüm hemen kullanıma alınsın mı? Hayır ise sürüm daha sonra etkinleştirilebilir"
+    )
 
 class KomisyonEklemeSerializer(serializers.Serializer):
     """
@@ -267,7 +304,12 @@ class KomisyonEklemeSerializer(serializers.Serializer):
     excel_dosya = serializers.FileField(
         required=True,
         help_text="Excel dosyasını yükleyiniz"
-    ) 
+    )
+    etkinlestir = serializers.BooleanField(
+        required=False,
+        default=True,
+        help_text="Yüklenen sürüm hemen kullanıma alınsın mı? Hayır ise sürüm daha sonra etkinleştirilebilir"
+    )
 
 class HesaplamaKategorilerSerializer(serializers.ModelSerializer):
     """
@@ -296,14 +338,7 @@ class HesaplamaKomisyonOranlariSerializer(serializers.ModelSerializer):
                  'komisyon_orani', 'gecerlilik_tarihi', 'kategori_yolu']
     
     def get_kategori_yolu(self, obj):
-        yol = obj.kategori_1.adi
-        if obj.kategori_2:
-            yol += f" > {obj.kategori_2.adi}"
-        if obj.kategori_3:
-            yol += f" > {obj.kategori_3.adi}"
-        if obj.kategori_4:
-            yol += f" > {obj.kategori_4.adi}"
-        return yol
+        return obj.kategori_yolu_metni
 
 class YeniKategoriKomisyonBulmaSerializer(serializers.Serializer):
     """
@@ -319,22 +354,22 @@ class YeniKategoriKomisyonBulmaSerializer(serializers.Serializer):
         required=True
     )
     kategori_1 = serializers.PrimaryKeyRelatedField(
-        queryset=HesaplamaKategoriler.objects.filter(seviye=1),
+        queryset=HesaplamaKategoriler.objects.aktif().filter(seviye=1),
         help_text="Kategori seçiniz",
         required=True
     )
     kategori_2 = serializers.PrimaryKeyRelatedField(
-        queryset=HesaplamaKategoriler.objects.filter(seviye=2),
+        queryset=HesaplamaKategoriler.objects.aktif().filter(seviye=2),
         help_text="Alt kategori seçiniz",
         required=False
     )
     kategori_3 = serializers.PrimaryKeyRelatedField(
-        queryset=HesaplamaKategoriler.objects.filter(seviye=3),
+        queryset=HesaplamaKategoriler.objects.aktif().filter(seviye=3),
         help_text="Alt kategori seçiniz",
         required=False
     )
     kategori_4 = serializers.PrimaryKeyRelatedField(
-        queryset=HesaplamaKategoriler.objects.filter(seviye=4),
+        queryset=HesaplamaKategoriler.objects.aktif().filter(seviye=4),
         help_text="Alt kategori seçiniz",
         required=False
     )
@@ -354,7 +389,7 @@ class YeniKategoriKomisyonBulmaSerializer(serializers.Serializer):
         pazar_yeri_id = self.context.get('pazar_yeri_id')
         if pazar_yeri_id:
             # Seviye 1 kategorileri
-            kategori_1_choices = HesaplamaKategoriler.objects.filter(
+            kategori_1_choices = HesaplamaKategoriler.objects.aktif().filter(
                 pazar_yeri_id=pazar_yeri_id,
                 seviye=1
             ).order_by('adi')
@@ -367,7 +402,7 @@ class YeniKategoriKomisyonBulmaSerializer(serializers.Serializer):
             kategori_1_id = self.context.get('kategori_1_id')
             kategori_2_data = []
             if kategori_1_id:
-                kategori_2_choices = HesaplamaKategoriler.objects.filter(
+                kategori_2_choices = HesaplamaKategoriler.objects.aktif().filter(
                     pazar_yeri_id=pazar_yeri_id,
                     seviye=2,
                     ust_kategori_id=kategori_1_id
@@ -381,7 +416,7 @@ class YeniKategoriKomisyonBulmaSerializer(serializers.Serializer):
             kategori_2_id = self.context.get('kategori_2_id')
             kategori_3_data = []
             if kategori_2_id:
-                kategori_3_choices = HesaplamaKategoriler.objects.filter(
+                kategori_3_choices = HesaplamaKategoriler.objects.aktif().filter(
                     pazar_yeri_id=pazar_yeri_id,
                     seviye=3,
                     ust_kategori_id=kategori_2_id
@@ -395,7 +430,7 @@ class YeniKategoriKomisyonBulmaSerializer(serializers.Serializer):
             kategori_3_id = self.context.get('kategori_3_id')
             kategori_4_data = []
             if kategori_3_id:
-                kategori_4_choices = HesaplamaKategoriler.objects.filter(
+                kategori_4_choices = HesaplamaKategoriler.objects.aktif().filter(
                     pazar_yeri_id=pazar_yeri_id,
                     seviye=4,
                     ust_kategori_id=kategori_3_id
@@ -429,7 +464,7 @@ class KomisyonOraniBulmaSerializer(serializers.Serializer):
         help_text="Pazar yeri seçiniz"
     )
     kategori_yolu = serializers.PrimaryKeyRelatedField(
-        queryset=HesaplamaKomisyonOranlari.objects.all(),
+        queryset=HesaplamaKomisyonOranlari.objects.aktif(),
         required=True,
         help_text="Kategori yolu seçiniz",
         label="Kategori Ağacı"
@@ -440,7 +475,7 @@ class KomisyonOraniBulmaSerializer(serializers.Serializer):
         # Eğer pazar_yeri_id verilmişse, kategori_yolu queryset'ini filtreleme
         pazar_yeri_id = kwargs.get('context', {}).get('pazar_yeri_id')
         if pazar_yeri_id:
-            self.fields['kategori_yolu'].queryset = HesaplamaKomisyonOranlari.objects.filter(
+            self.fields['kategori_yolu'].queryset = HesaplamaKomisyonOranlari.objects.aktif().filter(
                 pazar_yeri_id=pazar_yeri_id
             )
         else:
@@ -469,34 +504,18 @@ class KomisyonOraniBulmaSerializer(serializers.Serializer):
         # Eğer pazar yeri seçilmişse, o pazar yerine ait kategori yollarını al
         pazar_yeri_id = self.context.get('pazar_yeri_id')
         if pazar_yeri_id:
-            kategori_yollari = HesaplamaKomisyonOranlari.objects.filter(
+            # Kategori yolu içe aktarma sırasında hesaplandığı için tek sorgu yeterli
+            kategori_yollari = HesaplamaKomisyonOranlari.objects.aktif().filter(
                 pazar_yeri_id=pazar_yeri_id
-            ).select_related(
-                'kategori_1',
-                'kategori_2',
-                'kategori_3',
-                'kategori_4'
-            ).order_by('kategori_1__adi')
+            ).order_by('kategori_yolu_metni').values_list('id', 'kategori_yolu_metni', 'komisyon_orani')
             
             kategori_yolu_choices = [
                 {'id': None, 'kategori_yolu': '---- Kategori Ağacı Seçiniz ----'}
+            ] + [
+                {'id': id, 'kategori_yolu': yol, 'komisyon_orani': komisyon_orani}
+                for id, yol, komisyon_orani in kategori_yollari
             ]
             
-            for ko in kategori_yollari:
-                yol = ko.kategori_1.adi
-                if ko.kategori_2:
-                    yol += f" > {ko.kategori_2.adi}"
-                if ko.kategori_3:
-                    yol += f" > {ko.kategori_3.adi}"
-                if ko.kategori_4:
-                    yol += f" > {ko.kategori_4.adi}"
-                
-                kategori_yolu_choices.append({
-                    'id': ko.id,
-                    'kategori_yolu': yol,
-                    'komisyon_orani': ko.komisyon_orani
-                })
-            
             data['kategori_yolu_choices'] = kategori_yolu_choices
         
         return data 
@@ -511,7 +530,7 @@ class FiyatHesaplamaSerializer(serializers.Serializer):
     paketleme_bedeli = serializers.DecimalField(max_digits=10, decimal_places=2)
     urun_desi_kg = serializers.DecimalField(max_digits=10, decimal_places=2)
     kargo_firma = serializers.PrimaryKeyRelatedField(queryset=KargoFirma.objects.all())
-    kategori_yolu = serializers.PrimaryKeyRelatedField(queryset=HesaplamaKategoriler.objects.all())
+    kategori_yolu = serializers.PrimaryKeyRelatedField(queryset=HesaplamaKategoriler.objects.aktif())
     kar_orani = serializers.DecimalField(max_digits=5, decimal_places=2)
     kdv_orani = serializers.DecimalField(max_digits=5, decimal_places=2)
 
@@ -520,6 +539,16 @@ class FiyatHesaplamaSerializer(serializers.Serializer):
         GET isteği için form verilerini ve seçenekleri döndürür
         """
         if not instance:
+            # Tüm kategoriler yerine yalnızca seçilen pazar yerinin yaprak kategorileri döner
+            kategoriler = []
+            pazar_yeri_id = self.context.get('pazar_yeri_id')
+            if pazar_yeri_id:
+                kategoriler = [
+                    {'id': id, 'ad': yol}
+                    for id, yol in HesaplamaKomisyonOranlari.objects.aktif().filter(
+                        pazar_yeri_id=pazar_yeri_id, yaprak_kategori__isnull=False
+                    ).order_by('kategori_yolu_metni').values_list('yaprak_kategori_id', 'kategori_yolu_metni')
+                ]
             return {
                 'pazar_yerleri': [
                     {'id': p.id, 'pazar_ismi': p.pazar_ismi}
@@ -529,10 +558,7 @@ class FiyatHesaplamaSerializer(serializers.Serializer):
                     {'id': k.id, 'firma_ismi': k.firma_ismi}
                     for k in KargoFirma.objects.filter(aktif=True)
                 ],
-                'kategoriler': [
-                    {'id': k.id, 'ad': k.ad}
-                    for k in HesaplamaKategoriler.objects.all()
-                ]
+                'kategoriler': kategoriler
             }
         return super().to_representation(instance) 
 
@@ -580,4 +606,281 @@ class MarketplacePriceCalculationSerializer(serializers.Serializer):
                 for kargo_firma in KargoFirma.objects.filter(aktif=True)
             ]
         }
-        return data 
\ No newline at end of file
+        return data 
+
+class FiyatMatrisiSerializer(serializers.Serializer):
+    """
+    Bir ürünün pazar yeri x kargo firması fiyat matrisi için serializer.
+    Komisyon oranı tüm pazar yerleri için ortak (komisyon_orani) ya da pazar yeri bazında
+    kategori yolu (komisyon oranı kaydı) ID'siyle (kategori_yollari) verilebilir.
+    """
+    urun_maliyeti = serializers.DecimalField(max_digits=10, decimal_places=2)
+    paketleme_bedeli = serializers.DecimalField(max_digits=10, decimal_places=2)
+    urun_desi_kg = serializers.DecimalField(max_digits=10, decimal_places=2)
+    kar_orani = serializers.DecimalField(max_digits=5, decimal_places=2)
+    kdv_orani = serializers.DecimalField(max_digits=5, decimal_places=2)
+    komisyon_orani = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    kategori_yollari = serializers.DictField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="{pazar_yeri_id: kategori yolu (komisyon oranı) ID'si}"
+    )
+    pazar_yerleri = serializers.ListField(
+        child=serializers.IntegerField(), required=False, help_text="Pazar yeri ID'leri (varsayılan: tüm aktifler)"
+    )
+    kargo_firmalari = serializers.ListField(
+        child=serializers.IntegerField(), required=False, help_text="Kargo firması ID'leri (varsayılan: tüm aktifler)"
+    )
+
+    def validate_kategori_yollari(self, value):
+        try:
+            return {int(pazar_yeri_id): kategori_yolu for pazar_yeri_id, kategori_yolu in value.items()}
+        except ValueError:
+            raise serializers.ValidationError('Anahtarlar pazar yeri ID\'si olmalıdır.')
+
+    def validate(self, attrs):
+        if attrs.get('komisyon_orani') is None and not attrs.get('kategori_yollari'):
+            raise serializers.ValidationError('komisyon_orani veya kategori_yollari alanlarından biri girilmelidir.')
+        # Aynı istek farklı sırayla gönderildiğinde de aynı önbellek kaydını kullansın
+        for alan in ('pazar_yerleri', 'kargo_firmalari'):
+            if alan in attrs:
+                attrs[alan] = sorted(set(attrs[alan]))
+        return attrs
+
+    def to_representation(self, instance):
+        """
+        Form verilerini ve seçenekleri döndürür
+        """
+        return {
+            'pazar_yerleri': [
+                {'id': pazar_yeri.id, 'pazar_ismi': pazar_yeri.pazar_ismi}
+                for pazar_yeri in Pazaryeri.objects.filter(aktif=True)
+            ],
+            'kargo_firmalari': [
+                {'id': kargo_firma.id, 'firma_ismi': kargo_firma.firma_ismi}
+                for kargo_firma in KargoFirma.objects.filter(aktif=True)
+            ]
+        }
+
+class FiyatCozucuSerializer(serializers.Serializer):
+    """
+    Hedef kâr veya hedef fiyattan bilinmeyen değişkeni çözmek için serializer.
+
+    bilinmeyen alanına göre gerekenler:
+    - satis_fiyati: urun_maliyeti, urun_desi_kg ve kar_orani ya da hedef_kar
+    - kar_orani: urun_maliyeti, urun_desi_kg ve hedef_fiyat
+    - urun_maliyeti: urun_desi_kg, hedef_fiyat ve kar_orani ya da hedef_kar
+    - desi_kg: urun_maliyeti, hedef_fiyat ve kar_orani ya da hedef_kar
+    kargo_firma verilmezse pazar yerine hizmet veren tüm kargo firmaları için çözülür.
+    """
+    GEREKLI_ALANLAR = {
+        'satis_fiyati': ('urun_maliyeti', 'urun_desi_kg'),
+        'kar_orani': ('urun_maliyeti', 'urun_desi_kg', 'hedef_fiyat'),
+        'urun_maliyeti': ('urun_desi_kg', 'hedef_fiyat'),
+        'desi_kg': ('urun_maliyeti', 'hedef_fiyat'),
+    }
+
+    bilinmeyen = serializers.ChoiceField(choices=list(GEREKLI_ALANLAR))
+    pazar_yeri = serializers.PrimaryKeyRelatedField(queryset=Pazaryeri.objects.filter(aktif=True))
+    kargo_firma = serializers.PrimaryKeyRelatedField(queryset=KargoFirma.objects.filter(aktif=True), required=False)
+    urun_maliyeti = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    paketleme_bedeli = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), default=Decimal('0'))
+    urun_desi_kg = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    komisyon_orani = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=Decimal('0'))
+    kdv_orani = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=Decimal('0'))
+    kar_orani = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    hedef_kar = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, help_text='Ürün başına hedeflenen net kâr (TL)'
+    )
+    hedef_fiyat = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal('0.01'), required=False,
+        help_text='Rakip fiyatı veya çıkılabilecek en yüksek satış fiyatı'
+    )
+    hedef_fiyat_kdv_dahil = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        bilinmeyen = attrs['bilinmeyen']
+        eksikler = [alan for alan in self.GEREKLI_ALANLAR[bilinmeyen] if attrs.get(alan) is None]
+        if eksikler:
+            raise serializers.ValidationError({alan: 'Bu çözüm için bu alan gereklidir.' for alan in eksikler})
+        if bilinmeyen != 'kar_orani':
+            hedefler = [alan for alan in ('kar_orani', 'hedef_kar') if attrs.get(alan) is not None]
+            if len(hedefler) != 1:
+                raise serializers.ValidationError('kar_orani veya hedef_kar alanlarından yalnızca biri girilmelidir.')
+        return attrs
+
+    def to_representation(self, instance):
+        """
+        Form verilerini ve seçenekleri döndürür
+        """
+        return {
+            'bilinmeyenler': list(self.GEREKLI_ALANLAR),
+            'pazar_yerleri': [
+                {'id': pazar_yeri.id, 'pazar_ismi': pazar_yeri.pazar_ismi}
+                for pazar_yeri in Pazaryeri.objects.filter(aktif=True)
+            ],
+            'kargo_firmalari': [
+                {'id': kargo_firma.id, 'firma_ismi': kargo_firma.firma_ismi}
+                for kargo_firma in KargoFirma.objects.filter(aktif=True)
+            ]
+        }
+
+class TaramaEkseniSerializer(serializers.Serializer):
+    """
+    Fiyat taramasında bir değişkenin [baslangic, bitis] aralığı ve adımı
+    """
+    degisken = serializers.ChoiceField(choices=TARANABILEN_DEGISKENLER)
+    baslangic = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'))
+    bitis = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'))
+    adim = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+    def validate(self, attrs):
+        if attrs['bitis'] < attrs['baslangic']:
+            raise serializers.ValidationError('bitis, baslangic değerinden küçük olamaz.')
+        return attrs
+
+class FiyatTaramaSerializer(serializers.Serializer):
+    """
+    Satış fiyatının bir veya iki değişkene (desi, kâr oranı, komisyon oranı) göre taranması için serializer.
+    Taranan değişkenlerin sabit değerleri gönderilmez; diğerleri zorunludur.
+    """
+    pazar_yeri = serializers.PrimaryKeyRelatedField(queryset=Pazaryeri.objects.filter(aktif=True))
+    kargo_firma = serializers.PrimaryKeyRelatedField(queryset=KargoFirma.objects.filter(aktif=True))
+    urun_maliyeti = serializers.DecimalField(max_digits=10, decimal_places=2)
+    paketleme_bedeli = serializers.DecimalField(max_digits=10, decimal_places=2)
+    kdv_orani = serializers.DecimalField(max_digits=5, decimal_places=2)
+    urun_desi_kg = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    komisyon_orani = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    kar_orani = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    eksenler = TaramaEkseniSerializer(many=True, min_length=1, max_length=2)
+    eksen_basina_en_fazla = serializers.IntegerField(
+        min_value=2, required=False, help_text='Yanıtta eksen başına en fazla nokta sayısı (seyreltme)'
+    )
+
+    def validate(self, attrs):
+        taranan = [eksen['degisken'] for eksen in attrs['eksenler']]
+        if len(set(taranan)) != len(taranan):
+            raise serializers.ValidationError({'eksenler': 'Aynı değişken birden fazla eksende taranamaz.'})
+        eksikler = [
+            degisken for degisken in TARANABILEN_DEGISKENLER
+            if degisken not in taranan and attrs.get(degisken) is None
+        ]
+        if eksikler:
+            raise serializers.ValidationError({degisken: 'Taranmayan değişkenin değeri gereklidir.' for degisken in eksikler})
+        nokta_sayisi = izgara_nokta_sayisi(attrs['eksenler'])
+        if nokta_sayisi > MAKSIMUM_IZGARA_NOKTASI:
+            raise serializers.ValidationError(
+                f'Izgara en fazla {MAKSIMUM_IZGARA_NOKTASI} nokta olabilir (istenen: {nokta_sayisi}).'
+            )
+        return attrs
+
+    def to_representation(self, instance):
+        """
+        Form verilerini ve seçenekleri döndürür
+        """
+        return {
+            'taranabilen_degiskenler': list(TARANABILEN_DEGISKENLER),
+            'maksimum_izgara_noktasi': MAKSIMUM_IZGARA_NOKTASI,
+            'pazar_yerleri': [
+                {'id': pazar_yeri.id, 'pazar_ismi': pazar_yeri.pazar_ismi}
+                for pazar_yeri in Pazaryeri.objects.filter(aktif=True)
+            ],
+            'kargo_firmalari': [
+                {'id': kargo_firma.id, 'firma_ismi': kargo_firma.firma_ismi}
+                for kargo_firma in KargoFirma.objects.filter(aktif=True)
+            ]
+        }
+
+class TopluFiyatUrunSerializer(serializers.Serializer):
+    """
+    Toplu fiyat hesaplamada tek bir ürün satırı için serializer
+    """
+    urun_kodu = serializers.CharField(required=False, allow_blank=True, allow_null=True, max_length=100)
+    urun_maliyeti = TurkishDecimalField(max_digits=10, decimal_places=2)
+    paketleme_bedeli = TurkishDecimalField(max_digits=10, decimal_places=2)
+    urun_desi_kg = TurkishDecimalField(max_digits=10, decimal_places=2)
+    kargo_firma = serializers.IntegerField()
+    komisyon_orani = TurkishDecimalField(max_digits=5, decimal_places=2, required=False, allow_null=True)
+    kategori_yolu = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        help_text="Komisyon oranı verilmezse kullanılacak kategori yolu (komisyon oranı) ID'si"
+    )
+    kar_orani = TurkishDecimalField(max_digits=5, decimal_places=2)
+    kdv_orani = TurkishDecimalField(max_digits=5, decimal_places=2)
+
+    def validate(self, attrs):
+        if attrs.get('komisyon_orani') is None and attrs.get('kategori_yolu') is None:
+            raise serializers.ValidationError('komisyon_orani veya kategori_yolu alanlarından biri girilmelidir.')
+        return attrs
+
+
+class TopluFiyatHesaplamaSerializer(serializers.Serializer):
+    """
+    Toplu pazar yeri satış fiyatı hesaplama için serializer.
+    Ürünler JSON listesi olarak ya da CSV/XLSX dosyası olarak gönderilebilir.
+    """
+    email = serializers.EmailField(required=False)
+    pazar_yeri = serializers.PrimaryKeyRelatedField(queryset=Pazaryeri.objects.filter(aktif=True))
+    urunler = serializers.ListField(
+        child=serializers.DictField(),
+        required=False,
+        help_text="Ürün satırları listesi"
+    )
+    dosya = serializers.FileField(
+        required=False,
+        help_text="Ürün satırlarını içeren CSV veya XLSX dosyası"
+    )
+
+    def validate(self, attrs):
+        if not attrs.get('urunler') and not attrs.get('dosya'):
+            raise serializers.ValidationError('urunler listesi veya dosya alanlarından biri girilmelidir.')
+        return attrs
+
+class KategoriAgaciDugumSerializer(serializers.ModelSerializer):
+    """
+    Kategori ağacında gezinme için tek bir düğümü (alt kategori sayıları ile) döndürür
+    """
+    toplam_alt_kategori_sayisi = serializers.ReadOnlyField()
+    komisyon_orani = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        read_only=True,
+        allow_null=True,
+        help_text="Kategori bir yaprak ise komisyon oranı"
+    )
+
+    class Meta:
+        model = HesaplamaKategoriler
+        fields = ['id', 'adi', 'seviye', 'ust_kategori', 'alt_kategori_sayisi',
+                  'toplam_alt_kategori_sayisi', 'komisyon_orani']
+
+class VeriVersiyonuSerializer(serializers.ModelSerializer):
+    """
+    Kargo tarifesi ve komisyon tablosu sürümleri için serializer
+    """
+    pazar_yeri_ismi = serializers.CharField(source='pazar_yeri.pazar_ismi', read_only=True)
+    aktif = serializers.SerializerMethodField()
+
+    class Meta:
+        model = VeriVersiyonu
+        fields = ['id', 'pazar_yeri', 'pazar_yeri_ismi', 'tur', 'aciklama', 'olusturma_tarihi',
+                  'gecerlilik_tarihi', 'gecerlilik_bitis_tarihi', 'aktif']
+
+    def get_aktif(self, obj):
+        return getattr(obj.pazar_yeri, f'aktif_{obj.tur}_versiyonu_id') == obj.id
+
+class GecmisDisaAktarimSerializer(serializers.Serializer):
+    """
+    Hesaplama geçmişi dışa aktarımı için sorgu parametreleri
+    """
+    baslangic = serializers.DateField(required=False, help_text="Bu tarih ve sonrasındaki kayıtlar (YYYY-AA-GG)")
+    bitis = serializers.DateField(required=False, help_text="Bu tarih ve öncesindeki kayıtlar (YYYY-AA-GG)")
+    pazar_yeri = serializers.IntegerField(required=False, min_value=1, help_text="Pazar yeri ID'si")
+    kullanici = serializers.CharField(required=False, help_text="Kullanıcı adı")
+    bicim = serializers.ChoiceField(choices=['csv', 'xlsx'], default='csv', help_text="Dosya biçimi")
+
+    def validate(self, attrs):
+        if attrs.get('baslangic') and attrs.get('bitis') and attrs['baslangic'] > attrs['bitis']:
+            raise serializers.ValidationError('Başlangıç tarihi bitiş tarihinden sonra olamaz.')
+        return attrs
@@ -4,12 +4,14 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from .views import (
-    KargoFirmaViewSet, DesiKgDegerViewSet, DesiKgKargoUcretViewSet, KargoUcretHesaplamaView,
+    KargoFirmaViewSet, DesiKgDegerViewSet, DesiKgKargoUcretViewSet, KargoUcretHesaplamaView, KargoKarsilastirmaView,
     KategoriViewSet, AltKategoriViewSet, UrunGrubuViewSet, KomisyonOraniViewSet,
     KullaniciHesaplamalariViewSet,
     AltKategoriListView, UrunGrubuListView, EksikHesaplamaView, PazaryeriViewSet, PazaryeriKargofirmaViewSet,
-    KargoUcretEklemeView, KomisyonEklemeView, KomisyonOraniBulmaView,
-    FiyatHesaplamaView, DesiKgHesaplamaView, MarketplacePriceCalculationView
+    KargoUcretEklemeView, KomisyonEklemeView, KomisyonOraniBulmaView, KategoriAramaView,
+    KategoriAgaciView,
+    FiyatHesaplamaView, DesiKgHesaplamaView, MarketplacePriceCalculationView,
+    MarketplaceTopluFiyatHesaplamaView, FiyatMatrisiView, FiyatCozucuView, FiyatTaramaView, VeriVersiyonuViewSet, GecmisDisaAktarimView, prometheus_metrikleri
 )
 
 # Admin router for admin endpoints
@@ -22,6 +24,7 @@ admin_router.register('alt-kategoriler', AltKategoriViewSet, basename='admin-alt
 admin_router.register('urun-gruplari', UrunGrubuViewSet, basename='admin-urun-grubu')
 admin_router.register('komisyon-oranlari', KomisyonOraniViewSet, basename='admin-komisyon-orani')
 admin_router.register('kullanici-islemleri', KullaniciHesaplamalariViewSet, basename='admin-kullanici-islemleri')
+admin_router.register('veri-versiyonlari', VeriVersiyonuViewSet, basename='admin-veri-versiyonu')
 
 @api_view(['GET'])
 def api_root(request, format=None):
@@ -50,9 +53,11 @@ def admin_root(request, format=None):
         'urun-gruplari': reverse('admin-urun-grubu-list', request=request, format=format),
         'komisyon-oranlari': reverse('admin-komisyon-orani-list', request=request, format=format),
         'kullanici-islemleri': reverse('admin-kullanici-islemleri-list', request=request, format=format),
+        'veri-versiyonlari': reverse('admin-veri-versiyonu-list', request=request, format=format),
         'eksik-hesaplama': reverse('admin-eksik-hesaplama', request=request, format=format),
         'kargo-ucret-ekleme': reverse('admin-kargo-ucret-ekleme', request=request, format=format),
         'komisyon-ekleme': reverse('admin-komisyon-ekleme', request=request, format=format),
+        'gecmis-disa-aktar': reverse('admin-gecmis-disa-aktar', request=request, kwargs={'tablo': 'fiyat'}, format=format),
     })
 
 @api_view(['GET'])
@@ -64,9 +69,16 @@ def user_root(request, username, format=None):
     actual_username = username.replace('username-', '', 1)
     return Response({
         'kargo-ucret-hesap': reverse('user-kargo-ucret-hesap', request=request, kwargs={'username': username}, format=format),
+        'kargo-karsilastirma': reverse('user-kargo-karsilastirma', request=request, kwargs={'username': username}, format=format),
         'komisyon-orani-bulma': reverse('user-komisyon-orani-bulma', request=request, kwargs={'username': username}, format=format),
+        'kategori-arama': reverse('user-kategori-arama', request=request, kwargs={'username': username}, format=format),
+        'kategori-agaci': reverse('user-kategori-agaci', request=request, kwargs={'username': username}, format=format),
         'desi-kg-hesaplama': reverse('user-desi-kg-hesaplama', request=request, kwargs={'username': username}, format=format),
         'marketplace-fiyat-hesap': reverse('marketplace-fiyat-hesaplama', request=request, kwargs={'username': username}, format=format),
+        'marketplace-toplu-fiyat-hesap': reverse('marketplace-toplu-fiyat-hesaplama', request=request, kwargs={'username': username}, format=format),
+        'marketplace-fiyat-matrisi': reverse('marketplace-fiyat-matrisi', request=request, kwargs={'username': username}, format=format),
+        'marketplace-fiyat-cozucu': reverse('marketplace-fiyat-cozucu', request=request, kwargs={'username': username}, format=format),
+        'marketplace-fiyat-tarama': reverse('marketplace-fiyat-tarama', request=request, kwargs={'username': username}, format=format),
     })
 
 router = DefaultRouter()
@@ -84,6 +96,9 @@ router.register(r'kullanici-hesaplamalari', KullaniciHesaplamalariViewSet, basen
 urlpatterns = [
     # API root viewset
     path('', api_root, name='hesap-api-root'),
+
+    # İstek ölçümü metrikleri (Prometheus)
+    path('metrikler/', prometheus_metrikleri, name='prometheus-metrikleri'),
     
     # Admin endpoints
     path('admin/', admin_root, name='admin-root'),
@@ -91,13 +106,21 @@ urlpatterns = [
     path('admin/eksik-hesaplama/', EksikHesaplamaView.as_view(), name='admin-eksik-hesaplama'),
     path('admin/kargo-ucret-ekleme/', KargoUcretEklemeView.as_view(), name='admin-kargo-ucret-ekleme'),
     path('admin/komisyon-ekleme/', KomisyonEklemeView.as_view(), name='admin-komisyon-ekleme'),
+    path('admin/gecmis-disa-aktar/<str:tablo>/', GecmisDisaAktarimView.as_view(), name='admin-gecmis-disa-aktar'),
     
     # User-specific endpoints
     path('<str:username>/', user_root, name='user-root'),
     path('<str:username>/kargo-ucret-hesap/', KargoUcretHesaplamaView.as_view(), name='user-kargo-ucret-hesap'),
+    path('<str:username>/kargo-ucret-hesap/karsilastir/', KargoKarsilastirmaView.as_view(), name='user-kargo-karsilastirma'),
     path('<str:username>/komisyon-orani-bulma/', KomisyonOraniBulmaView.as_view(), name='user-komisyon-orani-bulma'),
+    path('<str:username>/komisyon-orani-bulma/ara/', KategoriAramaView.as_view(), name='user-kategori-arama'),
+    path('<str:username>/kategori-agaci/', KategoriAgaciView.as_view(), name='user-kategori-agaci'),
     path('<str:username>/desi-kg-hesaplama/', DesiKgHesaplamaView.as_view(), name='user-desi-kg-hesaplama'),
     path('<str:username>/marketplace-fiyat-hesap/', MarketplacePriceCalculationView.as_view(), name='marketplace-fiyat-hesaplama'),
+    path('<str:username>/marketplace-fiyat-hesap/toplu/', MarketplaceTopluFiyatHesaplamaView.as_view(), name='marketplace-toplu-fiyat-hesaplama'),
+    path('<str:username>/marketplace-fiyat-hesap/matris/', FiyatMatrisiView.as_view(), name='marketplace-fiyat-matrisi'),
+    path('<str:username>/marketplace-fiyat-hesap/coz/', FiyatCozucuView.as_view(), name='marketplace-fiyat-cozucu'),
+    path('<str:username>/marketplace-fiyat-hesap/tarama/', FiyatTaramaView.as_view(), name='marketplace-fiyat-tarama'),
     
     # Dynamic dropdown endpoints
     path('kategoriler/<int:kategori_id>/alt-kategoriler/', AltKategoriListView.as_view(), name='alt-kategori-list'),
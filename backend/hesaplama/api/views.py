@@ -1,33 +1,57 @@
-from rest_framework import viewsets, status, filters, permissions
+from rest_framework import viewsets, mixins, status, filters, permissions
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.http import StreamingHttpResponse, HttpResponse, FileResponse, Http404
 from django.contrib.auth import get_user_model
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch, Q, OuterRef, Subquery
 from hesaplama.models import KargoFirma, DesiKgDeger, DesiKgKargoUcret, Kategori, AltKategori, UrunGrubu, KomisyonOrani, Hesaplamalar, Pazaryeri, PazaryeriKargofirma, KargoHesaplamaGecmisi
 from .serializers import (
     PazaryeriSerializer, KargoFirmaSerializer, DesiKgDegerSerializer,
     DesiKgKargoUcretSerializer, PazaryeriKargofirmaSerializer,
-    KargoUcretHesaplamaSerializer, KategoriSerializer, AltKategoriSerializer,
+    KargoUcretHesaplamaSerializer, KargoKarsilastirmaSerializer, KategoriSerializer, AltKategoriSerializer,
     UrunGrubuSerializer, KomisyonOraniSerializer,
     KategoriKomisyonBulmaSerializer, UserHesaplamalarSerializer, EksikHesaplamaSerializer, KargoUcretEklemeSerializer, KomisyonEklemeSerializer,
-    KomisyonOraniBulmaSerializer, FiyatHesaplamaSerializer, DesiKgHesaplamaSerializer, MarketplacePriceCalculationSerializer
+    KomisyonOraniBulmaSerializer, FiyatHesaplamaSerializer, DesiKgHesaplamaSerializer, MarketplacePriceCalculationSerializer,
+    TopluFiyatHesaplamaSerializer, TopluFiyatUrunSerializer, FiyatMatrisiSerializer, FiyatCozucuSerializer,
+    FiyatTaramaSerializer, KategoriAgaciDugumSerializer,
+    VeriVersiyonuSerializer, GecmisDisaAktarimSerializer
 )
 from .permissions import IsSuperUserOrReadOnly
-import math
+import hashlib
+import json
 from decimal import Decimal
 from rest_framework import serializers
 import logging
+import tempfile
 from rest_framework import renderers
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
+from rest_framework.pagination import CursorPagination
 import pandas as pd
 from django.utils import timezone
-from hesaplama.models import HesaplamaKategoriSeviyeleri, HesaplamaKategoriler, HesaplamaKomisyonOranlari
-from django.core.exceptions import ValidationError
+from hesaplama.models import HesaplamaKategoriSeviyeleri, HesaplamaKategoriler, HesaplamaKomisyonOranlari, FiyatHesaplamaGecmisi, VeriVersiyonu
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
 from datetime import datetime, timedelta
 from hesaplama.utils import check_and_link_calculations
+from hesaplama.tarife import pazar_yeri_tarifesi_getir, desi_kg_hesapla
+from hesaplama.kategori_arama import kategori_ara, VARSAYILAN_SONUC_SAYISI, MAKSIMUM_SONUC_SAYISI
+from hesaplama.aktarim import kargo_tarifesi_aktar, komisyon_tablosu_aktar
+from hesaplama.versiyonlar import versiyonu_etkinlestir
+from hesaplama.form_onbellek import form_verisi_getir
+from hesaplama.raporlar import hesaplamasi_olan_kullanicilar, kullanici_raporu_akisi
+from hesaplama.disa_aktarim import GECMIS_TABLOLARI, csv_satirlari, xlsx_yaz
+from hesaplama.gecmis_kaydedici import gecmis_kaydedici
+from hesaplama.fiyat_matrisi import fiyat_matrisi_getir
+from hesaplama.fiyat_cozucu import fiyat_coz
+from hesaplama.fiyat_tarama import fiyat_taramasi_hesapla
+from hesaplama.istek_olcumu import IstekOlcumuMixin, prometheus_metinleri
+from hesaplama.fiyatlama import (
+    STOPAJ_ORANI, hizmet_bedeli_getir, satis_fiyati_hesapla, satis_fiyatlari_hesapla, kurustan_decimal
+)
 
 # Mixin to validate username in URL
 class UsernameMixin:
@@ -49,7 +73,34 @@ class UsernameMixin:
             # Giriş yapmamış kullanıcılar için herhangi bir kısıtlama yok
             return None
 
-class PazaryeriViewSet(viewsets.ModelViewSet):
+def etag_ile_yanitla(request, response, etag=None):
+    """
+    Yanıt içeriğinden ETag üretir (verilmemişse); istemcinin If-None-Match değeri eşleşirse 304 döndürür
+    """
+    if etag is None:
+        icerik = json.dumps(response.data, sort_keys=True, default=str, ensure_ascii=False)
+        etag = f'"{hashlib.md5(icerik.encode()).hexdigest()}"'
+    istemci_etaglari = {
+        deger.strip().removeprefix('W/')
+        for deger in request.headers.get('If-None-Match', '').split(',')
+    }
+    if etag in istemci_etaglari:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def pazar_yeri_id_oku(deger):
+    """
+    Sorgu parametresindeki pazar yeri ID'sini tamsayıya çevirir; geçersizse None döndürür.
+    Önbellek anahtarına yalnızca geçerli ID'ler girsin diye kullanılır.
+    """
+    try:
+        return int(deger)
+    except (TypeError, ValueError):
+        return None
+
+class PazaryeriViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Pazar yerlerini listeler, oluşturur, günceller ve siler.
     """
@@ -57,7 +108,7 @@ class PazaryeriViewSet(viewsets.ModelViewSet):
     serializer_class = PazaryeriSerializer
     permission_classes = [IsAdminUser]
 
-class KargoFirmaViewSet(viewsets.ModelViewSet):
+class KargoFirmaViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Kargo firmalarını listeler, oluşturur, günceller ve siler.
     """
@@ -65,7 +116,7 @@ class KargoFirmaViewSet(viewsets.ModelViewSet):
     serializer_class = KargoFirmaSerializer
     permission_classes = [IsAdminUser]
 
-class DesiKgDegerViewSet(viewsets.ModelViewSet):
+class DesiKgDegerViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Desi-Kg değerlerini listeler, oluşturur, günceller ve siler.
     """
@@ -77,8 +128,10 @@ class DesiKgDegerViewSet(viewsets.ModelViewSet):
         """
         Opsiyonel filtreleme sağlar:
         - pazar_yeri parametresi ile pazar yeri ID'sine göre
+        - versiyon parametresi ile sürüm ID'sine göre (verilmezse aktif sürüm)
         """
-        queryset = DesiKgDeger.objects.all()
+        versiyon_id = self.request.query_params.get('versiyon')
+        queryset = DesiKgDeger.objects.filter(versiyon_id=versiyon_id) if versiyon_id else DesiKgDeger.objects.aktif()
         pazar_yeri_id = self.request.query_params.get('pazar_yeri')
         
         if pazar_yeri_id:
@@ -86,7 +139,7 @@ class DesiKgDegerViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class DesiKgKargoUcretViewSet(viewsets.ModelViewSet):
+class DesiKgKargoUcretViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Desi-Kg ve kargo ücretlerini listeler, oluşturur, günceller ve siler.
     """
@@ -100,8 +153,10 @@ class DesiKgKargoUcretViewSet(viewsets.ModelViewSet):
         - pazar_yeri parametresi ile pazar yeri ID'sine göre
         - kargo_firma parametresi ile kargo firma ID'sine göre
         - desi_kg_deger parametresi ile desi/kg değerine göre
+        - versiyon parametresi ile sürüm ID'sine göre (verilmezse aktif sürüm)
         """
-        queryset = DesiKgKargoUcret.objects.all()
+        versiyon_id = self.request.query_params.get('versiyon')
+        queryset = DesiKgKargoUcret.objects.filter(versiyon_id=versiyon_id) if versiyon_id else DesiKgKargoUcret.objects.aktif()
         
         pazar_yeri_id = self.request.query_params.get('pazar_yeri')
         kargo_firma_id = self.request.query_params.get('kargo_firma')
@@ -118,7 +173,7 @@ class DesiKgKargoUcretViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class PazaryeriKargofirmaViewSet(viewsets.ModelViewSet):
+class PazaryeriKargofirmaViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Pazar yeri ve kargo firma ilişkilerini listeler, oluşturur, günceller ve siler.
     """
@@ -131,8 +186,10 @@ class PazaryeriKargofirmaViewSet(viewsets.ModelViewSet):
         Opsiyonel filtreleme sağlar:
         - pazar_yeri parametresi ile pazar yeri ID'sine göre
         - kargo_firma parametresi ile kargo firma ID'sine göre
+        - versiyon parametresi ile sürüm ID'sine göre (verilmezse aktif sürüm)
         """
-        queryset = PazaryeriKargofirma.objects.all()
+        versiyon_id = self.request.query_params.get('versiyon')
+        queryset = PazaryeriKargofirma.objects.filter(versiyon_id=versiyon_id) if versiyon_id else PazaryeriKargofirma.objects.aktif()
         
         pazar_yeri_id = self.request.query_params.get('pazar_yeri')
         kargo_firma_id = self.request.query_params.get('kargo_firma')
@@ -145,7 +202,7 @@ class PazaryeriKargofirmaViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class KargoUcretHesaplamaView(UsernameMixin, APIView):
+class KargoUcretHesaplamaView(IstekOlcumuMixin, UsernameMixin, APIView):
     """
     Kargo ücreti hesaplama endpoint'i için view
     """
@@ -170,9 +227,11 @@ class KargoUcretHesaplamaView(UsernameMixin, APIView):
         error_response = self.validate_username(username)
         if error_response:
             return error_response
-            
-        serializer = self.serializer_class()
-        return Response(serializer.to_representation(None))
+
+        veri, etag = form_verisi_getir(
+            self.__class__.__name__, lambda: self.serializer_class().to_representation(None)
+        )
+        return etag_ile_yanitla(request, Response(veri), etag)
 
     def post(self, request, username=None, format=None):
         """
@@ -201,36 +260,21 @@ class KargoUcretHesaplamaView(UsernameMixin, APIView):
                 pazar_yeri = serializer.validated_data['pazar_yeri']
                 kargo_firma = serializer.validated_data['kargo_firma']
                 
-                # Desi/Kg değerini tam sayıya yuvarla
-                desi_kg_yuvarlama = math.ceil(desi_kg_degeri)
-                
-                # Pazar yeri ve kargo firma ilişkisini kontrol et
-                if not PazaryeriKargofirma.objects.filter(pazar_yeri=pazar_yeri, kargo_firma=kargo_firma).exists():
+                # Pazar yeri ve kargo firma ilişkisini derlenmiş tarifeden kontrol et
+                pazar_yeri_tarifesi = pazar_yeri_tarifesi_getir(pazar_yeri.id)
+                kargo_tarifesi = pazar_yeri_tarifesi.kargo_tarifeleri.get(kargo_firma.id)
+                if kargo_tarifesi is None:
                     return Response(
                         {'error': f'{kargo_firma.firma_ismi} {pazar_yeri.pazar_ismi} için hizmet vermemektedir.'},
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 
-                # Desi/Kg değerini bul
-                desi_kg_deger = DesiKgDeger.objects.filter(
-                    pazar_yeri=pazar_yeri,
-                    desi_degeri=desi_kg_yuvarlama
-                ).first()
+                # Desi/Kg değerini tarife basamağına yuvarla ve kargo ücretini bul
+                basamak = pazar_yeri_tarifesi.basamak_bul(desi_kg_degeri)
+                kargo_ucreti = kargo_tarifesi.basamak_ucreti(basamak)
+                desi_kg_yuvarlama = basamak.yuvarlanmis_desi_kg if basamak else desi_kg_degeri
                 
-                if not desi_kg_deger:
-                    return Response(
-                        {'error': f'{pazar_yeri.pazar_ismi} için {desi_kg_yuvarlama} desi/kg değerinde tarife bulunamadı.'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
-                # Kargo ücretini bul
-                kargo_ucret = DesiKgKargoUcret.objects.filter(
-                    pazar_yeri=pazar_yeri,
-                    kargo_firma=kargo_firma,
-                    desi_kg_deger=desi_kg_deger
-                ).first()
-                
-                if not kargo_ucret:
+                if kargo_ucreti is None:
                     return Response(
                         {'error': f'{pazar_yeri.pazar_ismi} - {kargo_firma.firma_ismi} için {desi_kg_yuvarlama} desi/kg değerinde tarife bulunamadı.'},
                         status=status.HTTP_404_NOT_FOUND
@@ -238,15 +282,15 @@ class KargoUcretHesaplamaView(UsernameMixin, APIView):
 
                 # Hesaplama geçmişini kaydet
                 from hesaplama.models import KargoUcretGecmis
-                KargoUcretGecmis.objects.create(
+                gecmis_kaydedici.kaydet(KargoUcretGecmis(
                     kullanici=request.user if request.user.is_authenticated else None,
                     email=email,
                     desi_kg_degeri=desi_kg_degeri,
                     yuvarlanmis_desi_kg=desi_kg_yuvarlama,
                     pazar_yeri=pazar_yeri,
                     kargo_firma=kargo_firma,
-                    kargo_ucreti=kargo_ucret.ucret
-                )
+                    kargo_ucreti=kargo_ucreti
+                ))
                 
                 # Sonuçları döndür
                 result = {
@@ -255,7 +299,7 @@ class KargoUcretHesaplamaView(UsernameMixin, APIView):
                     'yuvarlanmis_desi_kg': desi_kg_yuvarlama,
                     'pazar_yeri': pazar_yeri.pazar_ismi,
                     'kargo_firma': kargo_firma.firma_ismi,
-                    'kargo_ucreti': kargo_ucret.ucret
+                    'kargo_ucreti': kargo_ucreti
                 }
                 
                 return Response(result)
@@ -268,8 +312,87 @@ class KargoUcretHesaplamaView(UsernameMixin, APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class KargoKarsilastirmaView(IstekOlcumuMixin, UsernameMixin, APIView):
+    """
+    Bir pazar yerinde verilen desi/kg değeri için tüm aktif kargo firmalarının ücretlerini
+    ucuzdan pahalıya döndüren view. Ücretler derlenmiş tarifeden okunur; firma isimleri
+    için tek bir sorgu yapılır. Karşılaştırma geçmişe kaydedilmez.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = KargoKarsilastirmaSerializer
+    renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer]
+
+    def get(self, request, username=None, format=None):
+        """
+        GET isteği için form verilerini ve seçenekleri döndürür
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        veri, etag = form_verisi_getir(
+            self.__class__.__name__, lambda: self.serializer_class().to_representation(None)
+        )
+        return etag_ile_yanitla(request, Response(veri), etag)
+
+    def post(self, request, username=None, format=None):
+        """
+        POST isteği için tüm kargo firmalarının ücretlerini hesaplar
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        pazar_yeri = serializer.validated_data['pazar_yeri']
+        result = {'pazar_yeri': pazar_yeri.pazar_ismi}
+
+        # Ölçüler verildiyse desi/kg değeri DesiKgHesaplamaView ile aynı formülle hesaplanır
+        desi_kg_degeri = serializer.validated_data.get('desi_kg_degeri')
+        if desi_kg_degeri is None:
+            desi, desi_kg_degeri = desi_kg_hesapla(
+                serializer.validated_data['en'],
+                serializer.validated_data['boy'],
+                serializer.validated_data['yukseklik'],
+                serializer.validated_data['net_agirlik']
+            )
+            result['desi'] = desi
+
+        pazar_yeri_tarifesi = pazar_yeri_tarifesi_getir(pazar_yeri.id)
+        basamak = pazar_yeri_tarifesi.basamak_bul(desi_kg_degeri)
+        desi_kg_yuvarlama = basamak.yuvarlanmis_desi_kg if basamak else desi_kg_degeri
+        ucretler = pazar_yeri_tarifesi.kargo_ucretleri(basamak) if basamak else []
+        kargo_firmalari = KargoFirma.objects.filter(aktif=True).in_bulk(
+            [kargo_firma_id for kargo_firma_id, _ in ucretler]
+        )
+        firmalar = [
+            {
+                'id': kargo_firma_id,
+                'firma_ismi': kargo_firmalari[kargo_firma_id].firma_ismi,
+                'kargo_ucreti': kargo_ucreti
+            }
+            for kargo_firma_id, kargo_ucreti in ucretler
+            if kargo_firma_id in kargo_firmalari
+        ]
+        if not firmalar:
+            return Response(
+                {'error': f'{pazar_yeri.pazar_ismi} için {desi_kg_yuvarlama} desi/kg değerinde tarife bulunamadı.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        result.update({
+            'desi_kg_degeri': float(desi_kg_degeri),
+            'yuvarlanmis_desi_kg': desi_kg_yuvarlama,
+            'en_ucuz': firmalar[0],
+            'kargo_firmalari': firmalar
+        })
+        return Response(result)
+
 # Trendyol Kategori Komisyon Oranları için ViewSet'ler
-class KategoriViewSet(viewsets.ModelViewSet):
+class KategoriViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Trendyol kategorilerini listeler, oluşturur, günceller ve siler.
     """
@@ -287,7 +410,7 @@ class KategoriViewSet(viewsets.ModelViewSet):
         serializer = AltKategoriSerializer(alt_kategoriler, many=True)
         return Response(serializer.data)
 
-class AltKategoriViewSet(viewsets.ModelViewSet):
+class AltKategoriViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Alt kategorileri listeler, oluşturur, günceller ve siler.
     """
@@ -321,7 +444,7 @@ class AltKategoriViewSet(viewsets.ModelViewSet):
         serializer = UrunGrubuSerializer(urun_gruplari, many=True)
         return Response(serializer.data)
 
-class UrunGrubuViewSet(viewsets.ModelViewSet):
+class UrunGrubuViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Ürün gruplarını listeler, oluşturur, günceller ve siler.
     """
@@ -355,7 +478,7 @@ class UrunGrubuViewSet(viewsets.ModelViewSet):
         serializer = KomisyonOraniSerializer(komisyon_oranlari, many=True)
         return Response(serializer.data)
 
-class KomisyonOraniViewSet(viewsets.ModelViewSet):
+class KomisyonOraniViewSet(IstekOlcumuMixin, viewsets.ModelViewSet):
     """
     Komisyon oranlarını listeler, oluşturur, günceller ve siler.
     """
@@ -379,129 +502,142 @@ class KomisyonOraniViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class KullaniciHesaplamalariViewSet(viewsets.GenericViewSet):
+class VeriVersiyonuViewSet(IstekOlcumuMixin, mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Kargo tarifesi ve komisyon tablosu sürümlerini listeler.
+    Bir sürüm etkinleştirilerek yeni veriye geçilebilir veya önceki sürüme geri dönülebilir.
+    Aktif olmayan sürümler silinebilir.
+    """
+    queryset = VeriVersiyonu.objects.select_related('pazar_yeri')
+    serializer_class = VeriVersiyonuSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        """
+        Opsiyonel filtreleme sağlar:
+        - pazar_yeri parametresi ile pazar yeri ID'sine göre
+        - tur parametresi ile sürüm türüne göre (kargo / komisyon)
+        """
+        queryset = VeriVersiyonu.objects.select_related('pazar_yeri')
+
+        pazar_yeri_id = self.request.query_params.get('pazar_yeri')
+        tur = self.request.query_params.get('tur')
+
+        if pazar_yeri_id:
+            queryset = queryset.filter(pazar_yeri_id=pazar_yeri_id)
+
+        if tur:
+            queryset = queryset.filter(tur=tur)
+
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def etkinlestir(self, request, pk=None):
+        """
+        Sürümü pazar yerinin aktif sürümü yapar.
+        """
+        versiyon = self.get_object()
+        onceki_versiyon_id = versiyonu_etkinlestir(versiyon)
+        versiyon.refresh_from_db()
+        versiyon.pazar_yeri.refresh_from_db()
+        return Response({
+            'message': f'{versiyon} etkinleştirildi.',
+            'onceki_versiyon': onceki_versiyon_id,
+            'versiyon': self.get_serializer(versiyon).data
+        })
+
+    def destroy(self, request, *args, **kwargs):
+        versiyon = self.get_object()
+        if getattr(versiyon.pazar_yeri, f'aktif_{versiyon.tur}_versiyonu_id') == versiyon.id:
+            return Response(
+                {'error': 'Aktif sürüm silinemez. Önce başka bir sürümü etkinleştiriniz.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().destroy(request, *args, **kwargs)
+
+class KullaniciRaporuSayfalama(CursorPagination):
+    """
+    Kullanıcı hesaplama raporu için kullanıcı ID'sine göre cursor sayfalama
+    """
+    page_size = 100
+    page_size_query_param = 'sayfa_boyutu'
+    max_page_size = 1000
+    ordering = 'id'
+
+class KullaniciHesaplamalariViewSet(IstekOlcumuMixin, viewsets.GenericViewSet):
     """
     Kullanıcıların hesaplamalarını listeleyen ve filtreleme yapan ViewSet.
     Kullanıcı seçerek belirli bir kullanıcının hesaplamalarını görebilirsiniz.
     Misafir kullanıcıların hesaplamalarını da görüntüleyebilirsiniz.
+    Sonuçlar kullanıcılara göre sayfalanır ve JSON olarak akıtılır; misafir
+    hesaplamaları son sayfada yer alır.
     """
     queryset = get_user_model().objects.all()
     serializer_class = UserHesaplamalarSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KullaniciRaporuSayfalama
     template_name = 'rest_framework/api.html'
 
     def list(self, request):
-        # Serializer'ı oluştur
-        serializer = self.get_serializer()
-        
         # Seçilen kullanıcı adını ve misafir seçeneğini al
         username = request.query_params.get('username', None)
         show_guest = request.query_params.get('show_guest', 'false').lower() == 'true'
-        
-        # Tüm hesaplamaları al
-        hesaplamalar = Hesaplamalar.objects.prefetch_related('fiyat_belirlemeler')
-        
-        # Filtreleme yap
-        if username:
-            hesaplamalar = hesaplamalar.filter(kullanici__username=username)
-        elif not show_guest:
-            # Eğer username seçilmemişse ve misafir hesaplamalar istenmemişse, sadece kayıtlı kullanıcıların hesaplamalarını göster
-            hesaplamalar = hesaplamalar.filter(kullanici__isnull=False)
-        
-        # Hesaplamaları formatla
-        results = []
-        
-        # Kayıtlı kullanıcıların hesaplamaları
-        users = self.get_queryset()
-        if username:
-            users = users.filter(username=username)
-            
-        for user in users:
-            user_calculations = []
-            for hesaplama in hesaplamalar.filter(kullanici=user):
-                fiyat_belirlemeler_data = []
-                for fiyat_belirleme in hesaplama.fiyat_belirlemeler.all():
-                    fiyat_belirlemeler_data.append({
-                        "urun_id": fiyat_belirleme.urun_id,
-                        "urun_ismi": fiyat_belirleme.urun_ismi,
-                        "urun_maliyeti": float(fiyat_belirleme.urun_maliyeti),
-                        "paketleme_maliyeti": float(fiyat_belirleme.paketleme_maliyeti),
-                        "trendyol_hizmet_bedeli": float(fiyat_belirleme.trendyol_hizmet_bedeli),
-                        "kargo_firmasi": fiyat_belirleme.kargo_firmasi,
-                        "kargo_ucreti": float(fiyat_belirleme.kargo_ucreti),
-                        "stopaj_degeri": float(fiyat_belirleme.stopaj_degeri),
-                        "desi_kg_degeri": float(fiyat_belirleme.desi_kg_degeri),
-                        "urun_kategorisi": fiyat_belirleme.urun_kategorisi,
-                        "komisyon_orani": float(fiyat_belirleme.komisyon_orani),
-                        "komisyon_tutari": float(fiyat_belirleme.komisyon_tutari),
-                        "kdv_orani": float(fiyat_belirleme.kdv_orani),
-                        "kar_orani": float(fiyat_belirleme.kar_orani),
-                        "kar_tutari": float(fiyat_belirleme.kar_tutari),
-                        "satis_fiyati_kdv_haric": float(fiyat_belirleme.satis_fiyati_kdv_haric),
-                        "satis_fiyati_kdv_dahil": float(fiyat_belirleme.satis_fiyati_kdv_dahil)
-                    })
-                
-                user_calculations.append({
-                    "hesaplama_id": hesaplama.hesaplama_id,
-                    "olusturulma_tarihi": hesaplama.olusturulma_tarihi.strftime("%Y-%m-%d %H:%M:%S.%f"),
-                    "toplam_fiyat": float(hesaplama.toplam_fiyat),
-                    "fiyat_belirlemeler": fiyat_belirlemeler_data
-                })
-            
-            if user_calculations:
-                results.append({
-                    "kullanici_id": user.id,
-                    "kullanici_name": user.username,
-                    "hesaplamalar": user_calculations
-                })
-        
-        # Misafir kullanıcıların hesaplamaları
-        if show_guest and not username:
-            guest_calculations = []
-            for hesaplama in hesaplamalar.filter(kullanici__isnull=True):
-                fiyat_belirlemeler_data = []
-                for fiyat_belirleme in hesaplama.fiyat_belirlemeler.all():
-                    fiyat_belirlemeler_data.append({
-                        "urun_id": fiyat_belirleme.urun_id,
-                        "urun_ismi": fiyat_belirleme.urun_ismi,
-                        "urun_maliyeti": float(fiyat_belirleme.urun_maliyeti),
-                        "paketleme_maliyeti": float(fiyat_belirleme.paketleme_maliyeti),
-                        "trendyol_hizmet_bedeli": float(fiyat_belirleme.trendyol_hizmet_bedeli),
-                        "kargo_firmasi": fiyat_belirleme.kargo_firmasi,
-                        "kargo_ucreti": float(fiyat_belirleme.kargo_ucreti),
-                        "stopaj_degeri": float(fiyat_belirleme.stopaj_degeri),
-                        "desi_kg_degeri": float(fiyat_belirleme.desi_kg_degeri),
-                        "urun_kategorisi": fiyat_belirleme.urun_kategorisi,
-                        "komisyon_orani": float(fiyat_belirleme.komisyon_orani),
-                        "komisyon_tutari": float(fiyat_belirleme.komisyon_tutari),
-                        "kdv_orani": float(fiyat_belirleme.kdv_orani),
-                        "kar_orani": float(fiyat_belirleme.kar_orani),
-                        "kar_tutari": float(fiyat_belirleme.kar_tutari),
-                        "satis_fiyati_kdv_haric": float(fiyat_belirleme.satis_fiyati_kdv_haric),
-                        "satis_fiyati_kdv_dahil": float(fiyat_belirleme.satis_fiyati_kdv_dahil)
-                    })
-                
-                guest_calculations.append({
-                    "hesaplama_id": hesaplama.hesaplama_id,
-                    "email": hesaplama.email,
-                    "olusturulma_tarihi": hesaplama.olusturulma_tarihi.strftime("%Y-%m-%d %H:%M:%S.%f"),
-                    "toplam_fiyat": float(hesaplama.toplam_fiyat),
-                    "fiyat_belirlemeler": fiyat_belirlemeler_data
-                })
-            
-            if guest_calculations:
-                results.append({
-                    "kullanici_name": "Misafir Kullanıcılar",
-                    "hesaplamalar": guest_calculations
-                })
 
-        # Form ve sonuçları birlikte döndür
-        return Response({
-            'form': serializer.data,
-            'results': results
-        })
+        # Sayfadaki kullanıcılar tek sorguda alınır; hesaplamalar akış sırasında okunur
+        kullanicilar = self.paginate_queryset(hesaplamasi_olan_kullanicilar(username))
+        sonraki = self.paginator.get_next_link()
+
+        icerik = kullanici_raporu_akisi(
+            form={'username': username, 'show_guest': show_guest},
+            kullanicilar=kullanicilar,
+            sonraki=sonraki,
+            onceki=self.paginator.get_previous_link(),
+            misafirler_dahil=show_guest and not username and sonraki is None
+        )
+        return StreamingHttpResponse(icerik, content_type='application/json')
+
+class GecmisDisaAktarimView(IstekOlcumuMixin, APIView):
+    """
+    Hesaplama geçmişi tablolarını CSV veya XLSX (?bicim=xlsx) olarak dışa aktaran admin endpoint'i.
+    Tarih aralığı, pazar yeri ve kullanıcı adına göre filtrelenebilir; satırlar
+    parça parça okunup akıtıldığı için tablo boyutundan bağımsız olarak bellek sabit kalır.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, tablo, format=None):
+        if tablo not in GECMIS_TABLOLARI:
+            return Response(
+                {'error': f'Geçerli tablolar: {", ".join(GECMIS_TABLOLARI)}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = GecmisDisaAktarimSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filtreler = dict(serializer.validated_data)
+        bicim = filtreler.pop('bicim')
+        dosya_adi = f'{tablo}-gecmisi-{timezone.now():%Y%m%d-%H%M%S}.{bicim}'
+
+        if bicim == 'xlsx':
+            # FileResponse dosyayı parça parça gönderir ve sonunda kapatır; geçici dosya kapanınca silinir
+            dosya = tempfile.TemporaryFile()
+            try:
+                xlsx_yaz(tablo, dosya, **filtreler)
+            except ValueError as e:
+                dosya.close()
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            dosya.seek(0)
+            return FileResponse(dosya, as_attachment=True, filename=dosya_adi)
+
+        try:
+            satirlar = csv_satirlari(tablo, **filtreler)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class AltKategoriListView(APIView):
+        response = StreamingHttpResponse(satirlar, content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{dosya_adi}"'
+        return response
+
+class AltKategoriListView(IstekOlcumuMixin, APIView):
     """
     Belirli bir kategoriye ait alt kategorileri listeleyen API view.
     """
@@ -510,7 +646,7 @@ class AltKategoriListView(APIView):
         serializer = AltKategoriSerializer(alt_kategoriler, many=True)
         return Response(serializer.data)
 
-class UrunGrubuListView(APIView):
+class UrunGrubuListView(IstekOlcumuMixin, APIView):
     """
     Belirli bir alt kategoriye ait ürün gruplarını listeleyen API view.
     """
@@ -519,7 +655,7 @@ class UrunGrubuListView(APIView):
         serializer = UrunGrubuSerializer(urun_gruplari, many=True)
         return Response(serializer.data)
 
-class EksikHesaplamaView(APIView):
+class EksikHesaplamaView(IstekOlcumuMixin, APIView):
     """
     Eksik hesaplama endpoint'i için view
     """
@@ -552,9 +688,9 @@ class EksikHesaplamaView(APIView):
                 istenilen_kar_orani = Decimal(str(serializer.validated_data['istenilen_kar_orani']))
 
                 # Kargo ücretini hesapla
-                desi_kg_deger = DesiKgDeger.objects.get(desi_degeri=float(desi_kg))
+                desi_kg_deger = DesiKgDeger.objects.aktif().get(desi_degeri=float(desi_kg))
                 kargo_firma = KargoFirma.objects.get(firma_ismi=kargo_firma_ismi)
-                kargo_ucreti = DesiKgKargoUcret.objects.get(
+                kargo_ucreti = DesiKgKargoUcret.objects.aktif().get(
                     desi_kg_deger=desi_kg_deger,
                     kargo_firma=kargo_firma
                 ).fiyat
@@ -593,7 +729,7 @@ class EksikHesaplamaView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class KargoUcretEklemeView(APIView):
+class KargoUcretEklemeView(IstekOlcumuMixin, APIView):
     """
     Kargo ücreti ekleme endpoint'i için view
     """
@@ -625,40 +761,6 @@ class KargoUcretEklemeView(APIView):
         )
         return Response(response_data)
 
-    def find_matching_kargo_firma(self, kargo_firma_adi):
-        """
-        Verilen kargo firma adına en uygun eşleşmeyi bulur.
-        """
-        # Kargo firma adını normalize et (küçük harfe çevir)
-        normalized_input = kargo_firma_adi.lower().strip()
-        
-        # Veritabanındaki tüm kargo firmalarını al
-        all_kargo_firmalari = KargoFirma.objects.all()
-        
-        # HepsiJET ve HepsiJET XL için özel kontrol
-        if 'hepsijet' in normalized_input:
-            if 'xl' in normalized_input:
-                return KargoFirma.objects.filter(firma_ismi='HepsiJET XL').first()
-            else:
-                return KargoFirma.objects.filter(firma_ismi='HepsiJET').first()
-        
-        # Diğer firmalar için içinde geçme kontrolü
-        for firma in all_kargo_firmalari:
-            # Mevcut firma adını normalize et
-            normalized_firma = firma.firma_ismi.lower().strip()
-            
-            # Tam eşleşme kontrolü
-            if normalized_input == normalized_firma:
-                return firma
-            
-            # İçinde geçme kontrolü (HepsiJET ve HepsiJET XL hariç)
-            if firma.firma_ismi not in ['HepsiJET', 'HepsiJET XL']:
-                if normalized_firma in normalized_input or normalized_input in normalized_firma:
-                    return firma
-        
-        # Eşleşme bulunamadıysa None döndür
-        return None
-
     def post(self, request):
         """
         POST isteği için Excel dosyasını işler ve kargo ücretlerini ekler
@@ -671,84 +773,19 @@ class KargoUcretEklemeView(APIView):
                 pazar_yeri = serializer.validated_data.get('pazar_yeri')
                 excel_dosya = serializer.validated_data.get('excel_dosya')
                 
-                # Excel dosyasını oku
+                # Excel dosyasını oku ve tek transaction içinde toplu olarak aktar
                 df = pd.read_excel(excel_dosya)
-                
-                # Desi sütununu al ve nan değerlerini temizle
-                desi_values = df.iloc[:, 0].dropna().tolist()  # İlk sütun desi değerleri
-                
-                # Kargo firmalarını al (2. sütundan sonraki tüm sütunlar)
-                kargo_firmalari = df.columns[1:].tolist()
-                
-                # Kargo firma adlarını temizle ve birleştir
-                temiz_kargo_firmalari = {}
-                for firma in kargo_firmalari:
-                    # Satır sonlarını temizle ve boşlukları normalize et
-                    temiz_firma = ' '.join(firma.replace('\n', ' ').split())
-                    temiz_kargo_firmalari[temiz_firma] = firma
-                
-                # Önce seçilen pazar yerine ait tüm kargo ücretlerini sil
-                DesiKgKargoUcret.objects.filter(pazar_yeri=pazar_yeri).delete()
-                
-                # Her bir desi değeri için
-                for desi_value in desi_values:
-                    # Desi değerini oluştur veya güncelle
-                    desi_kg_deger, created = DesiKgDeger.objects.get_or_create(
-                        pazar_yeri=pazar_yeri,
-                        desi_degeri=desi_value
-                    )
-                    
-                    # Her bir kargo firması için
-                    for temiz_firma, orijinal_firma in temiz_kargo_firmalari.items():
-                        # Kargo firmasını bul
-                        kargo_firma = self.find_matching_kargo_firma(temiz_firma)
-                        
-                        # Eşleşme bulunamadıysa yeni firma oluştur
-                        if not kargo_firma:
-                            # Baş harfleri büyük yap
-                            formatted_firma = ' '.join(word.capitalize() for word in temiz_firma.split())
-                            kargo_firma = KargoFirma.objects.create(
-                                firma_ismi=formatted_firma,
-                                aktif=True
-                            )
-                        
-                        # Pazar yeri - kargo firma ilişkisini oluştur
-                        PazaryeriKargofirma.objects.get_or_create(
-                            pazar_yeri=pazar_yeri,
-                            kargo_firma=kargo_firma
-                        )
-                        
-                        # Kargo ücretini al
-                        ucret_value = df[df.iloc[:, 0] == desi_value][orijinal_firma].iloc[0]
-                        
-                        # Eğer değer nan ise bu kargo firması için ücret oluşturma
-                        if pd.isna(ucret_value):
-                            continue
-                            
-                        # ₺ işaretini kaldır ve virgülü noktaya çevir
-                        ucret_str = str(ucret_value)
-                        ucret_str = ucret_str.replace('₺', '').replace(',', '.').strip()
-                        
-                        try:
-                            ucret = float(ucret_str)
-                            
-                            # Kargo ücretini oluştur
-                            DesiKgKargoUcret.objects.create(
-                                pazar_yeri=pazar_yeri,
-                                kargo_firma=kargo_firma,
-                                desi_kg_deger=desi_kg_deger,
-                                ucret=ucret
-                            )
-                        except (ValueError, TypeError):
-                            # Eğer değer sayıya çevrilemezse bu kargo firması için ücret oluşturma
-                            continue
+                sonuc = kargo_tarifesi_aktar(
+                    pazar_yeri, df,
+                    aciklama=excel_dosya.name,
+                    etkinlestir=serializer.validated_data['etkinlestir']
+                )
                 
                 return Response({
                     'message': f'{pazar_yeri.pazar_ismi} için kargo ücretleri başarıyla eklendi.',
                     'pazar_yeri': pazar_yeri.pazar_ismi,
                     'dosya_adi': excel_dosya.name,
-                    'islenen_desi_sayisi': len(desi_values),
-                    'islenen_kargo_firma_sayisi': len(kargo_firmalari)
+                    **sonuc
                 })
                 
             except Exception as e:
@@ -759,7 +796,7 @@ class KargoUcretEklemeView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class KomisyonEklemeView(APIView):
+class KomisyonEklemeView(IstekOlcumuMixin, APIView):
     """
     Komisyon oranı ekleme endpoint'i için view
     """
@@ -815,55 +852,19 @@ class KomisyonEklemeView(APIView):
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 
-                # Önce seçilen pazar yerine ait tüm komisyon oranlarını ve kategorileri sil
-                HesaplamaKomisyonOranlari.objects.filter(pazar_yeri=pazar_yeri).delete()
-                HesaplamaKategoriler.objects.filter(pazar_yeri=pazar_yeri).delete()
-                
-                # Yeni komisyon oranlarını ekle
-                for _, row in df.iterrows():
-                    # Kategori isimlerini al
-                    kategori_isimleri = [row[f'Kategori Ağacı {i}'] for i in range(1, kategori_seviyesi + 1)]
-                    
-                    # Her seviye için kategoriyi bul veya oluştur
-                    ust_kategori = None
-                    kategoriler = []
-                    
-                    for i, kategori_ismi in enumerate(kategori_isimleri, 1):
-                        # Kategoriyi bul veya oluştur
-                        kategori, created = HesaplamaKategoriler.objects.get_or_create(
-                            adi=kategori_ismi,
-                            ust_kategori=ust_kategori,
-                            seviye=i,
-                            pazar_yeri=pazar_yeri
-                        )
-                        kategoriler.append(kategori)
-                        ust_kategori = kategori
-                    
-                    # Komisyon oranını işle
-                    komisyon_orani_str = str(row['Komisyon Oranı'])
-                    # Yüzde işaretini kaldır
-                    komisyon_orani_str = komisyon_orani_str.replace('%', '').strip()
-                    # Virgülü noktaya çevir
-                    komisyon_orani_str = komisyon_orani_str.replace(',', '.')
-                    # String'i float'a çevir
-                    komisyon_orani = float(komisyon_orani_str)
-                    
-                    # Komisyon oranını kaydet
-                    komisyon_orani = HesaplamaKomisyonOranlari.objects.create(
-                        pazar_yeri=pazar_yeri,
-                        kategori_1=kategoriler[0],
-                        kategori_2=kategoriler[1] if len(kategoriler) > 1 else None,
-                        kategori_3=kategoriler[2] if len(kategoriler) > 2 else None,
-                        kategori_4=kategoriler[3] if len(kategoriler) > 3 else None,
-                        komisyon_orani=komisyon_orani,
-                        gecerlilik_tarihi=timezone.now().date()
-                    )
+                # Kategorileri ve komisyon oranlarını tek transaction içinde toplu olarak aktar
+                sonuc = komisyon_tablosu_aktar(
+                    pazar_yeri, kategori_seviyesi, df,
+                    aciklama=excel_dosya.name,
+                    etkinlestir=serializer.validated_data['etkinlestir']
+                )
                 
                 return Response({
                     'message': f'{pazar_yeri.pazar_ismi} için komisyon oranları başarıyla eklendi.',
                     'pazar_yeri': pazar_yeri.pazar_ismi,
                     'kategori_seviyesi': kategori_seviyesi,
-                    'dosya_adi': excel_dosya.name
+                    'dosya_adi': excel_dosya.name,
+                    **sonuc
                 })
                 
             except Exception as e:
@@ -874,7 +875,7 @@ class KomisyonEklemeView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class KomisyonOraniBulmaView(UsernameMixin, APIView):
+class KomisyonOraniBulmaView(IstekOlcumuMixin, UsernameMixin, APIView):
     """
     Komisyon oranı bulma endpoint'i için view
     """
@@ -887,23 +888,17 @@ class KomisyonOraniBulmaView(UsernameMixin, APIView):
         Belirli bir pazar yeri için kategori yolu seçeneklerini getirir
         """
         try:
-            # Pazar yeri için komisyon oranlarını al
-            komisyon_oranlari = HesaplamaKomisyonOranlari.objects.filter(
+            # Kategori yolları içe aktarma sırasında hesaplandığı için tek sorgu yeterli
+            kategori_yollari = HesaplamaKomisyonOranlari.objects.aktif().filter(
                 pazar_yeri_id=pazar_yeri_id
-            ).select_related('kategori')
+            ).order_by('kategori_yolu_metni').values_list('id', 'kategori_yolu_metni')
 
             # Seçenekleri oluştur
             choices = [{'value': '', 'label': 'Kategori Seçiniz'}]
-            
-            # Her komisyon oranı için kategori yolunu ekle
-            for komisyon_orani in komisyon_oranlari:
-                if komisyon_orani.kategori:
-                    kategori_yolu = self._get_kategori_yolu_string(komisyon_orani)
-                    if kategori_yolu:
-                        choices.append({
-                            'value': str(komisyon_orani.kategori.id),
-                            'label': kategori_yolu
-                        })
+            choices.extend(
+                {'value': str(id), 'label': kategori_yolu}
+                for id, kategori_yolu in kategori_yollari
+            )
 
             return choices
 
@@ -921,13 +916,17 @@ class KomisyonOraniBulmaView(UsernameMixin, APIView):
             return error_response
 
         # Pazar yeri ID'si varsa kategori yolu seçeneklerini getir
-        pazar_yeri_id = request.query_params.get('pazar_yeri')
+        pazar_yeri_id = pazar_yeri_id_oku(request.query_params.get('pazar_yeri'))
         if pazar_yeri_id:
-            kategori_yolu_choices = self.get_kategori_yolu_choices(pazar_yeri_id)
-            return Response({'kategori_yolu_choices': kategori_yolu_choices})
-
-        serializer = self.serializer_class()
-        return Response(serializer.to_representation(None))
+            veri, etag = form_verisi_getir(
+                'KomisyonOraniBulmaView', lambda: {'kategori_yolu_choices': self.get_kategori_yolu_choices(pazar_yeri_id)},
+                pazar_yeri_id
+            )
+        else:
+            veri, etag = form_verisi_getir(
+                'KomisyonOraniBulmaView', lambda: self.serializer_class().to_representation(None)
+            )
+        return etag_ile_yanitla(request, Response(veri), etag)
 
     def post(self, request, username=None, format=None):
         """
@@ -937,7 +936,10 @@ class KomisyonOraniBulmaView(UsernameMixin, APIView):
         if error_response:
             return error_response
 
-        serializer = self.serializer_class(data=request.data)
+        serializer = self.serializer_class(
+            data=request.data,
+            context={'pazar_yeri_id': request.data.get('pazar_yeri')}
+        )
 
         if serializer.is_valid():
             try:
@@ -960,15 +962,10 @@ class KomisyonOraniBulmaView(UsernameMixin, APIView):
 
                 # Form verilerini al
                 pazar_yeri = serializer.validated_data['pazar_yeri']
-                kategori = serializer.validated_data['kategori_yolu']
+                # kategori_yolu seçeneği, pazar yerine ait komisyon oranı kaydıdır
+                komisyon_orani = serializer.validated_data['kategori_yolu']
 
-                # Komisyon oranını bul
-                komisyon_orani = HesaplamaKomisyonOranlari.objects.filter(
-                    pazar_yeri=pazar_yeri,
-                    kategori=kategori
-                ).first()
-
-                if not komisyon_orani:
+                if komisyon_orani.pazar_yeri_id != pazar_yeri.id:
                     return Response(
                         {'error': f'{pazar_yeri.pazar_ismi} için seçilen kategoride komisyon oranı bulunamadı.'},
                         status=status.HTTP_404_NOT_FOUND
@@ -976,13 +973,13 @@ class KomisyonOraniBulmaView(UsernameMixin, APIView):
 
                 # Hesaplama geçmişini kaydet
                 from hesaplama.models import KomisyonOraniGecmisi
-                KomisyonOraniGecmisi.objects.create(
+                gecmis_kaydedici.kaydet(KomisyonOraniGecmisi(
                     kullanici=request.user if request.user.is_authenticated else None,
                     email=email,
                     pazar_yeri=pazar_yeri,
-                    kategori=kategori,
+                    kategori_yolu=komisyon_orani.yaprak_kategori,
                     komisyon_orani=komisyon_orani.komisyon_orani
-                )
+                ))
 
                 # Sonuçları döndür
                 return Response({
@@ -1005,15 +1002,131 @@ class KomisyonOraniBulmaView(UsernameMixin, APIView):
         """
         Komisyon oranı için kategori yolunu string olarak döndürür
         """
+        return komisyon_orani.kategori_yolu_metni or None
+
+class KategoriAramaView(IstekOlcumuMixin, UsernameMixin, APIView):
+    """
+    Komisyon kategori yollarında arama (autocomplete) endpoint'i.
+    Tüm kategori yollarını göndermek yerine sorguya uyan ilk sonuçları döndürür.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer]
+
+    def get(self, request, username=None, format=None):
+        """
+        pazar_yeri, q ve isteğe bağlı limit parametreleri ile kategori yollarında arama yapar
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        sorgu = request.query_params.get('q', '').strip()
+        if not sorgu:
+            return Response(
+                {'error': 'Arama metni (q) zorunludur.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
-            if komisyon_orani.kategori:
-                return f"{komisyon_orani.kategori.kategori_adi}"
-            return None
-        except Exception as e:
-            logging.error(f"Kategori yolu string'i oluşturulurken hata oluştu: {str(e)}")
-            return None
+            pazar_yeri_id = int(request.query_params.get('pazar_yeri', ''))
+            limit = int(request.query_params.get('limit', VARSAYILAN_SONUC_SAYISI))
+        except ValueError:
+            return Response(
+                {'error': 'pazar_yeri ve limit parametreleri sayı olmalıdır.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAKSIMUM_SONUC_SAYISI))
+
+        if not Pazaryeri.objects.filter(id=pazar_yeri_id, aktif=True).exists():
+            return Response(
+                {'error': 'Pazar yeri bulunamadı.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        sonuclar = kategori_ara(pazar_yeri_id, sorgu, limit)
+        return Response({
+            'pazar_yeri': pazar_yeri_id,
+            'q': sorgu,
+            'sonuclar': [
+                {
+                    'id': sonuc['id'],
+                    'kategori_yolu': sonuc['kategori_yolu'],
+                    'komisyon_orani': sonuc['komisyon_orani']
+                }
+                for sonuc in sonuclar
+            ]
+        })
+
+class KategoriAgaciSayfalama(CursorPagination):
+    """
+    Kategori ağacı düğümleri için isme göre cursor sayfalama
+    """
+    page_size = 50
+    page_size_query_param = 'sayfa_boyutu'
+    max_page_size = 200
+    ordering = ('adi', 'id')
+
+class KategoriAgaciView(IstekOlcumuMixin, UsernameMixin, APIView):
+    """
+    Kategori ağacında seviye seviye gezinme endpoint'i.
+    ust_kategori verilmezse pazar yerinin kök kategorilerini, verilirse o kategorinin
+    doğrudan alt kategorilerini sayfalı olarak döndürür. Yanıtlar ETag ile önbelleklenebilir.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = KategoriAgaciDugumSerializer
+    pagination_class = KategoriAgaciSayfalama
+    renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer]
+
+    def get(self, request, username=None, format=None):
+        """
+        pazar_yeri ve isteğe bağlı ust_kategori parametreleri ile alt kategorileri listeler
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        try:
+            pazar_yeri_id = int(request.query_params.get('pazar_yeri', ''))
+            ust_kategori_id = request.query_params.get('ust_kategori')
+            ust_kategori_id = int(ust_kategori_id) if ust_kategori_id else None
+        except ValueError:
+            return Response(
+                {'error': 'pazar_yeri ve ust_kategori parametreleri sayı olmalıdır.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-class FiyatHesaplamaView(UsernameMixin, APIView):
+        # Üst kategorinin kökten itibaren yolu iç içe küme aralığı ile tek sorguda bulunur
+        kategori_yolu = []
+        if ust_kategori_id is not None:
+            ust_kategori = HesaplamaKategoriler.objects.aktif().filter(
+                id=ust_kategori_id, pazar_yeri_id=pazar_yeri_id
+            ).only('sol', 'sag', 'versiyon').first()
+            if ust_kategori is None:
+                return Response(
+                    {'error': 'Kategori bulunamadı.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            kategori_yolu = list(HesaplamaKategoriler.objects.filter(
+                versiyon_id=ust_kategori.versiyon_id,
+                sol__lte=ust_kategori.sol,
+                sag__gte=ust_kategori.sag
+            ).order_by('sol').values('id', 'adi', 'seviye'))
+
+        komisyon_orani = HesaplamaKomisyonOranlari.objects.filter(
+            yaprak_kategori=OuterRef('pk')
+        ).order_by('id').values('komisyon_orani')[:1]
+        queryset = HesaplamaKategoriler.objects.aktif().filter(
+            pazar_yeri_id=pazar_yeri_id,
+            ust_kategori_id=ust_kategori_id
+        ).annotate(komisyon_orani=Subquery(komisyon_orani))
+
+        paginator = self.pagination_class()
+        sayfa = paginator.paginate_queryset(queryset, request, view=self)
+        response = paginator.get_paginated_response(self.serializer_class(sayfa, many=True).data)
+        response.data['kategori_yolu'] = kategori_yolu
+        return etag_ile_yanitla(request, response)
+
+class FiyatHesaplamaView(IstekOlcumuMixin, UsernameMixin, APIView):
     """
     Fiyat hesaplama endpoint'i
     """
@@ -1036,21 +1149,20 @@ class FiyatHesaplamaView(UsernameMixin, APIView):
 
         # Get query parameters
         email = request.query_params.get('email')
-        pazar_yeri = request.query_params.get('pazar_yeri')
+        pazar_yeri_id = pazar_yeri_id_oku(request.query_params.get('pazar_yeri'))
         
         if email and not self.validate_email(email):
             return Response(
                 {'error': 'Bu email adresi sistemde kayıtlı değil.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Create context with pazar_yeri if provided
-        context = {'request': request}
-        if pazar_yeri:
-            context['pazar_yeri_id'] = pazar_yeri
-            
-        serializer = self.serializer_class(context=context)
-        return Response(serializer.to_representation({}))
+
+        veri, etag = form_verisi_getir(
+            'FiyatHesaplamaView',
+            lambda: self.serializer_class(context={'pazar_yeri_id': pazar_yeri_id}).to_representation({}),
+            pazar_yeri_id or ''
+        )
+        return etag_ile_yanitla(request, Response(veri), etag)
 
     def post(self, request, username=None, format=None):
         # Validate username from URL
@@ -1079,18 +1191,12 @@ class FiyatHesaplamaView(UsernameMixin, APIView):
         kar_orani = data['kar_orani']
         kdv_orani = data['kdv_orani']
 
-        # Get shipping cost
-        try:
-            desi_kg_deger = DesiKgDeger.objects.get(
-                pazar_yeri=pazar_yeri,
-                desi_degeri__gte=urun_desi_kg
-            )
-            kargo_ucret = DesiKgKargoUcret.objects.get(
-                desi_kg_deger=desi_kg_deger,
-                kargo_firma=kargo_firma
-            )
-            kargo_bedeli = kargo_ucret.ucret
-        except (DesiKgDeger.DoesNotExist, DesiKgKargoUcret.DoesNotExist):
+        # Get shipping cost from the compiled tariff (same step rule as the other calculation views)
+        pazar_yeri_tarifesi = pazar_yeri_tarifesi_getir(pazar_yeri.id)
+        kargo_tarifesi = pazar_yeri_tarifesi.kargo_tarifeleri.get(kargo_firma.id)
+        basamak = pazar_yeri_tarifesi.basamak_bul(urun_desi_kg)
+        kargo_bedeli = kargo_tarifesi.basamak_ucreti(basamak) if kargo_tarifesi else None
+        if kargo_bedeli is None:
             return Response(
                 {'error': 'Bu desi/kg değeri için kargo ücreti bulunamadı.'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -1099,16 +1205,17 @@ class FiyatHesaplamaView(UsernameMixin, APIView):
         # Calculate total cost
         toplam_maliyet = urun_maliyeti + paketleme_bedeli + kargo_bedeli
 
-        # Get commission rate
-        try:
-            komisyon_orani = HesaplamaKomisyonOranlari.objects.get(
-                kategori=kategori_yolu
-            ).komisyon_orani
-        except HesaplamaKomisyonOranlari.DoesNotExist:
+        # Get commission rate and the precomputed category path in one indexed read
+        komisyon = HesaplamaKomisyonOranlari.objects.filter(
+            pazar_yeri=pazar_yeri,
+            yaprak_kategori=kategori_yolu
+        ).values_list('komisyon_orani', 'kategori_yolu_metni').first()
+        if komisyon is None:
             return Response(
                 {'error': 'Bu kategori için komisyon oranı bulunamadı.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        komisyon_orani, kategori_yolu_string = komisyon
 
         # Calculate amounts
         komisyon_tutari = (toplam_maliyet * Decimal(str(komisyon_orani))) / Decimal('100')
@@ -1116,14 +1223,6 @@ class FiyatHesaplamaView(UsernameMixin, APIView):
         kdv_tutari = ((toplam_maliyet + komisyon_tutari + kar_tutari) * Decimal(str(kdv_orani))) / Decimal('100')
         satis_fiyati = toplam_maliyet + komisyon_tutari + kar_tutari + kdv_tutari
 
-        # Build category path
-        kategori_yolu_string = []
-        current = kategori_yolu
-        while current:
-            kategori_yolu_string.insert(0, current.ad)
-            current = current.ust_kategori
-        kategori_yolu_string = ' > '.join(kategori_yolu_string)
-
         # Save calculation history if email is provided
         if email:
             user = get_user_model().objects.get(email=email)
@@ -1152,7 +1251,7 @@ class FiyatHesaplamaView(UsernameMixin, APIView):
 
         return Response(response_data)
 
-class DesiKgHesaplamaView(APIView):
+class DesiKgHesaplamaView(IstekOlcumuMixin, APIView):
     """
     Desi/Kg hesaplama endpoint'i
     """
@@ -1180,12 +1279,11 @@ class DesiKgHesaplamaView(APIView):
             net_agirlik = serializer.validated_data.get('net_agirlik', 0)
 
             # Desi/Kg hesaplama
-            desi = (en * boy * yukseklik) / 3000
-            kg = max(desi, net_agirlik)
+            desi, kg = desi_kg_hesapla(en, boy, yukseklik, net_agirlik)
 
             # Hesaplama geçmişini kaydet
             from hesaplama.models import HesaplamaDesiKgGecmisi
-            HesaplamaDesiKgGecmisi.objects.create(
+            gecmis_kaydedici.kaydet(HesaplamaDesiKgGecmisi(
                 kullanici=request.user,
                 email=request.user.email,
                 en=en,
@@ -1193,7 +1291,7 @@ class DesiKgHesaplamaView(APIView):
                 yukseklik=yukseklik,
                 net_agirlik=net_agirlik,
                 desi_kg=kg
-            )
+            ))
 
             return Response({
                 'email': request.user.email,
@@ -1203,7 +1301,7 @@ class DesiKgHesaplamaView(APIView):
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class MarketplacePriceCalculationView(UsernameMixin, APIView):
+class MarketplacePriceCalculationView(IstekOlcumuMixin, UsernameMixin, APIView):
     """
     Pazar yeri satış fiyatı hesaplama endpoint'i için view
     """
@@ -1228,9 +1326,11 @@ class MarketplacePriceCalculationView(UsernameMixin, APIView):
         error_response = self.validate_username(username)
         if error_response:
             return error_response
-            
-        serializer = self.serializer_class()
-        return Response(serializer.to_representation(None))
+
+        veri, etag = form_verisi_getir(
+            self.__class__.__name__, lambda: self.serializer_class().to_representation(None)
+        )
+        return etag_ile_yanitla(request, Response(veri), etag)
 
     def post(self, request, username=None, format=None):
         """
@@ -1265,62 +1365,41 @@ class MarketplacePriceCalculationView(UsernameMixin, APIView):
                 kdv_orani = serializer.validated_data['kdv_orani']
                 
                 # Hizmet bedelini belirle
-                if pazar_yeri.pazar_ismi == "Trendyol":
-                    hizmet_bedeli = Decimal('8.49')
-                elif pazar_yeri.pazar_ismi == "Hepsiburada":
-                    hizmet_bedeli = Decimal('9.5')
-                else:
-                    hizmet_bedeli = Decimal('0')
-                
-                # Kargo ücretini bul
-                desi_kg_yuvarlama = math.ceil(urun_desi_kg)
+                hizmet_bedeli = hizmet_bedeli_getir(pazar_yeri)
                 
-                # Pazar yeri ve kargo firma ilişkisini kontrol et
-                if not PazaryeriKargofirma.objects.filter(pazar_yeri=pazar_yeri, kargo_firma=kargo_firma).exists():
+                # Pazar yeri ve kargo firma ilişkisini derlenmiş tarifeden kontrol et
+                pazar_yeri_tarifesi = pazar_yeri_tarifesi_getir(pazar_yeri.id)
+                kargo_tarifesi = pazar_yeri_tarifesi.kargo_tarifeleri.get(kargo_firma.id)
+                if kargo_tarifesi is None:
                     return Response(
                         {'error': f'{kargo_firma.firma_ismi} {pazar_yeri.pazar_ismi} için hizmet vermemektedir.'},
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 
-                # Desi/Kg değerini bul
-                desi_kg_deger = DesiKgDeger.objects.filter(
-                    pazar_yeri=pazar_yeri,
-                    desi_degeri=desi_kg_yuvarlama
-                ).first()
+                # Desi/Kg değerini tarife basamağına yuvarla ve kargo ücretini bul
+                basamak = pazar_yeri_tarifesi.basamak_bul(urun_desi_kg)
+                kargo_ucreti = kargo_tarifesi.basamak_ucreti(basamak)
+                desi_kg_yuvarlama = basamak.yuvarlanmis_desi_kg if basamak else urun_desi_kg
                 
-                if not desi_kg_deger:
-                    return Response(
-                        {'error': f'{pazar_yeri.pazar_ismi} için {desi_kg_yuvarlama} desi/kg değerinde tarife bulunamadı.'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                
-                # Kargo ücretini bul
-                kargo_ucret = DesiKgKargoUcret.objects.filter(
-                    pazar_yeri=pazar_yeri,
-                    kargo_firma=kargo_firma,
-                    desi_kg_deger=desi_kg_deger
-                ).first()
-                
-                if not kargo_ucret:
+                if kargo_ucreti is None:
                     return Response(
                         {'error': f'{pazar_yeri.pazar_ismi} - {kargo_firma.firma_ismi} için {desi_kg_yuvarlama} desi/kg değerinde tarife bulunamadı.'},
                         status=status.HTTP_404_NOT_FOUND
                     )
                 
                 # Hesaplamaları yap
-                tam_kisim = (urun_maliyeti + kargo_ucret.ucret + paketleme_bedeli + hizmet_bedeli) * Decimal('100')
-                stopaj_orani = Decimal('1')
-                yuzde_kisim = Decimal('100') - (komisyon_orani + kar_orani + stopaj_orani)
-                satis_fiyati = tam_kisim / yuzde_kisim
-                
-                komisyon_bedeli = satis_fiyati * komisyon_orani / Decimal('100')
-                kar_bedeli = satis_fiyati * kar_orani / Decimal('100')
-                stopaj_bedeli = satis_fiyati * stopaj_orani / Decimal('100')
-                kdv_dahil_satis_fiyati = satis_fiyati + (satis_fiyati * kdv_orani / Decimal('100'))
+                stopaj_orani = STOPAJ_ORANI
+                fiyat = satis_fiyati_hesapla(
+                    urun_maliyeti, kargo_ucreti, paketleme_bedeli, hizmet_bedeli,
+                    komisyon_orani, kar_orani, kdv_orani, stopaj_orani
+                )
+                satis_fiyati = fiyat.satis_fiyati
+                stopaj_bedeli = fiyat.stopaj_bedeli
+                kdv_dahil_satis_fiyati = fiyat.kdv_dahil_satis_fiyati
 
                 # Hesaplama geçmişini kaydet
                 from hesaplama.models import FiyatHesaplamaGecmisi
-                FiyatHesaplamaGecmisi.objects.create(
+                gecmis_kaydedici.kaydet(FiyatHesaplamaGecmisi(
                     kullanici=request.user if request.user.is_authenticated else None,
                     email=email,
                     pazar_yeri=pazar_yeri,
@@ -1329,13 +1408,13 @@ class MarketplacePriceCalculationView(UsernameMixin, APIView):
                     hizmet_bedeli=hizmet_bedeli,
                     urun_desi_kg=urun_desi_kg,
                     kargo_firma=kargo_firma,
-                    kargo_ucreti=kargo_ucret.ucret,
+                    kargo_ucreti=kargo_ucreti,
                     komisyon_orani=komisyon_orani,
                     stopaj_orani=stopaj_orani,
                     stopaj_bedeli=stopaj_bedeli,
                     satis_fiyati=satis_fiyati,
                     kdv_dahil_satis_fiyati=kdv_dahil_satis_fiyati
-                )
+                ))
                 
                 # Sonuçları döndür
                 result = {
@@ -1345,7 +1424,7 @@ class MarketplacePriceCalculationView(UsernameMixin, APIView):
                     'pazar_yeri': pazar_yeri.pazar_ismi,
                     'hizmet_bedeli': float(hizmet_bedeli),
                     'urun_desi_kg': float(urun_desi_kg),
-                    'kargo_ucreti': float(kargo_ucret.ucret),
+                    'kargo_ucreti': float(kargo_ucreti),
                     'kategori_komisyon_orani': float(komisyon_orani),
                     'stopaj_orani': float(stopaj_orani),
                     'hesaplanan_stopaj_bedeli': float(stopaj_bedeli),
@@ -1361,4 +1440,347 @@ class MarketplacePriceCalculationView(UsernameMixin, APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST) 
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST) 
+
+class MarketplaceTopluFiyatHesaplamaView(IstekOlcumuMixin, UsernameMixin, APIView):
+    """
+    Bir ürün listesinin pazar yeri satış fiyatlarını tek istekte hesaplayan view.
+    Tarife ve komisyon verileri istek başına bir kez yüklenir, geçmiş kayıtları
+    tek bir bulk_create ile yazılır.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = TopluFiyatHesaplamaSerializer
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer]
+    maksimum_satir = 10000
+    beklenen_sutunlar = [
+        'urun_kodu', 'urun_maliyeti', 'paketleme_bedeli', 'urun_desi_kg', 'kargo_firma',
+        'komisyon_orani', 'kategori_yolu', 'kar_orani', 'kdv_orani'
+    ]
+
+    def get(self, request, username=None, format=None):
+        """
+        GET isteği için form seçeneklerini ve beklenen sütunları döndürür
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        def uret():
+            data = MarketplacePriceCalculationSerializer().to_representation(None)
+            data['beklenen_sutunlar'] = self.beklenen_sutunlar
+            data['maksimum_satir'] = self.maksimum_satir
+            return data
+
+        veri, etag = form_verisi_getir('MarketplaceTopluFiyatHesaplamaView', uret)
+        return etag_ile_yanitla(request, Response(veri), etag)
+
+    def _dosyadan_urunleri_oku(self, dosya):
+        """
+        CSV veya XLSX dosyasındaki satırları sözlük listesine çevirir
+        """
+        if dosya.name.lower().endswith('.csv'):
+            df = pd.read_csv(dosya, dtype=str)
+        else:
+            df = pd.read_excel(dosya, dtype=str)
+        df.columns = [str(sutun).strip() for sutun in df.columns]
+        df = df.dropna(how='all')
+        return df.astype(object).where(df.notna(), None).to_dict('records')
+
+    def post(self, request, username=None, format=None):
+        """
+        POST isteği için tüm ürünlerin satış fiyatlarını hesaplar
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            email = serializer.validated_data.get('email', '').strip().lower()
+            pazar_yeri = serializer.validated_data['pazar_yeri']
+
+            if not check_and_link_calculations(request.user, email):
+                return Response(
+                    {'error': 'Girdiğiniz email adresi ile giriş yaptığınız email adresi eşleşmiyor.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            dosya = serializer.validated_data.get('dosya')
+            urunler = self._dosyadan_urunleri_oku(dosya) if dosya else serializer.validated_data['urunler']
+
+            if len(urunler) > self.maksimum_satir:
+                return Response(
+                    {'error': f'Tek seferde en fazla {self.maksimum_satir} ürün hesaplanabilir.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Satırları doğrula
+            gecerli_satirlar = []
+            sonuclar = []
+            for satir_no, urun in enumerate(urunler, 1):
+                urun_serializer = TopluFiyatUrunSerializer(data=urun)
+                if urun_serializer.is_valid():
+                    gecerli_satirlar.append((satir_no, urun_serializer.validated_data))
+                else:
+                    sonuclar.append({'satir': satir_no, 'hata': urun_serializer.errors})
+
+            # Tarife, kargo firmaları ve komisyon oranları istek başına bir kez yüklenir
+            pazar_yeri_tarifesi = pazar_yeri_tarifesi_getir(pazar_yeri.id)
+            kargo_firmalari = KargoFirma.objects.filter(aktif=True).in_bulk(
+                {veri['kargo_firma'] for _, veri in gecerli_satirlar}
+            )
+            komisyon_oranlari = dict(
+                HesaplamaKomisyonOranlari.objects.aktif().filter(
+                    pazar_yeri=pazar_yeri,
+                    id__in={veri['kategori_yolu'] for _, veri in gecerli_satirlar if veri.get('kategori_yolu')}
+                ).values_list('id', 'komisyon_orani')
+            )
+
+            hizmet_bedeli = hizmet_bedeli_getir(pazar_yeri)
+            stopaj_orani = STOPAJ_ORANI
+
+            # Tarife ve komisyon eşleştirmesi satır satır, fiyat hesabı tek seferde yapılır
+            hesaplanacaklar = []
+            for satir_no, veri in gecerli_satirlar:
+                kargo_firma = kargo_firmalari.get(veri['kargo_firma'])
+                if kargo_firma is None:
+                    sonuclar.append({'satir': satir_no, 'hata': 'Geçerli bir kargo firması seçiniz.'})
+                    continue
+
+                kargo_tarifesi = pazar_yeri_tarifesi.kargo_tarifeleri.get(kargo_firma.id)
+                if kargo_tarifesi is None:
+                    sonuclar.append({
+                        'satir': satir_no,
+                        'hata': f'{kargo_firma.firma_ismi} {pazar_yeri.pazar_ismi} için hizmet vermemektedir.'
+                    })
+                    continue
+
+                basamak = kargo_tarifesi.basamak_bul(veri['urun_desi_kg'])
+                kargo_ucreti = kargo_tarifesi.basamak_ucreti(basamak)
+                if kargo_ucreti is None:
+                    desi_kg_yuvarlama = basamak.yuvarlanmis_desi_kg if basamak else veri['urun_desi_kg']
+                    sonuclar.append({
+                        'satir': satir_no,
+                        'hata': f'{pazar_yeri.pazar_ismi} - {kargo_firma.firma_ismi} için {desi_kg_yuvarlama} desi/kg değerinde tarife bulunamadı.'
+                    })
+                    continue
+
+                komisyon_orani = veri.get('komisyon_orani')
+                if komisyon_orani is None:
+                    komisyon_orani = komisyon_oranlari.get(veri['kategori_yolu'])
+                    if komisyon_orani is None:
+                        sonuclar.append({
+                            'satir': satir_no,
+                            'hata': f'{pazar_yeri.pazar_ismi} için seçilen kategoride komisyon oranı bulunamadı.'
+                        })
+                        continue
+
+                hesaplanacaklar.append((satir_no, veri, kargo_firma, kargo_ucreti, komisyon_orani))
+
+            fiyatlar = satis_fiyatlari_hesapla(
+                [satir[1]['urun_maliyeti'] for satir in hesaplanacaklar],
+                [satir[3] for satir in hesaplanacaklar],
+                [satir[1]['paketleme_bedeli'] for satir in hesaplanacaklar],
+                hizmet_bedeli,
+                [satir[4] for satir in hesaplanacaklar],
+                [satir[1]['kar_orani'] for satir in hesaplanacaklar],
+                [satir[1]['kdv_orani'] for satir in hesaplanacaklar],
+                stopaj_orani
+            )
+
+            kullanici = request.user if request.user.is_authenticated else None
+            gecmis_kayitlari = []
+
+            for i, (satir_no, veri, kargo_firma, kargo_ucreti, komisyon_orani) in enumerate(hesaplanacaklar):
+                if not fiyatlar['gecerli'][i]:
+                    sonuclar.append({
+                        'satir': satir_no,
+                        'hata': 'Komisyon, kar ve stopaj oranlarının toplamı 100\'den küçük olmalıdır.'
+                    })
+                    continue
+
+                satis_fiyati = kurustan_decimal(fiyatlar['satis_fiyati'][i])
+                stopaj_bedeli = kurustan_decimal(fiyatlar['stopaj_bedeli'][i])
+                kdv_dahil_satis_fiyati = kurustan_decimal(fiyatlar['kdv_dahil_satis_fiyati'][i])
+
+                gecmis_kayitlari.append(FiyatHesaplamaGecmisi(
+                    kullanici=kullanici,
+                    email=email,
+                    pazar_yeri=pazar_yeri,
+                    urun_maliyeti=veri['urun_maliyeti'],
+                    paketleme_bedeli=veri['paketleme_bedeli'],
+                    hizmet_bedeli=hizmet_bedeli,
+                    urun_desi_kg=veri['urun_desi_kg'],
+                    kargo_firma=kargo_firma,
+                    kargo_ucreti=kargo_ucreti,
+                    komisyon_orani=komisyon_orani,
+                    stopaj_orani=stopaj_orani,
+                    stopaj_bedeli=stopaj_bedeli,
+                    satis_fiyati=satis_fiyati,
+                    kdv_dahil_satis_fiyati=kdv_dahil_satis_fiyati
+                ))
+
+                sonuclar.append({
+                    'satir': satir_no,
+                    'urun_kodu': veri.get('urun_kodu'),
+                    'kargo_firma': kargo_firma.firma_ismi,
+                    'urun_desi_kg': float(veri['urun_desi_kg']),
+                    'kargo_ucreti': float(kargo_ucreti),
+                    'kategori_komisyon_orani': float(komisyon_orani),
+                    'hizmet_bedeli': float(hizmet_bedeli),
+                    'hesaplanan_stopaj_bedeli': float(stopaj_bedeli),
+                    'satis_fiyati': float(satis_fiyati),
+                    'kdv_dahil_satis_fiyati': float(kdv_dahil_satis_fiyati)
+                })
+
+            # Hesaplama geçmişini tek seferde kaydet
+            FiyatHesaplamaGecmisi.objects.bulk_create(gecmis_kayitlari, batch_size=500)
+
+            sonuclar.sort(key=lambda sonuc: sonuc['satir'])
+            return Response({
+                'mail': email,
+                'pazar_yeri': pazar_yeri.pazar_ismi,
+                'toplam_satir': len(urunler),
+                'hesaplanan_satir': len(gecmis_kayitlari),
+                'hatali_satir': len(urunler) - len(gecmis_kayitlari),
+                'sonuclar': sonuclar
+            })
+
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+class FiyatMatrisiView(IstekOlcumuMixin, UsernameMixin, APIView):
+    """
+    Bir ürünün tüm pazar yerleri ve kargo firmaları için satış fiyatlarını tek istekte
+    matris olarak döndüren view. Sonuç girdinin hash'i ile önbelleğe alınır; matris
+    hesaplamaları geçmişe kaydedilmez.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = FiyatMatrisiSerializer
+    renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer]
+
+    def get(self, request, username=None, format=None):
+        """
+        GET isteği için form verilerini ve seçenekleri döndürür
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        veri, etag = form_verisi_getir(
+            self.__class__.__name__, lambda: self.serializer_class().to_representation(None)
+        )
+        return etag_ile_yanitla(request, Response(veri), etag)
+
+    def post(self, request, username=None, format=None):
+        """
+        POST isteği için fiyat matrisini hesaplar
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(fiyat_matrisi_getir(serializer.validated_data))
+
+class FiyatCozucuView(IstekOlcumuMixin, UsernameMixin, APIView):
+    """
+    Hedef net kâr veya hedef (rakip/azami) fiyattan bilinmeyen değişkeni çözen view:
+    gereken satış fiyatı, kâr oranı, izin verilen ürün maliyeti veya en yüksek desi/kg.
+    Sonuçlar kargo firması bazında döner; çözümler geçmişe kaydedilmez.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = FiyatCozucuSerializer
+    renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer]
+
+    def get(self, request, username=None, format=None):
+        """
+        GET isteği için form verilerini ve seçenekleri döndürür
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        veri, etag = form_verisi_getir(
+            self.__class__.__name__, lambda: self.serializer_class().to_representation(None)
+        )
+        return etag_ile_yanitla(request, Response(veri), etag)
+
+    def post(self, request, username=None, format=None):
+        """
+        POST isteği için bilinmeyen değişkeni çözer
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response(fiyat_coz(serializer.validated_data))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class FiyatTaramaView(IstekOlcumuMixin, UsernameMixin, APIView):
+    """
+    Satış fiyatının desi, kâr oranı ve komisyon oranı aralıklarına göre değişimini
+    tek istekte ızgara olarak döndüren view. Tarama sonuçları geçmişe kaydedilmez.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = FiyatTaramaSerializer
+    renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer]
+
+    def get(self, request, username=None, format=None):
+        """
+        GET isteği için form verilerini ve seçenekleri döndürür
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        veri, etag = form_verisi_getir(
+            self.__class__.__name__, lambda: self.serializer_class().to_representation(None)
+        )
+        return etag_ile_yanitla(request, Response(veri), etag)
+
+    def post(self, request, username=None, format=None):
+        """
+        POST isteği için fiyat ızgarasını hesaplar
+        """
+        error_response = self.validate_username(username)
+        if error_response:
+            return error_response
+
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response(fiyat_taramasi_hesapla(serializer.validated_data))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+def prometheus_metrikleri(request):
+    """
+    Görünüm bazında süre ve sorgu sayısı histogramlarını Prometheus metin biçiminde döndürür.
+    settings.ISTEK_OLCUMU_PROMETHEUS kapalıysa 404 döner. Yalnızca yönetici kullanıcılar ve
+    settings.ISTEK_OLCUMU_PROMETHEUS_IZINLI_IPLER içindeki adresler erişebilir.
+    """
+    if not settings.ISTEK_OLCUMU_PROMETHEUS:
+        raise Http404
+    izinli_ipler = settings.ISTEK_OLCUMU_PROMETHEUS_IZINLI_IPLER
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR') in izinli_ipler):
+        raise PermissionDenied
+    return HttpResponse(prometheus_metinleri(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HesaplamaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hesaplama'
+
+    def ready(self):
+        import hesaplama.checks
+        import hesaplama.signals
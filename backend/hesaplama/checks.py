@@ -0,0 +1,29 @@
+"""
+Hesaplama uygulamasının Django sistem kontrolleri.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Yalnızca kendi sürecinde geçerli olan cache backend'leri
+SUREC_ICI_CACHE_BACKENDLERI = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def paylasimli_cache_kontrolu(app_configs, **kwargs):
+    """
+    Süreç içi önbelleklerin (tarife, kategori arama, form) worker'lar arasında geçersiz
+    kılınabilmesi için varsayılan cache'in paylaşımlı olması gerekir
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in SUREC_ICI_CACHE_BACKENDLERI:
+        return []
+    return [Warning(
+        f'Varsayılan cache ({backend}) worker\'lar arasında paylaşılmıyor.',
+        hint='Birden fazla worker ile çalışırken tarife ve komisyon değişiklikleri diğer worker\'lara '
+             'ancak SUREC_ONBELLEGI_MAKSIMUM_YAS sonunda yansır. DJANGO_CACHE_BACKEND ile Redis '
+             'veya Memcached seçin.',
+        id='hesaplama.W001',
+    )]
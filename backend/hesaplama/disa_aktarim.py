@@ -0,0 +1,173 @@
+"""
+Hesaplama geçmişi tablolarının CSV veya XLSX olarak dışa aktarılması.
+
+Satırlar QuerySet.iterator(chunk_size=...) ile parça parça okunur ve CSV
+satırları tek tek üretilir; böylece aktarılan satır sayısı milyonlarca olsa
+da bellek kullanımı sabit kalır. Aynı üretici hem admin endpoint'inde
+(StreamingHttpResponse) hem de export_gecmis yönetim komutunda kullanılır.
+
+XLSX dosyaları openpyxl'in yalnızca yazma (write-only) kipiyle yazılır; satırlar
+bellekte biriktirilmeden geçici dosyaya akıtılır. XLSX bir zip arşivi olduğu için
+dosya tamamlanmadan gönderilemez; endpoint önce geçici dosyaya yazar, sonra onu akıtır.
+"""
+import csv
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .models import FiyatHesaplamaGecmisi, KargoUcretGecmis, KomisyonOraniGecmisi, HesaplamaDesiKgGecmisi
+
+PARCA_BOYUTU = 2000
+
+# Excel'in bir sayfada açabileceği en fazla satır sayısı (başlık satırı dahil)
+XLSX_SAYFA_SATIR_SINIRI = 1048576
+
+# Tablo adı -> (model, [(sütun başlığı, alan yolu), ...])
+GECMIS_TABLOLARI = {
+    'fiyat': (FiyatHesaplamaGecmisi, [
+        ('id', 'id'),
+        ('hesaplama_tarihi', 'hesaplama_tarihi'),
+        ('kullanici', 'kullanici__username'),
+        ('email', 'email'),
+        ('pazar_yeri', 'pazar_yeri__pazar_ismi'),
+        ('kargo_firma', 'kargo_firma__firma_ismi'),
+        ('urun_maliyeti', 'urun_maliyeti'),
+        ('paketleme_bedeli', 'paketleme_bedeli'),
+        ('hizmet_bedeli', 'hizmet_bedeli'),
+        ('urun_desi_kg', 'urun_desi_kg'),
+        ('kargo_ucreti', 'kargo_ucreti'),
+        ('komisyon_orani', 'komisyon_orani'),
+        ('stopaj_orani', 'stopaj_orani'),
+        ('stopaj_bedeli', 'stopaj_bedeli'),
+        ('satis_fiyati', 'satis_fiyati'),
+        ('kdv_dahil_satis_fiyati', 'kdv_dahil_satis_fiyati'),
+    ]),
+    'kargo': (KargoUcretGecmis, [
+        ('id', 'id'),
+        ('hesaplama_tarihi', 'hesaplama_tarihi'),
+        ('kullanici', 'kullanici__username'),
+        ('email', 'email'),
+        ('pazar_yeri', 'pazar_yeri__pazar_ismi'),
+        ('kargo_firma', 'kargo_firma__firma_ismi'),
+        ('desi_kg_degeri', 'desi_kg_degeri'),
+        ('yuvarlanmis_desi_kg', 'yuvarlanmis_desi_kg'),
+        ('kargo_ucreti', 'kargo_ucreti'),
+    ]),
+    'komisyon': (KomisyonOraniGecmisi, [
+        ('id', 'id'),
+        ('hesaplama_tarihi', 'hesaplama_tarihi'),
+        ('kullanici', 'kullanici__username'),
+        ('email', 'email'),
+        ('pazar_yeri', 'pazar_yeri__pazar_ismi'),
+        ('kategori', 'kategori_yolu__adi'),
+        ('komisyon_orani', 'komisyon_orani'),
+    ]),
+    'desi-kg': (HesaplamaDesiKgGecmisi, [
+        ('id', 'id'),
+        ('hesaplama_tarihi', 'hesaplama_tarihi'),
+        ('kullanici', 'kullanici__username'),
+        ('email', 'email'),
+        ('en', 'en'),
+        ('boy', 'boy'),
+        ('yukseklik', 'yukseklik'),
+        ('net_agirlik', 'net_agirlik'),
+        ('desi_kg', 'desi_kg'),
+    ]),
+}
+
+
+class _SatirTamponu:
+    """
+    csv.writer'ın yazdığı satırı saklamadan geri döndüren sahte dosya nesnesi
+    """
+    def write(self, deger):
+        return deger
+
+
+def _gun_baslangici(tarih):
+    return timezone.make_aware(datetime.combine(tarih, time.min))
+
+
+def gecmis_sorgusu(tablo, baslangic=None, bitis=None, pazar_yeri=None, kullanici=None):
+    """
+    Dışa aktarılacak satırlar için filtrelenmiş values_list sorgusunu döndürür.
+    baslangic ve bitis tarihleri (date) dahildir. Tablo bilinmiyorsa veya tabloda
+    pazar yeri alanı yoksa ValueError fırlatır.
+    """
+    if tablo not in GECMIS_TABLOLARI:
+        raise ValueError(f'Bilinmeyen tablo: {tablo}. Geçerli tablolar: {", ".join(GECMIS_TABLOLARI)}')
+    model, sutunlar = GECMIS_TABLOLARI[tablo]
+
+    filtreler = {}
+    if baslangic:
+        filtreler['hesaplama_tarihi__gte'] = _gun_baslangici(baslangic)
+    if bitis:
+        # Tarih alanına fonksiyon uygulanmasın diye bitiş ertesi günün başlangıcına çevrilir
+        filtreler['hesaplama_tarihi__lt'] = _gun_baslangici(bitis + timedelta(days=1))
+    if pazar_yeri:
+        if not any(alan.startswith('pazar_yeri') for _, alan in sutunlar):
+            raise ValueError(f'{tablo} tablosunda pazar yeri alanı bulunmuyor.')
+        filtreler['pazar_yeri_id'] = pazar_yeri
+    if kullanici:
+        filtreler['kullanici__username'] = kullanici
+
+    # Birincil anahtar sırası ek sıralama maliyeti getirmez
+    return model.objects.filter(**filtreler).order_by('id').values_list(*(alan for _, alan in sutunlar))
+
+
+def _csv_akisi(sorgu, basliklar, parca_boyutu):
+    yazici = csv.writer(_SatirTamponu())
+    yield '\ufeff' + yazici.writerow(basliklar)
+    parca = []
+    for satir in sorgu.iterator(chunk_size=parca_boyutu):
+        parca.append(yazici.writerow(
+            [deger.isoformat() if isinstance(deger, datetime) else deger for deger in satir]
+        ))
+        if len(parca) >= parca_boyutu:
+            yield ''.join(parca)
+            parca = []
+    if parca:
+        yield ''.join(parca)
+
+
+def csv_satirlari(tablo, parca_boyutu=PARCA_BOYUTU, **filtreler):
+    """
+    Tablonun filtrelenmiş satırlarını başlık satırıyla birlikte CSV metni olarak,
+    her seferinde en fazla parca_boyutu satırlık parçalar halinde üreten iteratörü döndürür.
+    Excel'in Türkçe karakterleri doğru açması için ilk satır UTF-8 BOM ile başlar.
+    Filtre hataları (ValueError) akış başlamadan, çağrı anında fırlatılır.
+    """
+    sorgu = gecmis_sorgusu(tablo, **filtreler)
+    basliklar = [baslik for baslik, _ in GECMIS_TABLOLARI[tablo][1]]
+    return _csv_akisi(sorgu, basliklar, parca_boyutu)
+
+
+def _xlsx_degeri(deger):
+    # Excel saat dilimli tarih saklayamaz; tarihler yerel saate çevrilir
+    if isinstance(deger, datetime) and timezone.is_aware(deger):
+        return timezone.make_naive(deger)
+    return deger
+
+
+def xlsx_yaz(tablo, dosya, parca_boyutu=PARCA_BOYUTU, **filtreler):
+    """
+    Tablonun filtrelenmiş satırlarını dosyaya (yol veya ikili dosya nesnesi) XLSX olarak yazar.
+    Bir sayfanın satır sınırı aşılırsa satırlar yeni sayfalarda devam eder.
+    Filtre hataları (ValueError) yazma başlamadan fırlatılır.
+    """
+    sorgu = gecmis_sorgusu(tablo, **filtreler)
+    basliklar = [baslik for baslik, _ in GECMIS_TABLOLARI[tablo][1]]
+
+    kitap = Workbook(write_only=True)
+    sayfa, sayfa_satiri = None, XLSX_SAYFA_SATIR_SINIRI
+    for satir in sorgu.iterator(chunk_size=parca_boyutu):
+        if sayfa_satiri >= XLSX_SAYFA_SATIR_SINIRI:
+            sayfa = kitap.create_sheet(title=tablo if sayfa is None else f'{tablo}-{len(kitap.worksheets) + 1}')
+            sayfa.append(basliklar)
+            sayfa_satiri = 1
+        sayfa.append([_xlsx_degeri(deger) for deger in satir])
+        sayfa_satiri += 1
+    if sayfa is None:
+        kitap.create_sheet(title=tablo).append(basliklar)
+    kitap.save(dosya)
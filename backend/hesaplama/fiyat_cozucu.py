@@ -0,0 +1,194 @@
+"""
+Hedef kâr veya hedef fiyattan geriye doğru fiyat planlama (ters çözücü).
+
+Satış fiyatı formülü (bkz. fiyatlama.py):
+    S = C * 100 / (D - kar_orani)
+    C = maliyet + kargo + paketleme + hizmet_bedeli
+    D = 100 - (komisyon + stopaj)
+
+Buradan net kâr tutarı S * D / 100 - C olur. Bilinmeyen değişken bu eşitlikten
+kapalı formla çözülür:
+- satis_fiyati: kâr oranından S = 100C / (D - k), TL hedef kârdan S = 100(C + T) / D
+- kar_orani: hedef fiyattan k = D - 100C / S
+- urun_maliyeti: hedef fiyat ve hedef kârdan izin verilen en yüksek maliyet
+- desi_kg: hedef fiyat ve hedef kârdan izin verilen en yüksek kargo ücreti bulunur;
+  kargo ücreti desiye göre basamaklı olduğu için her kargo firmasının ücretleri
+  artan bir zarfa çevrilir ve ücretin sığdığı son desi basamağı tüm firmalar
+  için birlikte (NumPy) aranır.
+
+Kargo firması verilmezse çözüm pazar yerine hizmet veren tüm firmalar için yapılır
+ve en uygun firma ayrıca döndürülür. Yuvarlamalar hedefi garanti edecek yöndedir:
+fiyat yukarı, izin verilen maliyet ve kâr oranı aşağı yuvarlanır.
+"""
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+
+import numpy as np
+
+from .fiyatlama import KURUS, STOPAJ_ORANI, hizmet_bedeli_getir, kurusa_yuvarla
+from .models import KargoFirma
+from .tarife import DesiBasamagi, pazar_yeri_tarifesi_getir
+
+BILINMEYENLER = ('satis_fiyati', 'kar_orani', 'urun_maliyeti', 'desi_kg')
+
+# Bilinmeyene göre en uygun sonucun seçimi: (alan, büyük olan mı daha iyi)
+EN_UYGUN_OLCUTU = {
+    'satis_fiyati': ('satis_fiyati', False),
+    'kar_orani': ('kar_orani', True),
+    'urun_maliyeti': ('urun_maliyeti', True),
+    'desi_kg': ('desi_kg', True),
+}
+
+
+def _asagi_yuvarla(deger):
+    return deger.quantize(KURUS, rounding=ROUND_DOWN)
+
+
+def _yukari_yuvarla(deger):
+    return deger.quantize(KURUS, rounding=ROUND_UP)
+
+
+def _fiyat_ozeti(satis_fiyati, toplam_maliyet, yuzde_kisim, kdv_orani):
+    """
+    Satış fiyatı ve toplam maliyetten net kâr, kâr oranı ve KDV dahil fiyatı hesaplar
+    """
+    kar_bedeli = satis_fiyati * yuzde_kisim / Decimal('100') - toplam_maliyet
+    return {
+        'satis_fiyati': float(kurusa_yuvarla(satis_fiyati)),
+        'kdv_dahil_satis_fiyati': float(kurusa_yuvarla(satis_fiyati * (Decimal('100') + kdv_orani) / Decimal('100'))),
+        'kar_bedeli': float(kurusa_yuvarla(kar_bedeli)),
+        'kar_orani': float(_asagi_yuvarla(kar_bedeli * Decimal('100') / satis_fiyati)) if satis_fiyati > 0 else None,
+    }
+
+
+def _izin_verilen_en_yuksek_desiler(pazar_yeri_tarifesi, kargo_firma_idleri, kargo_ucreti_siniri):
+    """
+    Her kargo firması için ücreti sınırı aşmayan en yüksek desi/kg basamağını (yoksa None) döndürür.
+
+    Ücretler pazar yerinin desi basamaklarına hizalanıp (tanımsız basamak sonsuz) satır
+    bazında kümülatif maksimumla artan bir zarfa çevrilir; zarf artan olduğu için sınırı
+    aşmayan basamak sayısı, ikili aramanın vereceği konumla aynıdır ve tüm firmalar için
+    tek işlemde bulunur.
+    """
+    desi_degerleri = pazar_yeri_tarifesi.desi_degerleri
+    if not desi_degerleri or not kargo_firma_idleri:
+        return [None] * len(kargo_firma_idleri)
+
+    basamaklar = np.asarray(desi_degerleri, dtype=np.float64)
+    ucretler = np.full((len(kargo_firma_idleri), len(basamaklar)), np.inf)
+    for satir, kargo_firma_id in enumerate(kargo_firma_idleri):
+        kargo_tarifesi = pazar_yeri_tarifesi.kargo_tarifeleri[kargo_firma_id]
+        # Firma ücretleri pazar yerinin DesiKgDeger kayıtlarına bağlı; her basamağı basamaklar'da bulunur
+        sutunlar = np.searchsorted(basamaklar, kargo_tarifesi.desi_degerleri)
+        ucretler[satir, sutunlar] = np.asarray(kargo_tarifesi.ucretler, dtype=np.float64)
+
+    zarf = np.maximum.accumulate(ucretler, axis=1)
+    sigan_basamak_sayisi = (zarf <= float(kargo_ucreti_siniri)).sum(axis=1)
+    return [desi_degerleri[sayi - 1] if sayi else None for sayi in sigan_basamak_sayisi]
+
+
+def fiyat_coz(girdi):
+    """
+    FiyatCozucuSerializer'ın doğrulanmış verisiyle bilinmeyen değişkeni kargo firması bazında çözer.
+    Komisyon ve stopaj oranlarının toplamı 100'den küçük değilse ValueError fırlatır.
+    """
+    bilinmeyen = girdi['bilinmeyen']
+    pazar_yeri = girdi['pazar_yeri']
+    komisyon_orani = girdi['komisyon_orani']
+    kdv_orani = girdi['kdv_orani']
+    paketleme_bedeli = girdi['paketleme_bedeli']
+    urun_maliyeti = girdi.get('urun_maliyeti')
+    kar_orani = girdi.get('kar_orani')
+    hedef_kar = girdi.get('hedef_kar')
+    hizmet_bedeli = hizmet_bedeli_getir(pazar_yeri)
+    stopaj_orani = STOPAJ_ORANI
+
+    yuzde_kisim = Decimal('100') - (komisyon_orani + stopaj_orani)
+    if yuzde_kisim <= 0:
+        raise ValueError('Komisyon ve stopaj oranlarının toplamı 100\'den küçük olmalıdır.')
+
+    hedef_fiyat = girdi.get('hedef_fiyat')
+    if hedef_fiyat is not None and girdi.get('hedef_fiyat_kdv_dahil'):
+        hedef_fiyat = hedef_fiyat * Decimal('100') / (Decimal('100') + kdv_orani)
+
+    pazar_yeri_tarifesi = pazar_yeri_tarifesi_getir(pazar_yeri.id)
+    if girdi.get('kargo_firma'):
+        kargo_firmalari = [girdi['kargo_firma']] if girdi['kargo_firma'].id in pazar_yeri_tarifesi.kargo_tarifeleri else []
+    else:
+        kargo_firmalari = list(KargoFirma.objects.filter(
+            aktif=True, id__in=list(pazar_yeri_tarifesi.kargo_tarifeleri)
+        ).order_by('id'))
+    if not kargo_firmalari:
+        raise ValueError(f'{pazar_yeri.pazar_ismi} için seçilen kargo firmasının tarifesi bulunamadı.')
+
+    # Hedef fiyat verilen çözümlerde fiyattan kalan ve kâra ayrılacak tutar
+    if hedef_fiyat is not None and bilinmeyen != 'kar_orani':
+        net_kar = hedef_kar if hedef_kar is not None else hedef_fiyat * kar_orani / Decimal('100')
+        kalan = hedef_fiyat * yuzde_kisim / Decimal('100') - net_kar - paketleme_bedeli - hizmet_bedeli
+
+    if bilinmeyen == 'desi_kg':
+        kargo_ucreti_siniri = _asagi_yuvarla(kalan - urun_maliyeti)
+        desiler = _izin_verilen_en_yuksek_desiler(
+            pazar_yeri_tarifesi, [kargo_firma.id for kargo_firma in kargo_firmalari], kargo_ucreti_siniri
+        )
+        basamaklar = [DesiBasamagi(desi_degeri) if desi_degeri is not None else None for desi_degeri in desiler]
+    else:
+        basamaklar = [pazar_yeri_tarifesi.basamak_bul(girdi['urun_desi_kg'])] * len(kargo_firmalari)
+
+    sonuclar = []
+    for kargo_firma, basamak in zip(kargo_firmalari, basamaklar):
+        sonuc = {'kargo_firma': {'id': kargo_firma.id, 'firma_ismi': kargo_firma.firma_ismi}}
+        kargo_tarifesi = pazar_yeri_tarifesi.kargo_tarifeleri[kargo_firma.id]
+        kargo_ucreti = kargo_tarifesi.basamak_ucreti(basamak)
+        if kargo_ucreti is None:
+            sonuc.update({'mumkun': False, 'hata': 'Hedefe uyan bir desi/kg basamağında tarife bulunamadı.'
+                          if bilinmeyen == 'desi_kg' or basamak is None
+                          else f'{basamak.yuvarlanmis_desi_kg} desi/kg değerinde tarife bulunamadı.'})
+            sonuclar.append(sonuc)
+            continue
+        sonuc['kargo_ucreti'] = float(kargo_ucreti)
+        sabit_giderler = kargo_ucreti + paketleme_bedeli + hizmet_bedeli
+
+        if bilinmeyen == 'satis_fiyati':
+            toplam_maliyet = urun_maliyeti + sabit_giderler
+            if hedef_kar is not None:
+                satis_fiyati = _yukari_yuvarla((toplam_maliyet + hedef_kar) * Decimal('100') / yuzde_kisim)
+            elif yuzde_kisim - kar_orani > 0:
+                satis_fiyati = kurusa_yuvarla(toplam_maliyet * Decimal('100') / (yuzde_kisim - kar_orani))
+            else:
+                sonuc.update({'mumkun': False, 'hata': 'Komisyon, kar ve stopaj oranlarının toplamı 100\'den küçük olmalıdır.'})
+                sonuclar.append(sonuc)
+                continue
+            sonuc.update({'mumkun': True, **_fiyat_ozeti(satis_fiyati, toplam_maliyet, yuzde_kisim, kdv_orani)})
+
+        elif bilinmeyen == 'kar_orani':
+            toplam_maliyet = urun_maliyeti + sabit_giderler
+            ozet = _fiyat_ozeti(hedef_fiyat, toplam_maliyet, yuzde_kisim, kdv_orani)
+            sonuc.update({'mumkun': ozet['kar_bedeli'] >= 0, **ozet})
+
+        elif bilinmeyen == 'urun_maliyeti':
+            izin_verilen_maliyet = _asagi_yuvarla(kalan - kargo_ucreti)
+            ozet = _fiyat_ozeti(hedef_fiyat, izin_verilen_maliyet + sabit_giderler, yuzde_kisim, kdv_orani)
+            sonuc.update({'mumkun': izin_verilen_maliyet >= 0, 'urun_maliyeti': float(izin_verilen_maliyet), **ozet})
+
+        else:
+            ozet = _fiyat_ozeti(hedef_fiyat, urun_maliyeti + sabit_giderler, yuzde_kisim, kdv_orani)
+            sonuc.update({'mumkun': True, 'desi_kg': basamak.yuvarlanmis_desi_kg, **ozet})
+
+        sonuclar.append(sonuc)
+
+    alan, buyuk_iyi = EN_UYGUN_OLCUTU[bilinmeyen]
+    mumkunler = [sonuc for sonuc in sonuclar if sonuc['mumkun']]
+    mumkunler.sort(key=lambda sonuc: -sonuc[alan] if buyuk_iyi else sonuc[alan])
+    sonuclar = mumkunler + [sonuc for sonuc in sonuclar if not sonuc['mumkun']]
+
+    return {
+        'bilinmeyen': bilinmeyen,
+        'pazar_yeri': pazar_yeri.pazar_ismi,
+        'hizmet_bedeli': float(hizmet_bedeli),
+        'komisyon_orani': float(komisyon_orani),
+        'stopaj_orani': float(stopaj_orani),
+        'kdv_orani': float(kdv_orani),
+        'hedef_fiyat': float(kurusa_yuvarla(hedef_fiyat)) if hedef_fiyat is not None else None,
+        'en_uygun': mumkunler[0] if mumkunler else None,
+        'sonuclar': sonuclar,
+    }
@@ -0,0 +1,158 @@
+"""
+Bir ürünün pazar yeri x kargo firması satış fiyatı matrisi.
+
+Tüm pazar yerleri ve kargo firmaları için gereken veriler sabit sayıda sorguyla
+yüklenir (pazar yerleri, kargo firmaları, seçilen kategorilerin komisyon oranları
+ve önbellekte olmayan tarifeler için üç sorgu). Tüm hücrelerin fiyatı
+satis_fiyatlari_hesapla ile tek seferde hesaplanır.
+
+Sonuç, girdinin hash'i ile Django cache'inde saklanır. Anahtarda pazar yeri
+satırlarının (aktif tarife ve komisyon sürümü işaretçileri dahil) özeti ve form
+sürüm numarası da bulunur; tarife, komisyon, pazar yeri veya kargo firması
+verisi değiştiğinde eski sonuçlar bir daha okunmaz.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from .fiyatlama import STOPAJ_ORANI, hizmet_bedeli_getir, kurustan_decimal, satis_fiyatlari_hesapla
+from .form_onbellek import form_surumu
+from .models import HesaplamaKomisyonOranlari, KargoFirma, Pazaryeri
+from .tarife import pazar_yeri_tarifelerini_getir
+
+FIYAT_MATRISI_ONBELLEK_SURESI = 60 * 10
+
+
+def _veri_ozeti():
+    """
+    Pazar yeri satırlarının özeti. Etkinleştirilmiş sürümler değişmediğinden aktif sürüm
+    işaretçileri tarife ve komisyon içeriğini belirler; cache'teki sürüm sayaçları silinip
+    yeniden başlasa bile farklı veriyle hesaplanmış bir sonuç aynı anahtarla okunmaz.
+    """
+    satirlar = list(Pazaryeri.objects.order_by('id').values_list())
+    return hashlib.md5(repr(satirlar).encode()).hexdigest()
+
+
+def _onbellek_anahtari(girdi):
+    icerik = json.dumps(girdi, sort_keys=True, default=str)
+    return ':'.join([
+        'hesaplama:fiyat_matrisi', _veri_ozeti(), str(form_surumu()),
+        hashlib.md5(icerik.encode()).hexdigest()
+    ])
+
+
+def fiyat_matrisi_hesapla(girdi):
+    """
+    Ürünün satış fiyatlarını her pazar yeri ve kargo firması için hesaplar.
+
+    girdi: FiyatMatrisiSerializer'ın doğrulanmış verisi. Komisyon oranı, kategori_yollari'nda
+    pazar yeri için bir komisyon kaydı verildiyse oradan, yoksa ortak komisyon_orani'ndan alınır.
+    Tarifesi veya komisyon oranı olmayan hücreler None döner.
+    """
+    pazar_yerleri = Pazaryeri.objects.filter(aktif=True).order_by('id')
+    if girdi.get('pazar_yerleri'):
+        pazar_yerleri = pazar_yerleri.filter(id__in=girdi['pazar_yerleri'])
+    pazar_yerleri = list(pazar_yerleri)
+
+    kargo_firmalari = KargoFirma.objects.filter(aktif=True).order_by('id')
+    if girdi.get('kargo_firmalari'):
+        kargo_firmalari = kargo_firmalari.filter(id__in=girdi['kargo_firmalari'])
+    kargo_firmalari = list(kargo_firmalari)
+
+    kategori_yollari = girdi.get('kategori_yollari') or {}
+    kategori_komisyonlari = {}
+    if kategori_yollari:
+        kategori_komisyonlari = {
+            pazar_yeri_id: komisyon_orani
+            for id, pazar_yeri_id, komisyon_orani in HesaplamaKomisyonOranlari.objects.aktif().filter(
+                id__in=set(kategori_yollari.values()),
+                pazar_yeri_id__in=[pazar_yeri.id for pazar_yeri in pazar_yerleri]
+            ).values_list('id', 'pazar_yeri_id', 'komisyon_orani')
+            if kategori_yollari.get(pazar_yeri_id) == id
+        }
+
+    tarifeler = pazar_yeri_tarifelerini_getir([pazar_yeri.id for pazar_yeri in pazar_yerleri])
+
+    # Hesaplanacak hücreler: (satır, sütun, kargo ücreti, hizmet bedeli, komisyon oranı)
+    satirlar = []
+    hucreler = []
+    for satir, pazar_yeri in enumerate(pazar_yerleri):
+        hizmet_bedeli = hizmet_bedeli_getir(pazar_yeri)
+        if pazar_yeri.id in kategori_yollari:
+            komisyon_orani = kategori_komisyonlari.get(pazar_yeri.id)
+        else:
+            komisyon_orani = girdi.get('komisyon_orani')
+        # Desi basamağı pazar yerinin kırılımlarına göre bulunduğu için satırdan satıra değişebilir
+        basamak = tarifeler[pazar_yeri.id].basamak_bul(girdi['urun_desi_kg'])
+        satirlar.append({
+            'pazar_yeri': {'id': pazar_yeri.id, 'pazar_ismi': pazar_yeri.pazar_ismi},
+            'yuvarlanmis_desi_kg': basamak.yuvarlanmis_desi_kg if basamak else None,
+            'hizmet_bedeli': float(hizmet_bedeli),
+            'komisyon_orani': float(komisyon_orani) if komisyon_orani is not None else None,
+            'fiyatlar': [None] * len(kargo_firmalari),
+            'en_ucuz': None,
+        })
+        if komisyon_orani is None:
+            satirlar[-1]['hata'] = f'{pazar_yeri.pazar_ismi} için seçilen kategoride komisyon oranı bulunamadı.'
+            continue
+
+        kargo_tarifeleri = tarifeler[pazar_yeri.id].kargo_tarifeleri
+        for sutun, kargo_firma in enumerate(kargo_firmalari):
+            kargo_tarifesi = kargo_tarifeleri.get(kargo_firma.id)
+            kargo_ucreti = kargo_tarifesi.basamak_ucreti(basamak) if kargo_tarifesi else None
+            if kargo_ucreti is not None:
+                hucreler.append((satir, sutun, kargo_ucreti, hizmet_bedeli, komisyon_orani))
+
+    fiyatlar = satis_fiyatlari_hesapla(
+        girdi['urun_maliyeti'],
+        [hucre[2] for hucre in hucreler],
+        girdi['paketleme_bedeli'],
+        [hucre[3] for hucre in hucreler],
+        [hucre[4] for hucre in hucreler],
+        girdi['kar_orani'],
+        girdi['kdv_orani'],
+        STOPAJ_ORANI
+    )
+
+    en_iyi = None
+    for i, (satir, sutun, kargo_ucreti, _, _) in enumerate(hucreler):
+        if not fiyatlar['gecerli'][i]:
+            satirlar[satir]['hata'] = 'Komisyon, kar ve stopaj oranlarının toplamı 100\'den küçük olmalıdır.'
+            continue
+        hucre = {
+            'kargo_ucreti': float(kargo_ucreti),
+            'hesaplanan_stopaj_bedeli': float(kurustan_decimal(fiyatlar['stopaj_bedeli'][i])),
+            'satis_fiyati': float(kurustan_decimal(fiyatlar['satis_fiyati'][i])),
+            'kdv_dahil_satis_fiyati': float(kurustan_decimal(fiyatlar['kdv_dahil_satis_fiyati'][i])),
+        }
+        satirlar[satir]['fiyatlar'][sutun] = hucre
+
+        ozet = {'kargo_firma': kargo_firmalari[sutun].firma_ismi, **hucre}
+        en_ucuz = satirlar[satir]['en_ucuz']
+        if en_ucuz is None or hucre['satis_fiyati'] < en_ucuz['satis_fiyati']:
+            satirlar[satir]['en_ucuz'] = ozet
+        if en_iyi is None or hucre['satis_fiyati'] < en_iyi['satis_fiyati']:
+            en_iyi = {'pazar_yeri': pazar_yerleri[satir].pazar_ismi, **ozet}
+
+    return {
+        'urun_desi_kg': float(girdi['urun_desi_kg']),
+        'stopaj_orani': float(STOPAJ_ORANI),
+        'kargo_firmalari': [
+            {'id': kargo_firma.id, 'firma_ismi': kargo_firma.firma_ismi} for kargo_firma in kargo_firmalari
+        ],
+        'pazar_yerleri': satirlar,
+        'en_iyi': en_iyi,
+    }
+
+
+def fiyat_matrisi_getir(girdi):
+    """
+    Fiyat matrisini girdinin hash'i ile önbellekten döndürür; yoksa hesaplayıp saklar
+    """
+    anahtar = _onbellek_anahtari(girdi)
+    matris = cache.get(anahtar)
+    if matris is None:
+        matris = fiyat_matrisi_hesapla(girdi)
+        cache.set(anahtar, matris, FIYAT_MATRISI_ONBELLEK_SURESI)
+    return matris
@@ -0,0 +1,136 @@
+"""
+Satış fiyatının desi, kâr oranı ve komisyon oranına duyarlılığı (parametre taraması).
+
+Bir veya iki değişken için verilen aralıklardan bir ızgara oluşturulur; diğer
+değişkenler sabit tutulur. Desi ekseni varsa kargo ücretleri derlenmiş tarifeden
+tek bir vektörel aramayla (basamak_bul ile aynı kural) bulunur, ardından tüm ızgaranın fiyatları
+satis_fiyatlari_hesapla ile tek seferde hesaplanır. Tarama sonuçları geçmişe
+kaydedilmez.
+
+Izgara boyutu MAKSIMUM_IZGARA_NOKTASI ile sınırlıdır. eksen_basina_en_fazla
+verilirse her eksenden uçlar dahil eşit aralıklı en fazla o kadar nokta seçilir;
+noktalar birbirinden bağımsız olduğu için yalnızca seçilen noktalar hesaplanır.
+"""
+import numpy as np
+
+from .fiyatlama import STOPAJ_ORANI, hizmet_bedeli_getir, satis_fiyatlari_hesapla
+from .tarife import kargo_tarifesi_getir
+
+TARANABILEN_DEGISKENLER = ('urun_desi_kg', 'kar_orani', 'komisyon_orani')
+MAKSIMUM_IZGARA_NOKTASI = 20000
+
+
+def eksen_nokta_sayisi(eksen):
+    """
+    {'baslangic', 'bitis', 'adim'} ekseninin [baslangic, bitis] aralığındaki nokta sayısı
+    """
+    return int((eksen['bitis'] - eksen['baslangic']) / eksen['adim']) + 1
+
+
+def izgara_nokta_sayisi(eksenler):
+    """
+    Eksenlerden oluşacak ızgaranın (seyreltilmeden önceki) nokta sayısı
+    """
+    sayi = 1
+    for eksen in eksenler:
+        sayi *= eksen_nokta_sayisi(eksen)
+    return sayi
+
+
+def eksen_degerleri(eksen):
+    """
+    Eksenin adım değerlerini Decimal listesi olarak döndürür
+    """
+    return [eksen['baslangic'] + eksen['adim'] * i for i in range(eksen_nokta_sayisi(eksen))]
+
+
+def seyrelt(degerler, en_fazla):
+    """
+    Listeden uçlar dahil eşit aralıklı en fazla en_fazla eleman seçer
+    """
+    if not en_fazla or len(degerler) <= en_fazla:
+        return degerler
+    secilenler = np.unique(np.linspace(0, len(degerler) - 1, en_fazla).round().astype(int))
+    return [degerler[index] for index in secilenler]
+
+
+def _izgara(kurus, gecerli):
+    """
+    Kuruş dizisini geçersiz noktaları None olan TL listesine çevirir
+    """
+    tl = (kurus / 100).astype(object)
+    tl[~gecerli] = None
+    return tl.tolist()
+
+
+def fiyat_taramasi_hesapla(girdi):
+    """
+    FiyatTaramaSerializer'ın doğrulanmış verisiyle fiyat ızgarasını hesaplar.
+    Sabit desi değeri için tarife bulunamazsa ValueError fırlatır.
+    """
+    pazar_yeri = girdi['pazar_yeri']
+    kargo_firma = girdi['kargo_firma']
+    kargo_tarifesi = kargo_tarifesi_getir(pazar_yeri.id, kargo_firma.id)
+    if kargo_tarifesi is None:
+        raise ValueError(f'{kargo_firma.firma_ismi} {pazar_yeri.pazar_ismi} için hizmet vermemektedir.')
+
+    eksenler = [
+        {'degisken': eksen['degisken'], 'degerler': seyrelt(eksen_degerleri(eksen), girdi.get('eksen_basina_en_fazla'))}
+        for eksen in girdi['eksenler']
+    ]
+
+    # Eksen değişkenleri ızgara boyunca yayınlanacak şekilde, diğerleri skaler olarak hazırlanır
+    degiskenler = {}
+    for sira, eksen in enumerate(eksenler):
+        sekil = [1] * len(eksenler)
+        sekil[sira] = -1
+        degiskenler[eksen['degisken']] = np.asarray(eksen['degerler'], dtype=np.float64).reshape(sekil)
+    for degisken in TARANABILEN_DEGISKENLER:
+        if degisken not in degiskenler:
+            degiskenler[degisken] = girdi[degisken]
+
+    izgara_sekli = tuple(len(eksen['degerler']) for eksen in eksenler)
+    kargo_ucretleri, tarife_bulundu = kargo_tarifesi.ucretleri_bul(degiskenler['urun_desi_kg'])
+    if not np.ndim(kargo_ucretleri) and not tarife_bulundu:
+        raise ValueError(
+            f'{pazar_yeri.pazar_ismi} - {kargo_firma.firma_ismi} için '
+            f'{girdi["urun_desi_kg"]} desi/kg değerinde tarife bulunamadı.'
+        )
+
+    hizmet_bedeli = hizmet_bedeli_getir(pazar_yeri)
+    fiyatlar = satis_fiyatlari_hesapla(
+        girdi['urun_maliyeti'],
+        kargo_ucretleri,
+        girdi['paketleme_bedeli'],
+        hizmet_bedeli,
+        degiskenler['komisyon_orani'],
+        degiskenler['kar_orani'],
+        girdi['kdv_orani'],
+        STOPAJ_ORANI
+    )
+    gecerli = np.broadcast_to(fiyatlar['gecerli'] & tarife_bulundu, izgara_sekli)
+
+    def izgara(anahtar):
+        return _izgara(np.broadcast_to(fiyatlar[anahtar], izgara_sekli), gecerli)
+
+    return {
+        'pazar_yeri': pazar_yeri.pazar_ismi,
+        'kargo_firma': kargo_firma.firma_ismi,
+        'hizmet_bedeli': float(hizmet_bedeli),
+        'stopaj_orani': float(STOPAJ_ORANI),
+        'eksenler': [
+            {'degisken': eksen['degisken'], 'degerler': [float(deger) for deger in eksen['degerler']]}
+            for eksen in eksenler
+        ],
+        'nokta_sayisi': int(gecerli.size),
+        'gecersiz_nokta_sayisi': int(gecerli.size - gecerli.sum()),
+        'kargo_ucreti': _izgara(
+            np.broadcast_to(np.rint(kargo_ucretleri * 100), izgara_sekli),
+            np.broadcast_to(tarife_bulundu, izgara_sekli)
+        ),
+        'satis_fiyati': izgara('satis_fiyati'),
+        'kdv_dahil_satis_fiyati': izgara('kdv_dahil_satis_fiyati'),
+        'komisyon_bedeli': izgara('komisyon_bedeli'),
+        'kar_bedeli': izgara('kar_bedeli'),
+    }
+
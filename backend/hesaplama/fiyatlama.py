@@ -0,0 +1,168 @@
+"""
+Pazar yeri satış fiyatı hesaplama motoru.
+
+Satış fiyatı formülü:
+    satis_fiyati = (maliyet + kargo + paketleme + hizmet_bedeli) * 100 / (100 - (komisyon + kar + stopaj))
+
+İki yol sunulur:
+- satis_fiyati_hesapla: tek ürün için Decimal ile hesaplar.
+- satis_fiyatlari_hesapla: ürün sütunlarını NumPy dizileri üzerinde tek seferde hesaplar.
+
+Her iki yol da sonuçları kuruşa ROUND_HALF_UP ile yuvarlar; KDV dahil fiyat ve
+bedeller yuvarlanmamış satış fiyatından hesaplanır. Girdiler önce iki ondalık
+basamağa (kuruş / baz puan, modellerdeki DecimalField alanları ile aynı)
+ROUND_HALF_UP ile yuvarlanır. Vektörel yol tamsayı kuruş ve baz puan (yüzdenin
+yüzde biri) aritmetiği kullandığı için Decimal yol ile birebir aynı sonucu
+üretir (bkz. tests.py).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import NamedTuple
+
+import numpy as np
+
+KURUS = Decimal('0.01')
+STOPAJ_ORANI = Decimal('1')
+
+# Pazar yerlerinin ürün başına aldığı sabit hizmet bedelleri (TL)
+HIZMET_BEDELLERI = {
+    'Trendyol': Decimal('8.49'),
+    'Hepsiburada': Decimal('9.5'),
+}
+
+
+class FiyatSonucu(NamedTuple):
+    satis_fiyati: Decimal
+    kdv_dahil_satis_fiyati: Decimal
+    komisyon_bedeli: Decimal
+    kar_bedeli: Decimal
+    stopaj_bedeli: Decimal
+
+
+def hizmet_bedeli_getir(pazar_yeri):
+    """
+    Pazar yerinin hizmet bedelini döndürür, tanımlı değilse 0
+    """
+    return HIZMET_BEDELLERI.get(pazar_yeri.pazar_ismi, Decimal('0'))
+
+
+def kurusa_yuvarla(deger):
+    """
+    Decimal değeri kuruşa (iki basamak) ROUND_HALF_UP ile yuvarlar
+    """
+    return deger.quantize(KURUS, rounding=ROUND_HALF_UP)
+
+
+def _iki_basamaga_yuvarla(deger):
+    """
+    Girdiyi (TL veya yüzde) Decimal'e çevirip iki basamağa ROUND_HALF_UP ile yuvarlar.
+    Float girdiler ondalık gösterimleri üzerinden çevrilir.
+    """
+    if isinstance(deger, float):
+        deger = Decimal(str(deger))
+    return kurusa_yuvarla(Decimal(deger))
+
+
+def satis_fiyati_hesapla(urun_maliyeti, kargo_ucreti, paketleme_bedeli, hizmet_bedeli,
+                         komisyon_orani, kar_orani, kdv_orani, stopaj_orani=STOPAJ_ORANI):
+    """
+    Tek bir ürün için satış fiyatını Decimal ile hesaplar.
+    Komisyon, kar ve stopaj oranlarının toplamı 100'den küçük değilse ValueError fırlatır.
+    """
+    urun_maliyeti, kargo_ucreti, paketleme_bedeli, hizmet_bedeli = map(
+        _iki_basamaga_yuvarla, (urun_maliyeti, kargo_ucreti, paketleme_bedeli, hizmet_bedeli)
+    )
+    komisyon_orani, kar_orani, kdv_orani, stopaj_orani = map(
+        _iki_basamaga_yuvarla, (komisyon_orani, kar_orani, kdv_orani, stopaj_orani)
+    )
+    tam_kisim = (urun_maliyeti + kargo_ucreti + paketleme_bedeli + hizmet_bedeli) * Decimal('100')
+    yuzde_kisim = Decimal('100') - (komisyon_orani + kar_orani + stopaj_orani)
+    if yuzde_kisim <= 0:
+        raise ValueError('Komisyon, kar ve stopaj oranlarının toplamı 100\'den küçük olmalıdır.')
+
+    # Ara sonuçlar yuvarlanmasın diye her tutar tek bir bölme ile hesaplanır:
+    # satis_fiyati * oran / 100 == tam_kisim * oran / (yuzde_kisim * 100)
+    yuzde_payda = yuzde_kisim * Decimal('100')
+    return FiyatSonucu(
+        satis_fiyati=kurusa_yuvarla(tam_kisim / yuzde_kisim),
+        kdv_dahil_satis_fiyati=kurusa_yuvarla(tam_kisim * (Decimal('100') + kdv_orani) / yuzde_payda),
+        komisyon_bedeli=kurusa_yuvarla(tam_kisim * komisyon_orani / yuzde_payda),
+        kar_bedeli=kurusa_yuvarla(tam_kisim * kar_orani / yuzde_payda),
+        stopaj_bedeli=kurusa_yuvarla(tam_kisim * stopaj_orani / yuzde_payda),
+    )
+
+
+def _yuzde_birime(deger):
+    return int(_iki_basamaga_yuvarla(deger).scaleb(2))
+
+
+def _yuzde_birime_cevir(degerler):
+    """
+    Değerleri (TL veya yüzde) iki basamağa ROUND_HALF_UP ile yuvarlayıp tamsayı yüzde
+    birime çevirir (kuruş / baz puan). Decimal girdiler _iki_basamaga_yuvarla ile tam
+    olarak çevrilir; float dizilerde 100 ile çarpmanın gösterim hatası yuvarlamadan
+    önce giderilir.
+    """
+    dizi = np.asarray(degerler)
+    if dizi.dtype == object:
+        return np.vectorize(_yuzde_birime, otypes=[np.int64])(dizi)
+    yuzlu = np.round(dizi.astype(np.float64) * 100, 4)
+    return (np.sign(yuzlu) * np.floor(np.abs(yuzlu) + 0.5)).astype(np.int64)
+
+
+def _bolup_yuvarla(pay, payda):
+    """
+    pay / payda işlemini tamsayılarla yapıp ROUND_HALF_UP ile yuvarlar (payda > 0)
+    """
+    mutlak = (2 * np.abs(pay) + payda) // (2 * payda)
+    return np.where(pay < 0, -mutlak, mutlak)
+
+
+def satis_fiyatlari_hesapla(urun_maliyeti, kargo_ucreti, paketleme_bedeli, hizmet_bedeli,
+                            komisyon_orani, kar_orani, kdv_orani, stopaj_orani=STOPAJ_ORANI):
+    """
+    Ürün sütunları için satış fiyatlarını vektörel olarak hesaplar.
+
+    Parametreler aynı uzunlukta diziler ya da skaler değerler olabilir (skalerler
+    yayınlanır). Sonuç tamsayı kuruş cinsinden NumPy dizileri içeren bir sözlüktür;
+    'gecerli' anahtarı oranların toplamı 100'den küçük olan satırları işaretler,
+    geçersiz satırların fiyatları 0 döner.
+    """
+    toplam_kurus = (
+        _yuzde_birime_cevir(urun_maliyeti)
+        + _yuzde_birime_cevir(kargo_ucreti)
+        + _yuzde_birime_cevir(paketleme_bedeli)
+        + _yuzde_birime_cevir(hizmet_bedeli)
+    )
+    komisyon_bp = _yuzde_birime_cevir(komisyon_orani)
+    kar_bp = _yuzde_birime_cevir(kar_orani)
+    stopaj_bp = _yuzde_birime_cevir(stopaj_orani)
+    kdv_bp = _yuzde_birime_cevir(kdv_orani)
+
+    toplam_kurus, komisyon_bp, kar_bp, stopaj_bp, kdv_bp = np.broadcast_arrays(
+        toplam_kurus, komisyon_bp, kar_bp, stopaj_bp, kdv_bp
+    )
+
+    # Yüzde kısmı baz puan cinsinden: 10000 = %100
+    payda = 10000 - (komisyon_bp + kar_bp + stopaj_bp)
+    gecerli = payda > 0
+    guvenli_payda = np.where(gecerli, payda, 1)
+
+    def hesapla(pay):
+        return np.where(gecerli, _bolup_yuvarla(pay, guvenli_payda), 0)
+
+    # satis (kuruş) = toplam_kurus * 10000 / payda
+    return {
+        'satis_fiyati': hesapla(toplam_kurus * 10000),
+        'kdv_dahil_satis_fiyati': hesapla(toplam_kurus * (10000 + kdv_bp)),
+        'komisyon_bedeli': hesapla(toplam_kurus * komisyon_bp),
+        'kar_bedeli': hesapla(toplam_kurus * kar_bp),
+        'stopaj_bedeli': hesapla(toplam_kurus * stopaj_bp),
+        'gecerli': gecerli,
+    }
+
+
+def kurustan_decimal(kurus):
+    """
+    Tamsayı kuruş değerini iki basamaklı Decimal TL değerine çevirir
+    """
+    return Decimal(int(kurus)).scaleb(-2)
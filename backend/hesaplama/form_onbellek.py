@@ -0,0 +1,54 @@
+"""
+Hesaplama formlarının GET yanıtlarındaki seçenek listeleri için sürümlü önbellek.
+
+Pazar yeri, kargo firması ve kategori seçenekleri nadiren değişir ama her sayfa
+açılışında istenir. Yanıtlar Django cache framework'ü üzerinde, anahtarına form
+sürüm numarası eklenerek saklanır; sürüm numarası artırıldığında eski kayıtlar
+bir daha okunmaz ve süreleri dolunca cache'ten düşer. Backend settings'teki
+CACHES ayarından gelir (varsayılan olarak süreç içi LocMemCache).
+
+Her kayıtla birlikte içeriğin ETag'i de saklanır; böylece değişmeyen yanıtlar
+için hash tekrar hesaplanmadan 304 döndürülebilir.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+FORM_SURUM_ANAHTARI = 'hesaplama:form_surumu'
+FORM_ONBELLEK_SURESI = 60 * 60 * 24
+
+
+def form_surumu():
+    """
+    Form sürüm numarasını döndürür; pazar yeri, kargo firması ve komisyon verilerine bağlı
+    önbellek anahtarlarında da kullanılır
+    """
+    # Sürüm anahtarı cache'ten düşerse eski kayıtlarla çakışmasın diye zamandan başlatılır
+    return cache.get_or_set(FORM_SURUM_ANAHTARI, time.time_ns, None)
+
+
+def form_verisi_getir(ad, uret, *parametreler):
+    """
+    Formun seçenek verisini ve ETag'ini (veri, etag) olarak döndürür.
+    Önbellekte yoksa uret() ile üretip saklar.
+    """
+    anahtar = ':'.join(['hesaplama:form', str(form_surumu()), ad, *map(str, parametreler)])
+    kayit = cache.get(anahtar)
+    if kayit is None:
+        veri = uret()
+        icerik = json.dumps(veri, sort_keys=True, default=str, ensure_ascii=False)
+        kayit = (veri, f'"{hashlib.md5(icerik.encode()).hexdigest()}"')
+        cache.set(anahtar, kayit, FORM_ONBELLEK_SURESI)
+    return kayit
+
+
+def form_onbellegini_gecersiz_kil():
+    """
+    Form sürümünü artırarak önbellekteki tüm form verilerini geçersiz kılar
+    """
+    try:
+        cache.incr(FORM_SURUM_ANAHTARI)
+    except ValueError:
+        cache.set(FORM_SURUM_ANAHTARI, time.time_ns(), None)
@@ -0,0 +1,203 @@
+"""
+Hesaplama geçmişi kayıtları için arkadan yazan (write-behind) kaydedici.
+
+Hesaplama view'ları geçmiş kaydını yanıt dönmeden önce veritabanına yazmak
+yerine kaydediciye bırakır. Kayıtlar süreç içi sınırlı bir kuyrukta toplanır;
+arka plandaki tek bir thread kuyruğu belirli aralıklarla boşaltıp kayıtları
+model bazında bulk_create ile yazar. Böylece yazma gecikmesi ve SQLite'ın tek
+yazar kilidi fiyat sorgularının yolundan çıkar, yazmalar da az sayıda
+transaction'da toplanır.
+
+- Kuyruk doluysa kaydet() kısa bir süre bekler (back-pressure); yine de yer
+  açılmazsa kayıt kaybolmasın diye doğrudan veritabanına yazılır.
+- Süreç kapanırken (atexit) kuyrukta kalan kayıtlar yazılır.
+- hesaplama_tarihi kaydın kuyruğa alındığı anda sabitlenir; kaydın ne zaman
+  yazıldığından bağımsız olarak hesaplamanın yapıldığı anı gösterir.
+- settings.HESAPLAMA_GECMIS_ARKA_PLANDA False ise kayıtlar eskisi gibi anında yazılır.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MAKSIMUM_TAMPON = 10000
+PARTI_BOYUTU = 500
+BOSALTMA_ARALIGI = 1.0
+KUYRUK_BEKLEME_SURESI = 0.05
+
+
+class GecmisKaydedici:
+    """
+    Geçmiş kayıtlarını kuyrukta toplayıp arka planda toplu olarak yazan kaydedici
+    """
+
+    def __init__(self, maksimum_tampon=MAKSIMUM_TAMPON, parti_boyutu=PARTI_BOYUTU,
+                 bosaltma_araligi=BOSALTMA_ARALIGI):
+        self.maksimum_tampon = maksimum_tampon
+        self.parti_boyutu = parti_boyutu
+        self.bosaltma_araligi = bosaltma_araligi
+        self._kilit = threading.Lock()
+        # Kayıtlar kuyruğa alınırken artan bir sıra numarası alır; bosalt() çağrıldığı andaki
+        # son sıra numarasına kadar olan kayıtların yazılmasını bekler, sonradan gelenleri beklemez
+        self._bekleyen_kosulu = threading.Condition()
+        self._son_sira = 0
+        self._yazilmayanlar = set()
+        self._kuyruk = None
+        self._thread = None
+        self._durdur = None
+        self._pid = None
+        atexit.register(self.kapat)
+
+    @property
+    def arka_planda(self):
+        return getattr(settings, 'HESAPLAMA_GECMIS_ARKA_PLANDA', True)
+
+    def _baslat(self):
+        """
+        Kuyruğu ve yazıcı thread'ini ilk kullanımda (fork sonrası ise yeniden) başlatır
+        """
+        with self._kilit:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            # Fork sonrası üst süreçten kalan kuyruk kullanılmaz; aynı süreçte thread
+            # durmuşsa bekleyen kayıtlar kaybolmasın diye kuyruk korunur
+            if self._pid != os.getpid():
+                self._kuyruk = queue.Queue(maxsize=self.maksimum_tampon)
+                self._yazilmayanlar = set()
+            self._pid = os.getpid()
+            self._durdur = threading.Event()
+            self._thread = threading.Thread(target=self._calis, name='gecmis-kaydedici', daemon=True)
+            self._thread.start()
+
+    def kaydet(self, nesne):
+        """
+        Kaydedilmemiş bir geçmiş model nesnesini yazılmak üzere kuyruğa bırakır
+        """
+        if nesne.hesaplama_tarihi is None:
+            nesne.hesaplama_tarihi = timezone.now()
+
+        if not self.arka_planda:
+            nesne.save()
+            return
+
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            self._baslat()
+        sira = self._sira_al()
+        try:
+            self._kuyruk.put((sira, nesne), timeout=KUYRUK_BEKLEME_SURESI)
+        except queue.Full:
+            self._yazildi([sira])
+            logger.warning('Geçmiş kuyruğu dolu, %s kaydı doğrudan yazılıyor', type(nesne).__name__)
+            nesne.save()
+
+    def _sira_al(self):
+        with self._bekleyen_kosulu:
+            self._son_sira += 1
+            self._yazilmayanlar.add(self._son_sira)
+            return self._son_sira
+
+    def _yazildi(self, siralar):
+        with self._bekleyen_kosulu:
+            self._yazilmayanlar.difference_update(siralar)
+            self._bekleyen_kosulu.notify_all()
+
+    def _yazildi_mi(self, sira):
+        """
+        Verilen sıra numarasına kadar kuyruğa alınan kayıtların hepsi yazıldıysa True döner
+        """
+        return not self._yazilmayanlar or min(self._yazilmayanlar) > sira
+
+    def _parti_al(self, ilk, bekle=False):
+        """
+        İlk (sıra, kayıt) çiftinden başlayarak en fazla parti_boyutu kadar çift toplar.
+        bekle True ise parti dolana veya boşaltma aralığı geçene kadar yeni kayıt beklenir.
+        """
+        parti = [ilk]
+        son_zaman = time.monotonic() + self.bosaltma_araligi
+        while len(parti) < self.parti_boyutu:
+            try:
+                if bekle:
+                    parti.append(self._kuyruk.get(timeout=max(son_zaman - time.monotonic(), 0)))
+                else:
+                    parti.append(self._kuyruk.get_nowait())
+            except queue.Empty:
+                break
+        return parti
+
+    def _yaz(self, parti):
+        """
+        Partiyi model bazında bulk_create ile yazar; toplu yazma başarısız olursa
+        hatalı kaydı ayırmak için kayıtları tek tek dener
+        """
+        modeller = {}
+        for _, nesne in parti:
+            modeller.setdefault(type(nesne), []).append(nesne)
+
+        for model, nesneler in modeller.items():
+            try:
+                model.objects.bulk_create(nesneler, batch_size=self.parti_boyutu)
+            except Exception:
+                logger.exception('%s geçmiş kayıtları toplu yazılamadı, tek tek deneniyor', model.__name__)
+                for nesne in nesneler:
+                    try:
+                        nesne.save()
+                    except Exception:
+                        logger.exception('%s geçmiş kaydı yazılamadı', model.__name__)
+
+        self._yazildi([sira for sira, _ in parti])
+
+    def _calis(self):
+        while not self._durdur.is_set():
+            try:
+                ilk = self._kuyruk.get(timeout=self.bosaltma_araligi)
+            except queue.Empty:
+                continue
+            parti = self._parti_al(ilk, bekle=not self._durdur.is_set())
+            close_old_connections()
+            self._yaz(parti)
+        connection.close()
+
+    def bosalt(self, zaman_asimi=5):
+        """
+        Çağrıdan önce kuyruğa alınan kayıtları çağıran thread'de hemen yazar ve yazıcı
+        thread'inin elindeki partiyi yazmasını bekler. Döndüğünde bu kayıtlar veritabanındadır
+        (zaman aşımında False döner). Çağrı sırasında kuyruğa eklenen kayıtlar beklenmez;
+        böylece yoğun trafik altında da boşaltma sınırlı sürede biter.
+
+        Kuyruk süreç içidir; diğer worker süreçlerinin kuyruklarındaki kayıtlar yazılmaz.
+        """
+        if self._kuyruk is None or self._pid != os.getpid():
+            return True
+        with self._bekleyen_kosulu:
+            sinir = self._son_sira
+        while True:
+            try:
+                ilk = self._kuyruk.get_nowait()
+            except queue.Empty:
+                break
+            self._yaz(self._parti_al(ilk))
+            if ilk[0] > sinir:
+                break
+        with self._bekleyen_kosulu:
+            return self._bekleyen_kosulu.wait_for(lambda: self._yazildi_mi(sinir), zaman_asimi)
+
+    def kapat(self, zaman_asimi=5):
+        """
+        Yazıcı thread'ini durdurur ve kuyrukta kalan kayıtları yazar
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._durdur.set()
+        self._thread.join(zaman_asimi)
+        self.bosalt()
+
+
+gecmis_kaydedici = GecmisKaydedici()
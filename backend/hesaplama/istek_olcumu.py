@@ -0,0 +1,261 @@
+"""
+İstek başına sorgu sayısı ve süre ölçümü.
+
+- IstekOlcumuMiddleware her istekte çalıştırılan SQL sorgularını ve veritabanında
+  geçen süreyi connection.execute_wrapper ile sayar (DEBUG gerektirmez). Sonuçları
+  Server-Timing başlığına yazar, 'hesaplama.istek' logger'ına tek satırlık yapılandırılmış
+  bir kayıt bırakır (varsayılan olarak yalnızca üretim log modunda yazılır) ve Prometheus
+  açıksa görünüm bazında histogramlara ekler.
+- IstekOlcumuMixin eklendiği DRF view'larında serializer_class'ı doğrulama ve
+  dönüştürme sürelerini ölçen bir alt sınıfla değiştirir; böylece serializer süresi
+  de ayrıca raporlanır.
+
+Ölçümler contextvars ile isteğin kendi bağlamında tutulur; arka plandaki geçmiş
+kaydedici gibi başka thread'lerin sorguları isteğe yazılmaz. Akış (streaming)
+yanıtlarında gövde view döndükten sonra üretildiği için ölçüm gövdenin her
+parçası üretilirken sürdürülür ve akış kapandığında kaydedilir; başlıklar gövdeden
+önce gönderildiğinden bu yanıtlara Server-Timing eklenmez.
+"""
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('hesaplama.istek')
+
+_aktif_olcum = contextvars.ContextVar('istek_olcumu', default=None)
+
+SURE_KOVALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SORGU_KOVALARI = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+
+class IstekOlcumu:
+    """
+    Tek bir isteğin sorgu sayısı ve süre ölçümleri
+    """
+
+    def __init__(self):
+        self.sorgu_sayisi = 0
+        self.db_suresi = 0.0
+        self.serializer_suresi = 0.0
+        self.toplam_sure = 0.0
+        self._serializer_derinligi = 0
+
+    def sorgu_sarmalayici(self, execute, sql, params, many, context):
+        baslangic = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_suresi += time.perf_counter() - baslangic
+            self.sorgu_sayisi += 1
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db_suresi * 1000:.1f};desc="{self.sorgu_sayisi} sorgu", '
+            f'serializer;dur={self.serializer_suresi * 1000:.1f}, '
+            f'toplam;dur={self.toplam_sure * 1000:.1f}'
+        )
+
+
+@contextmanager
+def serializer_olcumu():
+    """
+    Bloğun süresini aktif isteğin serializer süresine ekler; iç içe serializer'lar tek sayılır
+    """
+    olcum = _aktif_olcum.get()
+    if olcum is None:
+        yield
+        return
+    olcum._serializer_derinligi += 1
+    baslangic = time.perf_counter()
+    try:
+        yield
+    finally:
+        olcum._serializer_derinligi -= 1
+        if olcum._serializer_derinligi == 0:
+            olcum.serializer_suresi += time.perf_counter() - baslangic
+
+
+class OlcumluSerializerMixin:
+    """
+    Doğrulama (is_valid) ve dönüştürme (to_representation) sürelerini aktif isteğe yazar
+    """
+
+    def is_valid(self, *args, **kwargs):
+        with serializer_olcumu():
+            return super().is_valid(*args, **kwargs)
+
+    def to_representation(self, instance):
+        with serializer_olcumu():
+            return super().to_representation(instance)
+
+
+@functools.lru_cache(maxsize=None)
+def olcumlu_serializer_sinifi(serializer_sinifi):
+    """
+    Serializer sınıfının süre ölçen alt sınıfını (sınıf başına bir kez) oluşturur
+    """
+    return type(serializer_sinifi.__name__, (OlcumluSerializerMixin, serializer_sinifi), {
+        '__module__': serializer_sinifi.__module__,
+        '__qualname__': serializer_sinifi.__qualname__,
+    })
+
+
+class IstekOlcumuMixin:
+    """
+    View'ın serializer_class'ını süre ölçen alt sınıfıyla değiştiren DRF mixin'i
+    """
+
+    def initial(self, request, *args, **kwargs):
+        serializer_sinifi = getattr(self, 'serializer_class', None)
+        if serializer_sinifi is not None:
+            self.serializer_class = olcumlu_serializer_sinifi(serializer_sinifi)
+        super().initial(request, *args, **kwargs)
+
+
+class Histogram:
+    """
+    Etiket bazında kümülatif kovalı Prometheus histogramı
+    """
+
+    def __init__(self, ad, aciklama, kovalar):
+        self.ad = ad
+        self.aciklama = aciklama
+        self.kovalar = kovalar
+        self._seriler = {}
+        self._kilit = threading.Lock()
+
+    def gozlemle(self, etiketler, deger):
+        with self._kilit:
+            seri = self._seriler.setdefault(etiketler, [[0] * len(self.kovalar), 0, 0.0])
+            for index, sinir in enumerate(self.kovalar):
+                if deger <= sinir:
+                    seri[0][index] += 1
+            seri[1] += 1
+            seri[2] += deger
+
+    def metin(self):
+        satirlar = [f'# HELP {self.ad} {self.aciklama}', f'# TYPE {self.ad} histogram']
+        with self._kilit:
+            for etiketler, (kova_sayilari, sayi, toplam) in sorted(self._seriler.items()):
+                etiket_metni = ','.join(f'{anahtar}="{deger}"' for anahtar, deger in etiketler)
+                for sinir, kova_sayisi in zip(self.kovalar, kova_sayilari):
+                    satirlar.append(f'{self.ad}_bucket{{{etiket_metni},le="{sinir}"}} {kova_sayisi}')
+                satirlar.append(f'{self.ad}_bucket{{{etiket_metni},le="+Inf"}} {sayi}')
+                satirlar.append(f'{self.ad}_sum{{{etiket_metni}}} {toplam:.6f}')
+                satirlar.append(f'{self.ad}_count{{{etiket_metni}}} {sayi}')
+        return '\n'.join(satirlar)
+
+
+HISTOGRAMLAR = {
+    'toplam_sure': Histogram('pomo_istek_suresi_saniye', 'İsteğin toplam süresi', SURE_KOVALARI),
+    'db_suresi': Histogram('pomo_istek_db_suresi_saniye', 'İstekte veritabanında geçen süre', SURE_KOVALARI),
+    'serializer_suresi': Histogram(
+        'pomo_istek_serializer_suresi_saniye', 'İstekte serializer doğrulama ve dönüştürmede geçen süre', SURE_KOVALARI
+    ),
+    'sorgu_sayisi': Histogram('pomo_istek_sorgu_sayisi', 'İstekte çalıştırılan SQL sorgusu sayısı', SORGU_KOVALARI),
+}
+
+
+def prometheus_metinleri():
+    """
+    Tüm histogramları Prometheus metin biçiminde döndürür (bu sürecin verileri)
+    """
+    return '\n'.join(histogram.metin() for histogram in HISTOGRAMLAR.values()) + '\n'
+
+
+def _gorunum_adi(request):
+    eslesme = getattr(request, 'resolver_match', None)
+    if eslesme is None:
+        return 'eslesmeyen'
+    gorunum = getattr(eslesme.func, 'cls', None) or getattr(eslesme.func, 'view_class', None)
+    return gorunum.__name__ if gorunum else eslesme.view_name or 'bilinmeyen'
+
+
+@contextmanager
+def _olcerek(olcum):
+    """
+    Blok içinde çalışan sorguları ve serializer sürelerini ölçüme yazar
+    """
+    token = _aktif_olcum.set(olcum)
+    try:
+        with ExitStack() as yigin:
+            for baglanti in connections.all():
+                yigin.enter_context(baglanti.execute_wrapper(olcum.sorgu_sarmalayici))
+            yield
+    finally:
+        _aktif_olcum.reset(token)
+
+
+_AKIS_BITTI = object()
+
+
+class IstekOlcumuMiddleware:
+    """
+    Her isteğin sorgu sayısını, veritabanı, serializer ve toplam süresini ölçer
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        olcum = IstekOlcumu()
+        baslangic = time.perf_counter()
+        with _olcerek(olcum):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._olculen_akis(
+                response.streaming_content, request, response, olcum, baslangic
+            )
+            return response
+
+        olcum.toplam_sure = time.perf_counter() - baslangic
+        response['Server-Timing'] = olcum.server_timing()
+        self._kaydet(request, response, olcum)
+        return response
+
+    def _olculen_akis(self, akis, request, response, olcum, baslangic):
+        """
+        Akışın parçalarını ölçüm altında üretir; akış bittiğinde veya istemci bağlantıyı
+        kapattığında ölçümü kaydeder. Parçalar sunucunun istediği bağlamda üretilebileceği
+        için ölçüm her parça için yeniden etkinleştirilir.
+        """
+        akis = iter(akis)
+        try:
+            while True:
+                with _olcerek(olcum):
+                    parca = next(akis, _AKIS_BITTI)
+                if parca is _AKIS_BITTI:
+                    return
+                yield parca
+        finally:
+            olcum.toplam_sure = time.perf_counter() - baslangic
+            self._kaydet(request, response, olcum)
+
+    def _kaydet(self, request, response, olcum):
+        gorunum = _gorunum_adi(request)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                'gorunum=%s yontem=%s durum=%s sorgu=%d db_ms=%.1f serializer_ms=%.1f toplam_ms=%.1f',
+                gorunum, request.method, response.status_code, olcum.sorgu_sayisi,
+                olcum.db_suresi * 1000, olcum.serializer_suresi * 1000, olcum.toplam_sure * 1000,
+                extra={'olcum': {
+                    'gorunum': gorunum,
+                    'yontem': request.method,
+                    'durum': response.status_code,
+                    'sorgu_sayisi': olcum.sorgu_sayisi,
+                    'db_ms': round(olcum.db_suresi * 1000, 3),
+                    'serializer_ms': round(olcum.serializer_suresi * 1000, 3),
+                    'toplam_ms': round(olcum.toplam_sure * 1000, 3),
+                }},
+            )
+        if getattr(settings, 'ISTEK_OLCUMU_PROMETHEUS', False):
+            etiketler = (('gorunum', gorunum), ('yontem', request.method))
+            for alan, histogram in HISTOGRAMLAR.items():
+                histogram.gozlemle(etiketler, getattr(olcum, alan))
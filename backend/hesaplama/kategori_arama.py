@@ -0,0 +1,139 @@
+"""
+Komisyon kategori yolları için süreç içi (per-process) arama indeksi.
+
+Her pazar yeri için HesaplamaKomisyonOranlari tablosunun aktif sürümündeki
+kategori yolları bir kez okunur; yollar Türkçe kurallarına göre küçük harfe
+çevrilip kelimelere ayrılır ve sıralı bir kelime listesi tutulur. Önek sorguları bu liste üzerinde
+ikili arama (bisect) ile cevaplanır; kelime başı eşleşmesi yoksa yollarda alt
+dize araması yapılır.
+
+Yeni komisyon sürümü etkinleştirildiğinde veya bir komisyon oranı kaydedildiğinde
+ya da silindiğinde indeks geçersiz kılınır ve ilk aramada yeniden kurulur
+(bkz. surec_onbellegi.py).
+"""
+import bisect
+import heapq
+import re
+
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import HesaplamaKomisyonOranlari
+from .surec_onbellegi import SurecOnbellegi
+
+ARAMA_SURUM_ANAHTARI = 'hesaplama:kategori_arama_surumu'
+VARSAYILAN_SONUC_SAYISI = 20
+MAKSIMUM_SONUC_SAYISI = 100
+
+_KELIME_DESENI = re.compile(r'\w+')
+_TURKCE_BUYUK_HARFLER = str.maketrans({'I': 'ı', 'İ': 'i'})
+
+_indeksler = SurecOnbellegi(ARAMA_SURUM_ANAHTARI)
+
+
+def turkce_kucult(metin):
+    """
+    Metni Türkçe kurallarına göre küçük harfe çevirir (I -> ı, İ -> i)
+    """
+    return metin.translate(_TURKCE_BUYUK_HARFLER).lower()
+
+
+def _kelimelere_ayir(metin):
+    return _KELIME_DESENI.findall(metin)
+
+
+class KategoriAramaIndeksi:
+    """
+    Bir pazar yerinin kategori yolları üzerinde kelime öneki indeksi
+    """
+    __slots__ = ('pazar_yeri_id', 'kayitlar', 'kucuk_yollar', 'kucuk_yapraklar', 'kelimeler', 'kelime_kayitlari')
+
+    def __init__(self, pazar_yeri_id, satirlar):
+        # satirlar: (id, kategori_yolu_metni, komisyon_orani, derinlik); yol sırasına göre sıralı
+        self.pazar_yeri_id = pazar_yeri_id
+        self.kayitlar = [
+            {'id': id, 'kategori_yolu': yol, 'komisyon_orani': komisyon_orani, 'derinlik': derinlik}
+            for id, yol, komisyon_orani, derinlik in satirlar
+        ]
+        self.kucuk_yollar = [turkce_kucult(kayit['kategori_yolu']) for kayit in self.kayitlar]
+        self.kucuk_yapraklar = [yol.rsplit(' > ', 1)[-1] for yol in self.kucuk_yollar]
+
+        kelime_kayitlari = {}
+        for index, yol in enumerate(self.kucuk_yollar):
+            for kelime in _kelimelere_ayir(yol):
+                kelime_kayitlari.setdefault(kelime, set()).add(index)
+        self.kelimeler = sorted(kelime_kayitlari)
+        self.kelime_kayitlari = [frozenset(kelime_kayitlari[kelime]) for kelime in self.kelimeler]
+
+    def _onek_eslesmeleri(self, onek):
+        """
+        Verilen önekle başlayan kelimeleri içeren kayıtların indekslerini döndürür
+        """
+        baslangic = bisect.bisect_left(self.kelimeler, onek)
+        bitis = bisect.bisect_left(self.kelimeler, onek + '\uffff')
+        eslesmeler = set()
+        for index in range(baslangic, bitis):
+            eslesmeler |= self.kelime_kayitlari[index]
+        return eslesmeler
+
+    def ara(self, sorgu, limit=VARSAYILAN_SONUC_SAYISI):
+        """
+        Sorgudaki tüm kelimeleri önek olarak içeren kategori yollarını döndürür.
+        Kelime başı eşleşmesi yoksa sorgu yollarda alt dize olarak aranır.
+        Yaprak kategorisi sorguyla başlayanlar ve daha sığ yollar önce gelir.
+        """
+        kucuk_sorgu = turkce_kucult(sorgu).strip()
+        sorgu_kelimeleri = _kelimelere_ayir(kucuk_sorgu)
+        if not sorgu_kelimeleri:
+            return []
+
+        adaylar = None
+        for kelime in sorgu_kelimeleri:
+            eslesmeler = self._onek_eslesmeleri(kelime)
+            adaylar = eslesmeler if adaylar is None else adaylar & eslesmeler
+            if not adaylar:
+                break
+
+        if not adaylar:
+            adaylar = [index for index, yol in enumerate(self.kucuk_yollar) if kucuk_sorgu in yol]
+
+        def sira(index):
+            return (
+                not self.kucuk_yapraklar[index].startswith(kucuk_sorgu),
+                self.kayitlar[index]['derinlik'],
+                index
+            )
+
+        return [self.kayitlar[index] for index in heapq.nsmallest(limit, adaylar, key=sira)]
+
+
+def _indeks_kur(pazar_yeri_id):
+    # İndeks süreç içinde önbelleğe alındığı için gecikmeli bir replikadan değil, birincilden kurulur
+    satirlar = HesaplamaKomisyonOranlari.objects.using(DEFAULT_DB_ALIAS).aktif(pazar_yeri_id).order_by(
+        'kategori_yolu_metni', 'id'
+    ).values_list('id', 'kategori_yolu_metni', 'komisyon_orani', 'derinlik')
+    return KategoriAramaIndeksi(pazar_yeri_id, satirlar)
+
+
+def _indeksleri_kur(pazar_yeri_idleri):
+    return {pazar_yeri_id: _indeks_kur(pazar_yeri_id) for pazar_yeri_id in pazar_yeri_idleri}
+
+
+def kategori_arama_indeksi_getir(pazar_yeri_id):
+    """
+    Pazar yerinin arama indeksini döndürür, gerekirse veritabanından kurar
+    """
+    return _indeksler.getir([pazar_yeri_id], _indeksleri_kur)[pazar_yeri_id]
+
+
+def kategori_ara(pazar_yeri_id, sorgu, limit=VARSAYILAN_SONUC_SAYISI):
+    """
+    Pazar yerinin kategori yollarında arama yapar, en fazla limit kadar sonuç döndürür
+    """
+    return kategori_arama_indeksi_getir(pazar_yeri_id).ara(sorgu, limit)
+
+
+def arama_indekslerini_gecersiz_kil(pazar_yeri_id=None):
+    """
+    Arama indekslerini geçersiz kılar; pazar_yeri_id verilmezse hepsini temizler
+    """
+    _indeksler.gecersiz_kil(pazar_yeri_id)
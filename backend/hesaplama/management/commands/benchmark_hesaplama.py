@@ -0,0 +1,303 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from hesaplama.models import (
+    Pazaryeri, KargoFirma, DesiKgDeger, PazaryeriKargofirma, HesaplamaKomisyonOranlari, Hesaplamalar,
+    FiyatBelirleme
+)
+from hesaplama.olcum import gecici_sqlite_veritabani, yuzdelik
+
+DOKUMAN_KLASORU = Path(settings.BASE_DIR).parent / 'documents'
+KARGO_EXCEL = DOKUMAN_KLASORU / 'Kargo Ücretleri' / 'Trendyoll.xlsx'
+KOMISYON_EXCEL = DOKUMAN_KLASORU / 'Pazar Yerleri Komisyon Oranları' / '(Trendyol) Pazar Yerleri Kategori Komisyon Oran Şablonu.xlsx'
+KOMISYON_KATEGORI_SEVIYESI = 3
+
+KARGO_FIRMALARI = [
+    'HepsiJET', 'HepsiJET XL', 'Aras', 'MNG', 'Yurtiçi', 'Sürat', 'Kolay Gelsin',
+    'PTT', 'Horoz', 'Ceva', 'Borusan', 'TEX', 'Ups Kargo',
+]
+RAPOR_KULLANICI_SAYISI = 100
+KULLANICI_BASINA_HESAPLAMA = 5
+HESAPLAMA_BASINA_URUN = 3
+
+# Senaryo adı -> her senaryonun tekrar sayısına uygulanan çarpan (Excel yüklemeleri çok daha yavaştır)
+SENARYOLAR = {
+    'kargo_ucret_hesaplama': 1,
+    'komisyon_orani_bulma': 1,
+    'marketplace_fiyat_hesaplama': 1,
+    'admin_kullanici_raporu': 0.2,
+    'kargo_excel_yukleme': 0.05,
+    'komisyon_excel_yukleme': 0.05,
+}
+# Bellek ve sorgu sayısı ölçümü zaman ölçümünden ayrı, bu kadar istekte yapılır
+BELLEK_OLCUM_TEKRARI = 5
+
+
+def _git_surumu():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+
+# Proje testleri Django'nun test çalıştırıcısıyla (manage.py test) çalıştığından ölçümler
+# pytest-benchmark yerine bu komutla alınır. Zamanlamadan bağımsız olan istek başına sorgu
+# sayısı sınırları testlerde denetlenir (bkz. tests.HesaplamaSorguSayisiTestleri).
+class Command(BaseCommand):
+    help = ('Hesaplama endpoint\'lerinin gecikme (p50/p95/p99), sorgu sayısı ve bellek ölçümlerini, '
+            'documents/ altındaki Excel dosyalarıyla doldurulan geçici bir veritabanında yapar ve JSON olarak kaydeder')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tekrar', type=int, default=200, help='Hesaplama senaryolarının ölçüm tekrarı')
+        parser.add_argument('--isinma', type=int, default=5, help='Ölçüme sayılmayan ısınma isteği sayısı')
+        parser.add_argument('--senaryolar', help=f'Virgülle ayrılmış senaryolar ({", ".join(SENARYOLAR)})')
+        parser.add_argument('--kargo-excel', default=str(KARGO_EXCEL), help='Tarife için kullanılacak kargo Excel dosyası')
+        parser.add_argument('--komisyon-excel', default=str(KOMISYON_EXCEL),
+                            help='Komisyon tablosu için kullanılacak Excel dosyası')
+        parser.add_argument('--kategori-seviyesi', type=int, default=KOMISYON_KATEGORI_SEVIYESI,
+                            help='Komisyon Excel dosyasının kategori seviyesi')
+        parser.add_argument('--cikti', help='Sonuçların yazılacağı JSON dosyası')
+        parser.add_argument('--karsilastir', help='Sonuçların karşılaştırılacağı önceki JSON dosyası')
+
+    def handle(self, *args, **options):
+        senaryolar = list(SENARYOLAR)
+        if options['senaryolar']:
+            senaryolar = [ad.strip() for ad in options['senaryolar'].split(',') if ad.strip()]
+            bilinmeyenler = [ad for ad in senaryolar if ad not in SENARYOLAR]
+            if bilinmeyenler:
+                raise CommandError(f'Bilinmeyen senaryo: {", ".join(bilinmeyenler)}')
+        for anahtar in ('kargo_excel', 'komisyon_excel'):
+            if not Path(options[anahtar]).is_file():
+                raise CommandError(f'Excel dosyası bulunamadı: {options[anahtar]}')
+        onceki = None
+        if options['karsilastir']:
+            with open(options['karsilastir'], encoding='utf-8') as dosya:
+                onceki = json.load(dosya)
+
+        try:
+            veritabani = gecici_sqlite_veritabani()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        # Ölçüm yapılandırılmış paylaşımlı önbelleği (Redis vb.) etkilemesin diye süreç içi önbellek kullanılır
+        with veritabani, override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}},
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            self.stderr.write('Geçici veritabanı hazırlanıyor...')
+            call_command('migrate', verbosity=0, interactive=False)
+            self.istemci = Client()
+            self.admin_istemci = Client()
+            self.admin_istemci.force_login(get_user_model().objects.create_superuser(
+                'benchmark_admin', 'benchmark_admin@ornek.com', 'benchmark'
+            ))
+            ortam = self._veri_yukle(options)
+
+            sonuclar = {}
+            for ad in senaryolar:
+                tekrar = max(int(options['tekrar'] * SENARYOLAR[ad]), 3)
+                self.stderr.write(f'{ad} ölçülüyor ({tekrar} tekrar)...')
+                sonuclar[ad] = self._olc(getattr(self, f'_senaryo_{ad}')(ortam, options), tekrar, options['isinma'])
+
+        rapor = {
+            'olusturulma_tarihi': timezone.now().isoformat(),
+            'git_surumu': _git_surumu(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'tekrar': options['tekrar'],
+            'senaryolar': sonuclar,
+        }
+        self._yazdir(sonuclar, onceki['senaryolar'] if onceki else {})
+        if options['cikti']:
+            with open(options['cikti'], 'w', encoding='utf-8') as dosya:
+                json.dump(rapor, dosya, ensure_ascii=False, indent=2)
+            self.stderr.write(self.style.SUCCESS(f"Sonuçlar {options['cikti']} dosyasına yazıldı"))
+
+    def _excel_yukle(self, url, yol, **veri):
+        with open(yol, 'rb') as dosya:
+            return self.admin_istemci.post(url, {**veri, 'excel_dosya': dosya})
+
+    def _veri_yukle(self, options):
+        """
+        Pazar yerini, kargo firmalarını, Excel dosyalarındaki tarife ve komisyon tablolarını
+        ve admin raporu için kullanıcı hesaplamalarını geçici veritabanına yükler
+        """
+        pazar_yeri = Pazaryeri.objects.create(pazar_ismi='Trendyol')
+        KargoFirma.objects.bulk_create(KargoFirma(firma_ismi=ad) for ad in KARGO_FIRMALARI)
+
+        for url, yol, veri in (
+            ('/api/hesap/admin/kargo-ucret-ekleme/', options['kargo_excel'], {}),
+            ('/api/hesap/admin/komisyon-ekleme/', options['komisyon_excel'],
+             {'kategori_seviyesi': options['kategori_seviyesi']}),
+        ):
+            yanit = self._excel_yukle(url, yol, pazar_yeri=pazar_yeri.id, **veri)
+            if yanit.status_code not in (200, 201):
+                raise CommandError(f'{yol} yüklenemedi ({yanit.status_code}): {yanit.content[:500]!r}')
+
+        kargo_firma_id = PazaryeriKargofirma.objects.aktif(pazar_yeri.id).order_by(
+            'kargo_firma_id'
+        ).values_list('kargo_firma_id', flat=True).first()
+        desi_degerleri = list(DesiKgDeger.objects.aktif(pazar_yeri.id).filter(
+            desi_degeri__lte=30
+        ).values_list('desi_degeri', flat=True))
+        kategori_yollari = list(HesaplamaKomisyonOranlari.objects.aktif(pazar_yeri.id).values_list('id', flat=True))
+        if kargo_firma_id is None or not desi_degerleri or not kategori_yollari:
+            raise CommandError('Excel dosyalarından tarife veya komisyon verisi yüklenemedi.')
+
+        self._rapor_verisi_yukle()
+        return {
+            'pazar_yeri_id': pazar_yeri.id,
+            'kargo_firma_id': kargo_firma_id,
+            'desi_degerleri': desi_degerleri,
+            'kategori_yollari': kategori_yollari,
+        }
+
+    def _rapor_verisi_yukle(self):
+        kullanicilar = get_user_model().objects.bulk_create(
+            get_user_model()(username=f'benchmark_{sira}', email=f'benchmark_{sira}@ornek.com')
+            for sira in range(RAPOR_KULLANICI_SAYISI)
+        )
+        hesaplamalar = Hesaplamalar.objects.bulk_create(
+            Hesaplamalar(kullanici=kullanici, email=kullanici.email, toplam_fiyat=Decimal('250.00'))
+            for kullanici in kullanicilar for _ in range(KULLANICI_BASINA_HESAPLAMA)
+        )
+        tutar = Decimal('10.00')
+        FiyatBelirleme.objects.bulk_create(
+            FiyatBelirleme(
+                hesaplama=hesaplama, urun_ismi=f'Ürün {sira}', urun_maliyeti=tutar, paketleme_maliyeti=tutar,
+                trendyol_hizmet_bedeli=tutar, kargo_firmasi='Aras', kargo_ucreti=tutar, stopaj_degeri=tutar,
+                desi_kg_degeri=Decimal('2.00'), urun_kategorisi='Ayakkabı', komisyon_orani=Decimal('20.00'),
+                komisyon_tutari=tutar, kdv_orani=Decimal('20.00'), kar_orani=Decimal('25.00'),
+                kar_tutari=tutar, satis_fiyati_kdv_haric=tutar, satis_fiyati_kdv_dahil=tutar
+            )
+            for hesaplama in hesaplamalar for sira in range(HESAPLAMA_BASINA_URUN)
+        )
+
+    # Her senaryo, sıra numarasını alıp isteği gönderen bir fonksiyon döndürür
+
+    def _senaryo_kargo_ucret_hesaplama(self, ortam, options):
+        desiler = self._desi_listesi(ortam)
+        return lambda sira: self.istemci.post('/api/hesap/username-guest/kargo-ucret-hesap/', {
+            'email': 'benchmark@ornek.com', 'pazar_yeri': ortam['pazar_yeri_id'],
+            'kargo_firma': ortam['kargo_firma_id'], 'desi_kg_degeri': desiler[sira % len(desiler)]
+        }, content_type='application/json')
+
+    def _senaryo_komisyon_orani_bulma(self, ortam, options):
+        yollar = random.Random(0).sample(ortam['kategori_yollari'], min(len(ortam['kategori_yollari']), 100))
+        return lambda sira: self.istemci.post('/api/hesap/username-guest/komisyon-orani-bulma/', {
+            'email': 'benchmark@ornek.com', 'pazar_yeri': ortam['pazar_yeri_id'],
+            'kategori_yolu': yollar[sira % len(yollar)]
+        }, content_type='application/json')
+
+    def _senaryo_marketplace_fiyat_hesaplama(self, ortam, options):
+        desiler = self._desi_listesi(ortam)
+        return lambda sira: self.istemci.post('/api/hesap/username-guest/marketplace-fiyat-hesap/', {
+            'email': 'benchmark@ornek.com', 'pazar_yeri': ortam['pazar_yeri_id'],
+            'kargo_firma': ortam['kargo_firma_id'], 'urun_desi_kg': desiler[sira % len(desiler)],
+            'urun_maliyeti': 100 + sira % 50, 'paketleme_bedeli': 5, 'komisyon_orani': 20,
+            'kar_orani': 25, 'kdv_orani': 20
+        }, content_type='application/json')
+
+    def _senaryo_admin_kullanici_raporu(self, ortam, options):
+        return lambda sira: self.admin_istemci.get('/api/hesap/admin/kullanici-islemleri/')
+
+    def _senaryo_kargo_excel_yukleme(self, ortam, options):
+        return lambda sira: self._excel_yukle(
+            '/api/hesap/admin/kargo-ucret-ekleme/', options['kargo_excel'], pazar_yeri=ortam['pazar_yeri_id']
+        )
+
+    def _senaryo_komisyon_excel_yukleme(self, ortam, options):
+        return lambda sira: self._excel_yukle(
+            '/api/hesap/admin/komisyon-ekleme/', options['komisyon_excel'],
+            pazar_yeri=ortam['pazar_yeri_id'], kategori_seviyesi=options['kategori_seviyesi']
+        )
+
+    def _desi_listesi(self, ortam):
+        # Tarifedeki basamakların arasına düşen, yuvarlama gerektiren değerler
+        rastgele = random.Random(0)
+        return [
+            round(rastgele.choice(ortam['desi_degerleri']) - rastgele.random() * 0.9, 2) or 0.1
+            for _ in range(100)
+        ]
+
+    def _istek(self, gonder, sira):
+        yanit = gonder(sira)
+        if yanit.streaming:
+            b''.join(yanit.streaming_content)
+        if yanit.status_code >= 400:
+            raise CommandError(f'İstek başarısız oldu ({yanit.status_code}): {yanit.content[:500]!r}')
+        return yanit
+
+    def _olc(self, gonder, tekrar, isinma):
+        """
+        Senaryonun gecikme yüzdeliklerini, istek başına sorgu sayısını ve tepe bellek kullanımını ölçer
+        """
+        for sira in range(isinma):
+            self._istek(gonder, sira)
+
+        gecikmeler = []
+        for sira in range(tekrar):
+            baslangic = time.perf_counter()
+            self._istek(gonder, sira)
+            gecikmeler.append((time.perf_counter() - baslangic) * 1000)
+
+        sorgu_sayilari = []
+        bellek = []
+        tracemalloc.start()
+        try:
+            for sira in range(BELLEK_OLCUM_TEKRARI):
+                tracemalloc.reset_peak()
+                oncesi = tracemalloc.get_traced_memory()[0]
+                with CaptureQueriesContext(connection) as sorgular:
+                    self._istek(gonder, sira)
+                bellek.append(tracemalloc.get_traced_memory()[1] - oncesi)
+                sorgu_sayilari.append(len(sorgular))
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'tekrar': tekrar,
+            'p50_ms': round(yuzdelik(gecikmeler, 0.50), 3),
+            'p95_ms': round(yuzdelik(gecikmeler, 0.95), 3),
+            'p99_ms': round(yuzdelik(gecikmeler, 0.99), 3),
+            'ortalama_ms': round(statistics.fmean(gecikmeler), 3),
+            'sorgu_sayisi': round(statistics.median(sorgu_sayilari), 1),
+            'tepe_bellek_kb': round(statistics.median(bellek) / 1024, 1),
+        }
+
+    def _yazdir(self, sonuclar, onceki):
+        self.stdout.write(
+            f'{"senaryo":<30} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"sorgu":>6} {"bellek KB":>10}'
+            + (f' {"p95 değişim":>12}' if onceki else '')
+        )
+        for ad, sonuc in sonuclar.items():
+            satir = (
+                f'{ad:<30} {sonuc["p50_ms"]:>9.2f} {sonuc["p95_ms"]:>9.2f} {sonuc["p99_ms"]:>9.2f} '
+                f'{sonuc["sorgu_sayisi"]:>6g} {sonuc["tepe_bellek_kb"]:>10.1f}'
+            )
+            if ad in onceki and onceki[ad]['p95_ms']:
+                degisim = (sonuc['p95_ms'] - onceki[ad]['p95_ms']) / onceki[ad]['p95_ms'] * 100
+                satir += f' {degisim:>+11.1f}%'
+                if sonuc['sorgu_sayisi'] != onceki[ad]['sorgu_sayisi']:
+                    satir += f' (sorgu {onceki[ad]["sorgu_sayisi"]:g} -> {sonuc["sorgu_sayisi"]:g})'
+            self.stdout.write(satir)
@@ -0,0 +1,140 @@
+import logging
+import logging.config
+import os
+import tempfile
+import time
+from contextlib import redirect_stderr
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from core.loglama import loglama_ayari
+from hesaplama.models import DesiKgDeger, PazaryeriKargofirma
+from hesaplama.olcum import gecici_sqlite_veritabani, yuzdelik
+
+KARGO_URL = '/api/hesap/username-guest/kargo-ucret-hesap/'
+MESAJ = 'gorunum=%s yontem=%s durum=%s sorgu=%d db_ms=%.1f serializer_ms=%.1f toplam_ms=%.1f'
+OLCUM = {
+    'gorunum': 'KargoUcretHesaplamaView', 'yontem': 'POST', 'durum': 200, 'sorgu_sayisi': 4,
+    'db_ms': 1.2, 'serializer_ms': 0.4, 'toplam_ms': 6.3,
+}
+
+
+def eski_loglama(dosya):
+    """
+    Önceki ayar: django ve hesaplama DEBUG/INFO seviyesinde konsola ve eşzamanlı FileHandler'a yazar
+    """
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'verbose': {
+                'format': '{levelname} {asctime} {module} {message}',
+                'style': '{',
+            },
+        },
+        'handlers': {
+            'console': {
+                'level': 'DEBUG',
+                'class': 'logging.StreamHandler',
+                'formatter': 'verbose',
+            },
+            'file': {
+                'level': 'DEBUG',
+                'class': 'logging.FileHandler',
+                'filename': dosya,
+                'formatter': 'verbose',
+            },
+        },
+        'loggers': {
+            'django': {
+                'handlers': ['console', 'file'],
+                'level': 'INFO',
+                'propagate': True,
+            },
+            'hesaplama': {
+                'handlers': ['console', 'file'],
+                'level': 'DEBUG',
+                'propagate': True,
+            },
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = ('Önceki loglama ayarı ile geliştirme ve üretim modlarında log çağrısı başına ve '
+            'kargo hesaplama isteği başına maliyeti karşılaştırır')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cagri', type=int, default=20000, help='Log çağrısı ölçümündeki çağrı sayısı')
+        parser.add_argument('--istek', type=int, default=300, help='Her moddaki kargo hesaplama isteği sayısı')
+
+    def handle(self, *args, **options):
+        veri = self._istegi_hazirla()
+        with tempfile.TemporaryDirectory() as klasor, open(os.devnull, 'w') as bos_cikti:
+            modlar = {
+                # Yalnızca kayıt oluşturma maliyeti: her modun ödediği taban
+                'taban': {
+                    'version': 1,
+                    'disable_existing_loggers': False,
+                    'handlers': {'bos': {'class': 'logging.NullHandler'}},
+                    'loggers': {'hesaplama': {'handlers': ['bos'], 'level': 'INFO', 'propagate': False}},
+                },
+                'eski': eski_loglama(os.path.join(klasor, 'eski.log')),
+                # İstek ölçüm satırları geliştirme modunda varsayılan olarak kapalıdır; maliyeti ölçülsün diye açılır
+                'gelistirme': loglama_ayari(seviyeler='hesaplama.istek=INFO'),
+                'uretim': loglama_ayari(uretim=True, dosya=os.path.join(klasor, 'uretim.log')),
+            }
+            self.stdout.write(f'{"mod":<11} {"çağrı µs":>9} {"p50 ms":>8} {"p95 ms":>8} {"ort. ms":>8}')
+            try:
+                with gecici_sqlite_veritabani(kopyala=True), override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                ):
+                    for mod, ayar in modlar.items():
+                        # Konsol handler'ları oluşturuldukları andaki stderr'i kullanır; çıktı /dev/null'a gider
+                        with redirect_stderr(bos_cikti):
+                            logging.config.dictConfig(ayar)
+                            cagri_suresi = self._log_cagrisini_olc(options['cagri'])
+                            gecikmeler = self._istekleri_olc(veri, options['istek'])
+                        self.stdout.write(
+                            f'{mod:<11} {cagri_suresi * 1e6:>9.2f} {yuzdelik(gecikmeler, 0.5) * 1000:>8.2f} '
+                            f'{yuzdelik(gecikmeler, 0.95) * 1000:>8.2f} '
+                            f'{sum(gecikmeler) / len(gecikmeler) * 1000:>8.2f}'
+                        )
+            finally:
+                logging.config.dictConfig(settings.LOGGING)
+
+    def _istegi_hazirla(self):
+        tarife = PazaryeriKargofirma.objects.aktif().filter(
+            pazar_yeri__aktif=True, kargo_firma__aktif=True
+        ).order_by('pazar_yeri_id', 'kargo_firma_id').first()
+        if tarife is None:
+            raise CommandError('Aktif kargo tarifesi olan pazar yeri/kargo firması bulunamadı.')
+        desi = DesiKgDeger.objects.aktif(tarife.pazar_yeri_id).order_by('desi_degeri').values_list(
+            'desi_degeri', flat=True
+        ).first() or 1
+        return {'email': 'benchmark@ornek.com', 'pazar_yeri': tarife.pazar_yeri_id,
+                'kargo_firma': tarife.kargo_firma_id, 'desi_kg_degeri': desi}
+
+    def _log_cagrisini_olc(self, sayi):
+        """
+        İstek ölçümü kaydıyla aynı biçimdeki bir log çağrısının çağıran thread'deki ortalama süresi
+        """
+        logger = logging.getLogger('hesaplama.istek')
+        baslangic = time.perf_counter()
+        for _ in range(sayi):
+            logger.info(MESAJ, 'KargoUcretHesaplamaView', 'POST', 200, 4, 1.2, 0.4, 6.3, extra={'olcum': OLCUM})
+        return (time.perf_counter() - baslangic) / sayi
+
+    def _istekleri_olc(self, veri, sayi):
+        istemci = Client(raise_request_exception=False)
+        for _ in range(20):
+            istemci.post(KARGO_URL, veri, content_type='application/json')
+        gecikmeler = []
+        for _ in range(sayi):
+            baslangic = time.perf_counter()
+            yanit = istemci.post(KARGO_URL, veri, content_type='application/json')
+            gecikmeler.append(time.perf_counter() - baslangic)
+            if yanit.status_code != 200:
+                raise CommandError(f'Kargo hesaplama isteği başarısız oldu: {yanit.status_code}')
+        return gecikmeler
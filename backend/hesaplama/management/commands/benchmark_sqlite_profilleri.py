@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client, override_settings
+from hesaplama.models import DesiKgDeger, PazaryeriKargofirma
+from hesaplama.olcum import gecici_sqlite_veritabani, yuzdelik
+from hesaplama.sqlite_profili import SQLITE_PROFILLERI
+
+KARGO_URL = '/api/hesap/username-guest/kargo-ucret-hesap/'
+FIYAT_URL = '/api/hesap/username-guest/marketplace-fiyat-hesap/'
+ISTEK_SAYISI = 64
+
+
+class Command(BaseCommand):
+    help = ('SQLite profillerinde kargo ve pazar yeri fiyat endpoint\'lerinin eşzamanlı '
+            'istek altında saniyede kaç teklif verebildiğini ölçer')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiller', default='klasik,performans',
+                            help=f'Virgülle ayrılmış profiller ({", ".join(SQLITE_PROFILLERI)})')
+        parser.add_argument('--es-zamanli', default='1,4,8,16',
+                            help='Virgülle ayrılmış eşzamanlı istemci sayıları')
+        parser.add_argument('--sure', type=float, default=5, help='Her ölçümün süresi (saniye)')
+        parser.add_argument('--pazar-yeri', type=int, help='Pazar yeri ID\'si (varsayılan: tarifesi olan ilk pazar yeri)')
+        parser.add_argument('--kargo-firma', type=int, help='Kargo firması ID\'si')
+        parser.add_argument('--arka-plan', action='store_true',
+                            help='Geçmiş kayıtlarını istek içinde değil arka plandaki kaydedici ile yaz')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Bu ölçüm yalnızca SQLite veritabanında çalışır.')
+
+        profiller = [profil.strip() for profil in options['profiller'].split(',') if profil.strip()]
+        bilinmeyenler = [profil for profil in profiller if profil not in SQLITE_PROFILLERI]
+        if bilinmeyenler:
+            raise CommandError(f'Bilinmeyen profil: {", ".join(bilinmeyenler)}')
+        try:
+            es_zamanli_sayilari = [int(sayi) for sayi in options['es_zamanli'].split(',')]
+        except ValueError:
+            raise CommandError('--es-zamanli virgülle ayrılmış tam sayılardan oluşmalı.')
+
+        istekler = self._istekleri_hazirla(options['pazar_yeri'], options['kargo_firma'])
+
+        # Yazılan geçmiş kayıtları asıl veritabanına karışmasın diye her profil veritabanının
+        # bir kopyası üzerinde ölçülür; varsa init_command profilin PRAGMA'larını ezmesin diye kaldırılır
+        secenekler = {
+            anahtar: deger for anahtar, deger in connections.settings[DEFAULT_DB_ALIAS].get('OPTIONS', {}).items()
+            if anahtar != 'init_command'
+        }
+
+        self.stdout.write(f'{"profil":<11} {"eşzamanlı":>9} {"teklif/sn":>10} {"p50 ms":>8} {"p95 ms":>8} {"hata":>6}')
+        for profil in profiller:
+            with gecici_sqlite_veritabani(kopyala=True, secenekler=secenekler), override_settings(
+                SQLITE_PROFILI=profil,
+                HESAPLAMA_GECMIS_ARKA_PLANDA=options['arka_plan'],
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            ):
+                # Isınma: profil uygulanır, tarife ve form önbellekleri doldurulur
+                self._istemciyi_calistir(istekler[:2], time.monotonic() + 0.5, 0, [], threading.Lock())
+                for es_zamanli in es_zamanli_sayilari:
+                    self._olc(profil, es_zamanli, istekler, options['sure'])
+
+    def _istekleri_hazirla(self, pazar_yeri_id, kargo_firma_id):
+        """
+        Aktif tarifede bulunan desi değerleriyle kargo ve fiyat hesaplama isteklerini hazırlar
+        """
+        tarifeler = PazaryeriKargofirma.objects.aktif().filter(pazar_yeri__aktif=True, kargo_firma__aktif=True)
+        if pazar_yeri_id:
+            tarifeler = tarifeler.filter(pazar_yeri_id=pazar_yeri_id)
+        if kargo_firma_id:
+            tarifeler = tarifeler.filter(kargo_firma_id=kargo_firma_id)
+        tarife = tarifeler.order_by('pazar_yeri_id', 'kargo_firma_id').first()
+        if tarife is None:
+            raise CommandError('Aktif kargo tarifesi olan pazar yeri/kargo firması bulunamadı.')
+
+        desi_degerleri = list(DesiKgDeger.objects.aktif(tarife.pazar_yeri_id).filter(
+            desi_degeri__lte=30
+        ).values_list('desi_degeri', flat=True)) or [1]
+        rastgele = random.Random(0)
+        istekler = []
+        for sira in range(ISTEK_SAYISI):
+            desi = round(rastgele.choice(desi_degerleri) - rastgele.random() * 0.9, 2) or 0.1
+            ortak = {'email': 'benchmark@ornek.com', 'pazar_yeri': tarife.pazar_yeri_id,
+                     'kargo_firma': tarife.kargo_firma_id}
+            if sira % 2 == 0:
+                istekler.append((KARGO_URL, {**ortak, 'desi_kg_degeri': desi}))
+            else:
+                istekler.append((FIYAT_URL, {
+                    **ortak, 'urun_maliyeti': 100, 'paketleme_bedeli': 5, 'urun_desi_kg': desi,
+                    'komisyon_orani': 20, 'kar_orani': 25, 'kdv_orani': 20
+                }))
+        return istekler
+
+    def _istemciyi_calistir(self, istekler, bitis, baslangic_sirasi, gecikmeler, kilit):
+        """
+        Süre dolana kadar istekleri sırayla gönderir; gecikmeleri listeye ekler, hata sayısını döndürür
+        """
+        istemci = Client(raise_request_exception=False)
+        yerel_gecikmeler = []
+        hatalar = 0
+        sira = baslangic_sirasi
+        try:
+            while time.monotonic() < bitis:
+                url, veri = istekler[sira % len(istekler)]
+                sira += 1
+                baslangic = time.perf_counter()
+                yanit = istemci.post(url, veri, content_type='application/json')
+                if yanit.status_code == 200:
+                    yerel_gecikmeler.append(time.perf_counter() - baslangic)
+                else:
+                    hatalar += 1
+        finally:
+            connections.close_all()
+        with kilit:
+            gecikmeler.extend(yerel_gecikmeler)
+        return hatalar
+
+    def _olc(self, profil, es_zamanli, istekler, sure):
+        gecikmeler = []
+        hatalar = []
+        kilit = threading.Lock()
+        bitis = time.monotonic() + sure
+
+        def calis(sira):
+            hata = self._istemciyi_calistir(istekler, bitis, sira * 7, gecikmeler, kilit)
+            with kilit:
+                hatalar.append(hata)
+
+        thread_listesi = [threading.Thread(target=calis, args=(sira,)) for sira in range(es_zamanli)]
+        baslangic = time.monotonic()
+        for thread in thread_listesi:
+            thread.start()
+        for thread in thread_listesi:
+            thread.join()
+        gecen = time.monotonic() - baslangic
+
+        self.stdout.write(
+            f'{profil:<11} {es_zamanli:>9} {len(gecikmeler) / gecen:>10.1f} '
+            f'{yuzdelik(gecikmeler, 0.5) * 1000:>8.1f} {yuzdelik(gecikmeler, 0.95) * 1000:>8.1f} {sum(hatalar):>6}'
+        )
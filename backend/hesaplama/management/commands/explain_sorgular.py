@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from hesaplama.models import Pazaryeri
+from hesaplama.sorgu_planlari import sicak_sorgular, tam_taramalar
+
+
+class Command(BaseCommand):
+    help = 'Sık çalışan sorguların planlarını gösterir; --kontrol ile tam tablo taraması varsa hata verir'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pazar-yeri', type=int, help='Sorgularda kullanılacak pazar yeri ID\'si (varsayılan: ilk pazar yeri)')
+        parser.add_argument('--kontrol', action='store_true',
+                            help='Tam tablo taraması yapan sorgu varsa sıfırdan farklı kodla çık')
+
+    def handle(self, *args, **options):
+        pazar_yeri_id = options['pazar_yeri'] or Pazaryeri.objects.order_by('id').values_list('id', flat=True).first()
+        if pazar_yeri_id is None:
+            raise CommandError('Veritabanında pazar yeri bulunmuyor.')
+
+        self.stdout.write(f'Veritabanı: {connection.vendor}, pazar yeri: {pazar_yeri_id}\n')
+        taramalar = []
+        for ad, sorgu in sicak_sorgular(pazar_yeri_id):
+            plan = sorgu.explain()
+            tablolar = tam_taramalar(plan)
+            if tablolar:
+                taramalar.append((ad, tablolar))
+                self.stdout.write(self.style.WARNING(f'[TAM TARAMA] {ad}: {", ".join(tablolar)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'[İNDEKS] {ad}'))
+            if options['verbosity'] > 1:
+                self.stdout.write(plan + '\n')
+
+        if taramalar and options['kontrol']:
+            raise CommandError(f'{len(taramalar)} sorgu tam tablo taraması yapıyor.')
@@ -0,0 +1,50 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from hesaplama.disa_aktarim import GECMIS_TABLOLARI, PARCA_BOYUTU, csv_satirlari, xlsx_yaz
+
+
+class Command(BaseCommand):
+    help = 'Hesaplama geçmişi tablolarını parça parça okuyarak CSV veya XLSX olarak dışa aktarır'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tablo', choices=list(GECMIS_TABLOLARI), help='Dışa aktarılacak geçmiş tablosu')
+        parser.add_argument('--baslangic', type=date.fromisoformat, help='Başlangıç tarihi (YYYY-AA-GG, dahil)')
+        parser.add_argument('--bitis', type=date.fromisoformat, help='Bitiş tarihi (YYYY-AA-GG, dahil)')
+        parser.add_argument('--pazar-yeri', type=int, help='Pazar yeri ID\'si')
+        parser.add_argument('--kullanici', help='Kullanıcı adı')
+        parser.add_argument('--bicim', choices=['csv', 'xlsx'], default='csv', help='Dosya biçimi')
+        parser.add_argument('--cikti', help='Dosyanın yolu (verilmezse standart çıktıya yazılır)')
+        parser.add_argument('--parca-boyutu', type=int, default=PARCA_BOYUTU,
+                            help='Veritabanından tek seferde okunacak satır sayısı')
+
+    def handle(self, *args, **options):
+        filtreler = {
+            'parca_boyutu': options['parca_boyutu'],
+            'baslangic': options['baslangic'],
+            'bitis': options['bitis'],
+            'pazar_yeri': options['pazar_yeri'],
+            'kullanici': options['kullanici'],
+        }
+
+        if options['bicim'] == 'xlsx':
+            try:
+                xlsx_yaz(options['tablo'], options['cikti'] or sys.stdout.buffer, **filtreler)
+            except ValueError as e:
+                raise CommandError(str(e))
+            if options['cikti']:
+                self.stderr.write(self.style.SUCCESS(f"Geçmiş {options['cikti']} dosyasına aktarıldı"))
+            return
+
+        try:
+            satirlar = csv_satirlari(options['tablo'], **filtreler)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['cikti']:
+            with open(options['cikti'], 'w', encoding='utf-8', newline='') as dosya:
+                dosya.writelines(satirlar)
+            self.stderr.write(self.style.SUCCESS(f"Geçmiş {options['cikti']} dosyasına aktarıldı"))
+        else:
+            sys.stdout.writelines(satirlar)
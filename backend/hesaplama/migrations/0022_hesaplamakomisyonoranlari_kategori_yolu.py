@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def kategori_yollarini_doldur(apps, schema_editor):
+    """
+    Mevcut komisyon oranları için kategori yolu alanlarını doldurur
+    """
+    HesaplamaKomisyonOranlari = apps.get_model('hesaplama', 'HesaplamaKomisyonOranlari')
+    komisyonlar = HesaplamaKomisyonOranlari.objects.select_related(
+        'kategori_1', 'kategori_2', 'kategori_3', 'kategori_4'
+    )
+    guncellenecekler = []
+    for komisyon in komisyonlar.iterator(chunk_size=2000):
+        kategoriler = [
+            kategori for kategori in (komisyon.kategori_1, komisyon.kategori_2, komisyon.kategori_3, komisyon.kategori_4)
+            if kategori
+        ]
+        komisyon.kategori_yolu_metni = ' > '.join(kategori.adi for kategori in kategoriler)
+        komisyon.derinlik = len(kategoriler)
+        komisyon.yaprak_kategori = kategoriler[-1]
+        guncellenecekler.append(komisyon)
+
+    HesaplamaKomisyonOranlari.objects.bulk_update(
+        guncellenecekler, ['kategori_yolu_metni', 'derinlik', 'yaprak_kategori'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hesaplama', '0021_alter_fiyathesaplamagecmisi_kullanici_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hesaplamakomisyonoranlari',
+            name='derinlik',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Kategori yolunun seviye sayısı (1-4 arası)'),
+        ),
+        migrations.AddField(
+            model_name='hesaplamakomisyonoranlari',
+            name='kategori_yolu_metni',
+            field=models.CharField(blank=True, default='', help_text='Tam kategori yolu (Örn: Elektronik > Telefon > Akıllı Telefon)', max_length=1100),
+        ),
+        migrations.AddField(
+            model_name='hesaplamakomisyonoranlari',
+            name='yaprak_kategori',
+            field=models.ForeignKey(blank=True, help_text='Kategori yolunun son (en derin) kategorisi', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='yaprak_komisyon_oranlari', to='hesaplama.hesaplamakategoriler'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamakomisyonoranlari',
+            index=models.Index(fields=['pazar_yeri', 'kategori_yolu_metni'], name='komisyon_kategori_yolu_idx'),
+        ),
+        migrations.RunPython(kategori_yollarini_doldur, migrations.RunPython.noop),
+    ]
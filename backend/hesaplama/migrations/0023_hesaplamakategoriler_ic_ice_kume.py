@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:41
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def ic_ice_kume_numaralarini_doldur(apps, schema_editor):
+    """
+    Mevcut kategoriler için iç içe küme numaralarını ve alt kategori sayılarını doldurur
+    """
+    HesaplamaKategoriler = apps.get_model('hesaplama', 'HesaplamaKategoriler')
+    alt_kategoriler = defaultdict(list)
+    for id, ust_kategori_id in HesaplamaKategoriler.objects.order_by('adi', 'id').values_list('id', 'ust_kategori_id'):
+        alt_kategoriler[ust_kategori_id].append(id)
+
+    # Ağacı ön sıralı (preorder) gez; düğüme girerken sol, çıkarken sag numarası verilir
+    numaralar = {}
+    sayac = 1
+    yigin = [(id, False) for id in reversed(alt_kategoriler[None])]
+    while yigin:
+        id, kapat = yigin.pop()
+        if kapat:
+            numaralar[id][1] = sayac
+        else:
+            numaralar[id] = [sayac, None]
+            yigin.append((id, True))
+            yigin.extend((alt_id, False) for alt_id in reversed(alt_kategoriler[id]))
+        sayac += 1
+
+    HesaplamaKategoriler.objects.bulk_update(
+        [
+            HesaplamaKategoriler(id=id, sol=sol, sag=sag, alt_kategori_sayisi=len(alt_kategoriler[id]))
+            for id, (sol, sag) in numaralar.items()
+        ],
+        ['sol', 'sag', 'alt_kategori_sayisi'],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hesaplama', '0022_hesaplamakomisyonoranlari_kategori_yolu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hesaplamakategoriler',
+            name='alt_kategori_sayisi',
+            field=models.PositiveIntegerField(default=0, help_text='Doğrudan alt kategori sayısı'),
+        ),
+        migrations.AddField(
+            model_name='hesaplamakategoriler',
+            name='sag',
+            field=models.PositiveIntegerField(default=0, help_text='İç içe küme sağ numarası'),
+        ),
+        migrations.AddField(
+            model_name='hesaplamakategoriler',
+            name='sol',
+            field=models.PositiveIntegerField(default=0, help_text='İç içe küme sol numarası'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamakategoriler',
+            index=models.Index(fields=['pazar_yeri', 'ust_kategori', 'adi'], name='kategori_alt_kategori_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamakategoriler',
+            index=models.Index(fields=['pazar_yeri', 'sol'], name='kategori_ic_ice_kume_idx'),
+        ),
+        migrations.RunPython(ic_ice_kume_numaralarini_doldur, migrations.RunPython.noop),
+    ]
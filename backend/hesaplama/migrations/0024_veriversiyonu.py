@@ -0,0 +1,126 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mevcut_verileri_surumle(apps, schema_editor):
+    """
+    Mevcut tarife ve komisyon kayıtlarını pazar yeri başına birer sürüme bağlar
+    ve bu sürümleri etkinleştirir
+    """
+    Pazaryeri = apps.get_model('hesaplama', 'Pazaryeri')
+    VeriVersiyonu = apps.get_model('hesaplama', 'VeriVersiyonu')
+    tablolar = {
+        'kargo': ['DesiKgDeger', 'DesiKgKargoUcret', 'PazaryeriKargofirma'],
+        'komisyon': ['HesaplamaKategoriler', 'HesaplamaKomisyonOranlari'],
+    }
+    simdi = timezone.now()
+    for tur, model_adlari in tablolar.items():
+        modeller = [apps.get_model('hesaplama', model_adi) for model_adi in model_adlari]
+        pazar_yeri_idleri = set()
+        for model in modeller:
+            pazar_yeri_idleri.update(model.objects.values_list('pazar_yeri_id', flat=True).distinct())
+
+        for pazar_yeri in Pazaryeri.objects.filter(id__in=pazar_yeri_idleri):
+            versiyon = VeriVersiyonu.objects.create(
+                pazar_yeri=pazar_yeri,
+                tur=tur,
+                aciklama='Sürümleme öncesi veriler',
+                gecerlilik_tarihi=simdi
+            )
+            for model in modeller:
+                model.objects.filter(pazar_yeri=pazar_yeri).update(versiyon=versiyon)
+            Pazaryeri.objects.filter(id=pazar_yeri.id).update(**{f'aktif_{tur}_versiyonu': versiyon})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hesaplama', '0023_hesaplamakategoriler_ic_ice_kume'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VeriVersiyonu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tur', models.CharField(choices=[('kargo', 'Kargo Tarifesi'), ('komisyon', 'Komisyon Tablosu')], max_length=20)),
+                ('aciklama', models.CharField(blank=True, help_text='Örn: yüklenen dosyanın adı', max_length=255)),
+                ('olusturma_tarihi', models.DateTimeField(auto_now_add=True)),
+                ('gecerlilik_tarihi', models.DateTimeField(blank=True, help_text='Sürümün en son etkinleştirildiği an', null=True)),
+                ('gecerlilik_bitis_tarihi', models.DateTimeField(blank=True, help_text='Sürümün yerini başka bir sürüme bıraktığı an', null=True)),
+            ],
+            options={
+                'verbose_name': 'Veri Sürümü',
+                'verbose_name_plural': 'Veri Sürümleri',
+                'ordering': ['-olusturma_tarihi'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='hesaplamakategoriler',
+            name='kategori_alt_kategori_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='hesaplamakategoriler',
+            name='kategori_ic_ice_kume_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='hesaplamakomisyonoranlari',
+            name='komisyon_kategori_yolu_idx',
+        ),
+        migrations.AddField(
+            model_name='veriversiyonu',
+            name='pazar_yeri',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='veri_versiyonlari', to='hesaplama.pazaryeri'),
+        ),
+        migrations.AddField(
+            model_name='desikgdeger',
+            name='versiyon',
+            field=models.ForeignKey(blank=True, help_text='Kaydın ait olduğu sürüm', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_kayitlari', to='hesaplama.veriversiyonu'),
+        ),
+        migrations.AddField(
+            model_name='desikgkargoucret',
+            name='versiyon',
+            field=models.ForeignKey(blank=True, help_text='Kaydın ait olduğu sürüm', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_kayitlari', to='hesaplama.veriversiyonu'),
+        ),
+        migrations.AddField(
+            model_name='hesaplamakategoriler',
+            name='versiyon',
+            field=models.ForeignKey(blank=True, help_text='Kaydın ait olduğu sürüm', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_kayitlari', to='hesaplama.veriversiyonu'),
+        ),
+        migrations.AddField(
+            model_name='hesaplamakomisyonoranlari',
+            name='versiyon',
+            field=models.ForeignKey(blank=True, help_text='Kaydın ait olduğu sürüm', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_kayitlari', to='hesaplama.veriversiyonu'),
+        ),
+        migrations.AddField(
+            model_name='pazaryeri',
+            name='aktif_kargo_versiyonu',
+            field=models.ForeignKey(blank=True, help_text='Kullanımdaki kargo tarifesi sürümü', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hesaplama.veriversiyonu'),
+        ),
+        migrations.AddField(
+            model_name='pazaryeri',
+            name='aktif_komisyon_versiyonu',
+            field=models.ForeignKey(blank=True, help_text='Kullanımdaki komisyon tablosu sürümü', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hesaplama.veriversiyonu'),
+        ),
+        migrations.AddField(
+            model_name='pazaryerikargofirma',
+            name='versiyon',
+            field=models.ForeignKey(blank=True, help_text='Kaydın ait olduğu sürüm', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_kayitlari', to='hesaplama.veriversiyonu'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamakategoriler',
+            index=models.Index(fields=['versiyon', 'ust_kategori', 'adi'], name='kategori_alt_kategori_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamakategoriler',
+            index=models.Index(fields=['versiyon', 'sol'], name='kategori_ic_ice_kume_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamakomisyonoranlari',
+            index=models.Index(fields=['versiyon', 'kategori_yolu_metni'], name='komisyon_kategori_yolu_idx'),
+        ),
+        migrations.RunPython(mevcut_verileri_surumle, migrations.RunPython.noop),
+    ]
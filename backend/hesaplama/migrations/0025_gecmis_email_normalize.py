@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:55
+
+import django.db.models.deletion
+import hesaplama.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def email_normalize_doldur(apps, schema_editor):
+    """
+    Mevcut geçmiş kayıtlarının normalize email alanını tek UPDATE ile doldurur
+    """
+    for model_adi in ['FiyatHesaplamaGecmisi', 'KargoUcretGecmis', 'KomisyonOraniGecmisi']:
+        apps.get_model('hesaplama', model_adi).objects.update(email_normalize=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hesaplama', '0024_veriversiyonu'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GecmisBaglantisi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email_normalize', models.CharField(help_text='Bağlamanın yapıldığı normalize email adresi', max_length=254)),
+                ('baglama_tarihi', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Geçmiş Bağlantısı',
+                'verbose_name_plural': 'Geçmiş Bağlantıları',
+            },
+        ),
+        migrations.AddField(
+            model_name='fiyathesaplamagecmisi',
+            name='email_normalize',
+            field=hesaplama.models.NormalizeEmailField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='kargoucretgecmis',
+            name='email_normalize',
+            field=hesaplama.models.NormalizeEmailField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='komisyonoranigecmisi',
+            name='email_normalize',
+            field=hesaplama.models.NormalizeEmailField(default='', editable=False, max_length=254),
+        ),
+        migrations.RunPython(email_normalize_doldur, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='fiyathesaplamagecmisi',
+            index=models.Index(condition=models.Q(('kullanici__isnull', True)), fields=['email_normalize'], name='fiyat_gecmis_bagsiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kargoucretgecmis',
+            index=models.Index(condition=models.Q(('kullanici__isnull', True)), fields=['email_normalize'], name='kargo_gecmis_bagsiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='komisyonoranigecmisi',
+            index=models.Index(condition=models.Q(('kullanici__isnull', True)), fields=['email_normalize'], name='komisyon_gecmis_bagsiz_idx'),
+        ),
+        migrations.AddField(
+            model_name='gecmisbaglantisi',
+            name='kullanici',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='gecmis_baglantisi', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def _tekrar_gruplari(kayitlar, alanlar):
+    """
+    Aynı sürümde alanları aynı olan kayıt gruplarını (korunacak id, silinecek id'ler) olarak döndürür.
+    En eski (en küçük id'li) kayıt korunur.
+    """
+    kayitlar = kayitlar.filter(versiyon__isnull=False)
+    gruplar = kayitlar.values(*alanlar).annotate(
+        adet=Count('id'), ilk=Min('id')
+    ).filter(adet__gt=1)
+    for grup in gruplar:
+        filtre = {alan: grup[alan] for alan in alanlar}
+        digerleri = list(kayitlar.filter(**filtre).exclude(id=grup['ilk']).values_list('id', flat=True))
+        yield grup['ilk'], digerleri
+
+
+def tekrarlari_temizle(apps, schema_editor):
+    """
+    Tekil kısıtlar eklenmeden önce tarife ve kategori tablolarındaki tekrar eden
+    kayıtları birleştirir. Tekrar eden kayıtlara bağlı satırlar korunan kayda taşınır.
+    """
+    DesiKgDeger = apps.get_model('hesaplama', 'DesiKgDeger')
+    DesiKgKargoUcret = apps.get_model('hesaplama', 'DesiKgKargoUcret')
+    PazaryeriKargofirma = apps.get_model('hesaplama', 'PazaryeriKargofirma')
+    HesaplamaKategoriler = apps.get_model('hesaplama', 'HesaplamaKategoriler')
+    HesaplamaKomisyonOranlari = apps.get_model('hesaplama', 'HesaplamaKomisyonOranlari')
+    KomisyonOraniGecmisi = apps.get_model('hesaplama', 'KomisyonOraniGecmisi')
+
+    for korunan, digerleri in _tekrar_gruplari(DesiKgDeger.objects.all(), ['versiyon', 'desi_degeri']):
+        DesiKgKargoUcret.objects.filter(desi_kg_deger_id__in=digerleri).update(desi_kg_deger_id=korunan)
+        DesiKgDeger.objects.filter(id__in=digerleri).delete()
+
+    for _, digerleri in _tekrar_gruplari(DesiKgKargoUcret.objects.all(), ['versiyon', 'kargo_firma', 'desi_kg_deger']):
+        DesiKgKargoUcret.objects.filter(id__in=digerleri).delete()
+
+    for _, digerleri in _tekrar_gruplari(PazaryeriKargofirma.objects.all(), ['versiyon', 'kargo_firma']):
+        PazaryeriKargofirma.objects.filter(id__in=digerleri).delete()
+
+    # Üst kategoriler birleştikçe alt seviyelerde yeni tekrarlar oluşabilir; bu yüzden
+    # kategoriler kökten yaprağa doğru seviye seviye birleştirilir
+    seviyeler = sorted(set(HesaplamaKategoriler.objects.values_list('seviye', flat=True)))
+    for seviye in seviyeler:
+        gruplar = _tekrar_gruplari(HesaplamaKategoriler.objects.filter(seviye=seviye), ['versiyon', 'ust_kategori', 'adi'])
+        for korunan, digerleri in list(gruplar):
+            HesaplamaKategoriler.objects.filter(ust_kategori_id__in=digerleri).update(ust_kategori_id=korunan)
+            for alan in ['kategori_1', 'kategori_2', 'kategori_3', 'kategori_4', 'yaprak_kategori']:
+                HesaplamaKomisyonOranlari.objects.filter(**{f'{alan}_id__in': digerleri}).update(**{f'{alan}_id': korunan})
+            KomisyonOraniGecmisi.objects.filter(kategori_yolu_id__in=digerleri).update(kategori_yolu_id=korunan)
+            HesaplamaKategoriler.objects.filter(id__in=digerleri).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hesaplama', '0025_gecmis_email_normalize'),
+    ]
+
+    operations = [
+        migrations.RunPython(tekrarlari_temizle, migrations.RunPython.noop),
+    ]
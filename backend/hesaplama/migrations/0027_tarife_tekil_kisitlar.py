@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hesaplama', '0026_tarife_tekrarlarini_temizle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='hesaplamakategoriler',
+            name='kategori_alt_kategori_idx',
+        ),
+        migrations.AddIndex(
+            model_name='fiyathesaplamagecmisi',
+            index=models.Index(fields=['hesaplama_tarihi'], name='fiyat_gecmis_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fiyathesaplamagecmisi',
+            index=models.Index(condition=models.Q(('kullanici__isnull', False)), fields=['kullanici', 'hesaplama_tarihi'], name='fiyat_gecmis_kul_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamadesikggecmisi',
+            index=models.Index(fields=['hesaplama_tarihi'], name='desi_gecmis_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hesaplamadesikggecmisi',
+            index=models.Index(condition=models.Q(('kullanici__isnull', False)), fields=['kullanici', 'hesaplama_tarihi'], name='desi_gecmis_kul_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kargoucretgecmis',
+            index=models.Index(fields=['hesaplama_tarihi'], name='kargo_gecmis_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kargoucretgecmis',
+            index=models.Index(condition=models.Q(('kullanici__isnull', False)), fields=['kullanici', 'hesaplama_tarihi'], name='kargo_gecmis_kul_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='komisyonoranigecmisi',
+            index=models.Index(fields=['hesaplama_tarihi'], name='komisyon_gecmis_tarih_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='komisyonoranigecmisi',
+            index=models.Index(condition=models.Q(('kullanici__isnull', False)), fields=['kullanici', 'hesaplama_tarihi'], name='komisyon_gecmis_kul_tarih_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='desikgdeger',
+            constraint=models.UniqueConstraint(fields=('versiyon', 'desi_degeri'), name='desi_kg_deger_surum_tekil'),
+        ),
+        migrations.AddConstraint(
+            model_name='desikgkargoucret',
+            constraint=models.UniqueConstraint(fields=('versiyon', 'kargo_firma', 'desi_kg_deger'), name='kargo_ucret_surum_tekil'),
+        ),
+        migrations.AddConstraint(
+            model_name='hesaplamakategoriler',
+            constraint=models.UniqueConstraint(fields=('versiyon', 'ust_kategori', 'adi'), name='kategori_surum_tekil'),
+        ),
+        migrations.AddConstraint(
+            model_name='hesaplamakategoriler',
+            constraint=models.UniqueConstraint(condition=models.Q(('ust_kategori__isnull', True)), fields=('versiyon', 'adi'), name='kok_kategori_surum_tekil'),
+        ),
+        migrations.AddConstraint(
+            model_name='pazaryerikargofirma',
+            constraint=models.UniqueConstraint(fields=('versiyon', 'kargo_firma'), name='pazaryeri_kargo_surum_tekil'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hesaplama', '0027_tarife_tekil_kisitlar'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fiyathesaplamagecmisi',
+            name='hesaplama_tarihi',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='hesaplamadesikggecmisi',
+            name='hesaplama_tarihi',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='kargoucretgecmis',
+            name='hesaplama_tarihi',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='komisyonoranigecmisi',
+            name='hesaplama_tarihi',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
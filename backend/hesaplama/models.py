@@ -1,12 +1,59 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
+def email_normalize_et(email):
+    """
+    Email adresini karşılaştırma için normalize eder (boşlukları temizler, küçük harfe çevirir)
+    """
+    return (email or '').strip().lower()
+
+
+class NormalizeEmailField(models.CharField):
+    """
+    Modelin email alanının normalize edilmiş kopyası. Değer her kayıtta (bulk_create
+    dahil) email alanından hesaplanır; böylece büyük/küçük harf duyarsız eşleştirme
+    iexact yerine indekslenebilir bir eşitlik sorgusuyla yapılır.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 254)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        deger = email_normalize_et(model_instance.email)
+        setattr(model_instance, self.attname, deger)
+        return deger
+
+
 # Create your models here.
 class Pazaryeri(models.Model):
     pazar_ismi = models.CharField(max_length=100)
     aktif = models.BooleanField(default=True)
+    # Okuyucuların gördüğü sürümler; yeni sürüm bu işaretçiler güncellenerek etkinleştirilir
+    aktif_kargo_versiyonu = models.ForeignKey(
+        'VeriVersiyonu',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        help_text="Kullanımdaki kargo tarifesi sürümü"
+    )
+    aktif_komisyon_versiyonu = models.ForeignKey(
+        'VeriVersiyonu',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        help_text="Kullanımdaki komisyon tablosu sürümü"
+    )
 
     def __str__(self):
         return self.pazar_ismi
@@ -15,6 +62,176 @@ class Pazaryeri(models.Model):
         verbose_name = "Pazar Yeri"
         verbose_name_plural = "Pazar Yerleri"
 
+class VeriVersiyonu(models.Model):
+    """
+    Bir pazar yerinin kargo tarifesinin veya komisyon tablosunun değişmez bir sürümü.
+    Her içe aktarma yeni bir sürüm oluşturur; hangi sürümün kullanılacağını
+    Pazaryeri üzerindeki aktif sürüm işaretçisi belirler. Eski sürümler geri dönüş
+    için saklanır.
+    """
+    KARGO = 'kargo'
+    KOMISYON = 'komisyon'
+    TUR_SECENEKLERI = [
+        (KARGO, 'Kargo Tarifesi'),
+        (KOMISYON, 'Komisyon Tablosu'),
+    ]
+
+    pazar_yeri = models.ForeignKey(Pazaryeri, on_delete=models.CASCADE, related_name='veri_versiyonlari')
+    tur = models.CharField(max_length=20, choices=TUR_SECENEKLERI)
+    aciklama = models.CharField(max_length=255, blank=True, help_text="Örn: yüklenen dosyanın adı")
+    olusturma_tarihi = models.DateTimeField(auto_now_add=True)
+    gecerlilik_tarihi = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Sürümün en son etkinleştirildiği an"
+    )
+    gecerlilik_bitis_tarihi = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Sürümün yerini başka bir sürüme bıraktığı an"
+    )
+
+    def __str__(self):
+        return f"{self.get_tur_display()} #{self.id}"
+
+    class Meta:
+        verbose_name = "Veri Sürümü"
+        verbose_name_plural = "Veri Sürümleri"
+        ordering = ['-olusturma_tarihi']
+
+class VersiyonluQuerySet(models.QuerySet):
+    def aktif(self, pazar_yeri_id=None):
+        """
+        Pazar yerinin aktif sürümüne ait kayıtları döndürür.
+        pazar_yeri_id verilirse aktif sürüm alt sorguyla bir kez çözülür; böylece
+        sorgu (versiyon, ...) indeksleriyle yalnızca o sürümün satırlarını okur.
+        """
+        alan = f'aktif_{self.model.VERSIYON_TURU}_versiyonu'
+        if pazar_yeri_id is None:
+            return self.filter(versiyon=models.F(f'pazar_yeri__{alan}'))
+        return self.filter(
+            pazar_yeri_id=pazar_yeri_id,
+            versiyon=models.Subquery(Pazaryeri.objects.filter(id=pazar_yeri_id).values(alan)[:1])
+        )
+
+    def delete(self):
+        """
+        Taslak sürümlerin kayıtlarını doğrudan siler. Aktif sürümlerdeki kayıtlar, pazar yeri
+        başına aktif sürümün tek bir kopyasında silinir (bkz. VersiyonluModel); eski sürümlerin
+        kayıtları silinemez.
+        """
+        from .versiyonlar import aktif_versiyonu_kopyalayarak_degistir
+
+        alan = f'aktif_{self.model.VERSIYON_TURU}_versiyonu'
+        dogrudan = []
+        aktif_surumdekiler = {}
+        for id, pazar_yeri_id, versiyon_id, gecerlilik_tarihi, aktif_versiyon_id in self.values_list(
+            'id', 'pazar_yeri_id', 'versiyon_id', 'versiyon__gecerlilik_tarihi', f'pazar_yeri__{alan}'
+        ):
+            if pazar_yeri_id is None or versiyon_id is None or gecerlilik_tarihi is None:
+                dogrudan.append(id)
+            elif versiyon_id == aktif_versiyon_id:
+                aktif_surumdekiler.setdefault(pazar_yeri_id, []).append(id)
+            else:
+                raise PermissionDenied('Eski sürümlerin kayıtları değiştirilemez.')
+
+        silinen_sayisi, silinenler = 0, Counter()
+        with transaction.atomic(using=self.db):
+            if dogrudan:
+                sayi, ayrinti = self.model._base_manager.using(self.db).filter(id__in=dogrudan).delete()
+                silinen_sayisi += sayi
+                silinenler.update(ayrinti)
+            for pazar_yeri_id, idler in aktif_surumdekiler.items():
+                def degistir(yeni_versiyon, eslemeler, idler=idler):
+                    esleme = eslemeler[self.model]
+                    return self.model._base_manager.filter(id__in=[esleme[id] for id in idler]).delete()
+                sayi, ayrinti = aktif_versiyonu_kopyalayarak_degistir(pazar_yeri_id, self.model.VERSIYON_TURU, degistir)
+                silinen_sayisi += sayi
+                silinenler.update(ayrinti)
+        return silinen_sayisi, dict(silinenler)
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+class VersiyonluModel(models.Model):
+    """
+    Pazar yeri bazında sürümlenen tablolar için ortak alan ve davranışlar.
+
+    Etkinleştirilmiş bir sürümün kayıtları değişmez; böylece bir sürüme geri
+    dönüldüğünde içe aktarılan veri aynen geri gelir. Tek tek yapılan
+    değişiklikler (admin paneli, API) aktif sürümün bir kopyasına yazılır ve
+    kopya etkinleştirilir (bkz. versiyonlar.aktif_versiyonu_kopyalayarak_degistir).
+    Henüz etkinleştirilmemiş (taslak) sürümlerin kayıtları doğrudan değiştirilebilir.
+    """
+    VERSIYON_TURU = None
+
+    versiyon = models.ForeignKey(
+        VeriVersiyonu,
+        on_delete=models.CASCADE,
+        related_name='%(class)s_kayitlari',
+        null=True,
+        blank=True,
+        help_text="Kaydın ait olduğu sürüm"
+    )
+
+    objects = VersiyonluQuerySet.as_manager()
+
+    def _aktif_surume_yaziliyor_mu(self):
+        """
+        Kayıt sürümsüzse veya aktif sürüme aitse True, taslak bir sürüme aitse False döner.
+        Yerini başka bir sürüme bırakmış eski sürümlerin kayıtları değiştirilemez.
+        """
+        if self.versiyon_id is None:
+            return True
+        gecerlilik_tarihi, aktif_versiyon_id = VeriVersiyonu.objects.filter(id=self.versiyon_id).values_list(
+            'gecerlilik_tarihi', f'pazar_yeri__aktif_{self.VERSIYON_TURU}_versiyonu'
+        ).get()
+        if gecerlilik_tarihi is None:
+            return False
+        if aktif_versiyon_id != self.versiyon_id:
+            raise PermissionDenied('Eski sürümlerin kayıtları değiştirilemez.')
+        return True
+
+    def _kopyadaki_id(self, eslemeler):
+        kopya_id = eslemeler.get(type(self), {}).get(self.pk)
+        if kopya_id is None:
+            raise PermissionDenied('Kayıt pazar yerinin aktif sürümünde bulunamadı; sürüm bu arada değişmiş olabilir.')
+        return kopya_id
+
+    def save(self, *args, **kwargs):
+        if self.pazar_yeri_id is None or not self._aktif_surume_yaziliyor_mu():
+            return super().save(*args, **kwargs)
+
+        from .versiyonlar import aktif_versiyonu_kopyalayarak_degistir
+
+        def degistir(yeni_versiyon, eslemeler):
+            # Kayıt ve başvurduğu sürümlü kayıtlar (ör. desi değeri, kategoriler) kopyadakilerle değiştirilir
+            if self.pk is not None:
+                self.pk = self._kopyadaki_id(eslemeler)
+            for alan in self._meta.concrete_fields:
+                if alan.is_relation and issubclass(alan.related_model, VersiyonluModel):
+                    hedef_id = getattr(self, alan.attname)
+                    if hedef_id in eslemeler.get(alan.related_model, {}):
+                        setattr(self, alan.attname, eslemeler[alan.related_model][hedef_id])
+            self.versiyon = yeni_versiyon
+            super(VersiyonluModel, self).save(*args, **kwargs)
+
+        aktif_versiyonu_kopyalayarak_degistir(self.pazar_yeri_id, self.VERSIYON_TURU, degistir)
+
+    def delete(self, *args, **kwargs):
+        if self.pazar_yeri_id is None or not self._aktif_surume_yaziliyor_mu():
+            return super().delete(*args, **kwargs)
+
+        from .versiyonlar import aktif_versiyonu_kopyalayarak_degistir
+
+        def degistir(yeni_versiyon, eslemeler):
+            return type(self).objects.filter(id=self._kopyadaki_id(eslemeler)).delete()
+
+        return aktif_versiyonu_kopyalayarak_degistir(self.pazar_yeri_id, self.VERSIYON_TURU, degistir)
+
+    class Meta:
+        abstract = True
+
 class KargoFirma(models.Model):
     firma_ismi = models.CharField(max_length=100)
     logo = models.ImageField(upload_to='kargo_logo/', null=True, blank=True)
@@ -27,7 +244,9 @@ class KargoFirma(models.Model):
         verbose_name = "Kargo Firması"
         verbose_name_plural = "Kargo Firmaları"
 
-class DesiKgDeger(models.Model):
+class DesiKgDeger(VersiyonluModel):
+    VERSIYON_TURU = VeriVersiyonu.KARGO
+
     pazar_yeri = models.ForeignKey(Pazaryeri, on_delete=models.CASCADE, related_name='desi_kg_degerleri', default=1)
     desi_degeri = models.FloatField()
 
@@ -37,8 +256,14 @@ class DesiKgDeger(models.Model):
     class Meta:
         verbose_name = "Desi/Kg Değeri"
         verbose_name_plural = "Desi/Kg Değerleri"
+        # Sürüm tek bir pazar yerine ait olduğu için pazar yeri ayrıca eklenmez
+        constraints = [
+            models.UniqueConstraint(fields=['versiyon', 'desi_degeri'], name='desi_kg_deger_surum_tekil'),
+        ]
+
+class DesiKgKargoUcret(VersiyonluModel):
+    VERSIYON_TURU = VeriVersiyonu.KARGO
 
-class DesiKgKargoUcret(models.Model):
     pazar_yeri = models.ForeignKey(Pazaryeri, on_delete=models.CASCADE, related_name='kargo_ucretleri')
     desi_kg_deger = models.ForeignKey(DesiKgDeger, on_delete=models.CASCADE, related_name='kargo_ucretleri')
     kargo_firma = models.ForeignKey(KargoFirma, on_delete=models.CASCADE, related_name='kargo_ucretleri')
@@ -50,8 +275,15 @@ class DesiKgKargoUcret(models.Model):
     class Meta:
         verbose_name = "Desi/Kg Kargo Ücreti"
         verbose_name_plural = "Desi/Kg Kargo Ücretleri"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['versiyon', 'kargo_firma', 'desi_kg_deger'], name='kargo_ucret_surum_tekil'
+            ),
+        ]
+
+class PazaryeriKargofirma(VersiyonluModel):
+    VERSIYON_TURU = VeriVersiyonu.KARGO
 
-class PazaryeriKargofirma(models.Model):
     pazar_yeri = models.ForeignKey(Pazaryeri, on_delete=models.CASCADE, related_name='kargo_firmalari')
     kargo_firma = models.ForeignKey(KargoFirma, on_delete=models.CASCADE, related_name='pazar_yerleri')
 
@@ -61,6 +293,9 @@ class PazaryeriKargofirma(models.Model):
     class Meta:
         verbose_name = "Pazar Yeri Kargo Firması"
         verbose_name_plural = "Pazar Yeri Kargo Firmaları"
+        constraints = [
+            models.UniqueConstraint(fields=['versiyon', 'kargo_firma'], name='pazaryeri_kargo_surum_tekil'),
+        ]
 
 # Trendyol Kategori Komisyon Oranları için Modeller
 class Kategori(models.Model):
@@ -241,10 +476,12 @@ class HesaplamaKategoriSeviyeleri(models.Model):
         verbose_name_plural = "Hesaplama Kategori Seviyeleri"
         db_table = "hesaplama_kategori_seviyeleri"
 
-class HesaplamaKategoriler(models.Model):
+class HesaplamaKategoriler(VersiyonluModel):
     """
     Tüm kategorileri hiyerarşik yapıda tutar
     """
+    VERSIYON_TURU = VeriVersiyonu.KOMISYON
+
     adi = models.CharField(max_length=255, help_text="Kategori adı")
     ust_kategori = models.ForeignKey(
         'self', 
@@ -266,6 +503,27 @@ class HesaplamaKategoriler(models.Model):
         blank=True,
         help_text="Kategorinin ait olduğu pazar yeri"
     )
+    # İç içe küme (nested set) numaraları; komisyon tablosu içe aktarılırken hesaplanır.
+    # Bir kategorinin alt ağacı, pazar yerinde sol ve sag aralığında kalan kategorilerdir.
+    sol = models.PositiveIntegerField(
+        default=0,
+        help_text="İç içe küme sol numarası"
+    )
+    sag = models.PositiveIntegerField(
+        default=0,
+        help_text="İç içe küme sağ numarası"
+    )
+    alt_kategori_sayisi = models.PositiveIntegerField(
+        default=0,
+        help_text="Doğrudan alt kategori sayısı"
+    )
+    
+    @property
+    def toplam_alt_kategori_sayisi(self):
+        """
+        Alt ağaçtaki tüm kategorilerin sayısı
+        """
+        return max((self.sag - self.sol - 1) // 2, 0)
     
     def __str__(self):
         if self.ust_kategori:
@@ -276,11 +534,26 @@ class HesaplamaKategoriler(models.Model):
         verbose_name = "Hesaplama Kategori"
         verbose_name_plural = "Hesaplama Kategoriler"
         db_table = "hesaplama_kategoriler"
-
-class HesaplamaKomisyonOranlari(models.Model):
+        indexes = [
+            models.Index(fields=['versiyon', 'sol'], name='kategori_ic_ice_kume_idx'),
+        ]
+        # Alt kategori sorguları (versiyon, ust_kategori, adi) tekil indeksini kullanır.
+        # Kök kategorilerde ust_kategori NULL olduğu için ayrı bir kısmi kısıt gerekir.
+        constraints = [
+            models.UniqueConstraint(fields=['versiyon', 'ust_kategori', 'adi'], name='kategori_surum_tekil'),
+            models.UniqueConstraint(
+                fields=['versiyon', 'adi'],
+                condition=models.Q(ust_kategori__isnull=True),
+                name='kok_kategori_surum_tekil'
+            ),
+        ]
+
+class HesaplamaKomisyonOranlari(VersiyonluModel):
     """
     Pazar yerlerine göre kategori bazlı komisyon oranlarını tutar
     """
+    VERSIYON_TURU = VeriVersiyonu.KOMISYON
+
     pazar_yeri = models.ForeignKey(
         Pazaryeri, 
         on_delete=models.CASCADE, 
@@ -320,21 +593,52 @@ class HesaplamaKomisyonOranlari(models.Model):
     gecerlilik_tarihi = models.DateField(
         help_text="Oranın geçerli olduğu tarih aralığı"
     )
+    # Kategori yolunun içe aktarma anında hesaplanan (denormalize) hali
+    kategori_yolu_metni = models.CharField(
+        max_length=1100,
+        blank=True,
+        default='',
+        help_text="Tam kategori yolu (Örn: Elektronik > Telefon > Akıllı Telefon)"
+    )
+    derinlik = models.PositiveSmallIntegerField(
+        default=1,
+        help_text="Kategori yolunun seviye sayısı (1-4 arası)"
+    )
+    yaprak_kategori = models.ForeignKey(
+        HesaplamaKategoriler,
+        on_delete=models.CASCADE,
+        related_name='yaprak_komisyon_oranlari',
+        null=True,
+        blank=True,
+        help_text="Kategori yolunun son (en derin) kategorisi"
+    )
+    
+    def kategori_yolunu_guncelle(self):
+        """
+        Kategori yolu metnini, derinliği ve yaprak kategoriyi kategori_1..4 alanlarından hesaplar
+        """
+        kategoriler = [
+            kategori for kategori in (self.kategori_1, self.kategori_2, self.kategori_3, self.kategori_4)
+            if kategori
+        ]
+        self.kategori_yolu_metni = ' > '.join(kategori.adi for kategori in kategoriler)
+        self.derinlik = len(kategoriler)
+        self.yaprak_kategori = kategoriler[-1]
+    
+    def save(self, *args, **kwargs):
+        self.kategori_yolunu_guncelle()
+        super().save(*args, **kwargs)
     
     def __str__(self):
-        kategori_yolu = self.kategori_1.adi
-        if self.kategori_2:
-            kategori_yolu += f" > {self.kategori_2.adi}"
-        if self.kategori_3:
-            kategori_yolu += f" > {self.kategori_3.adi}"
-        if self.kategori_4:
-            kategori_yolu += f" > {self.kategori_4.adi}"
-        return f"{self.pazar_yeri.pazar_ismi} - {kategori_yolu} - %{self.komisyon_orani}"
+        return f"{self.pazar_yeri.pazar_ismi} - {self.kategori_yolu_metni} - %{self.komisyon_orani}"
     
     class Meta:
         verbose_name = "Hesaplama Komisyon Oranı"
         verbose_name_plural = "Hesaplama Komisyon Oranları"
         db_table = "hesaplama_komisyon_oranlari"
+        indexes = [
+            models.Index(fields=['versiyon', 'kategori_yolu_metni'], name='komisyon_kategori_yolu_idx'),
+        ]
 
 class KategoriYolu(models.Model):
     """
@@ -377,11 +681,20 @@ class HesaplamaDesiKgGecmisi(models.Model):
     yukseklik = models.FloatField()
     net_agirlik = models.FloatField()
     desi_kg = models.FloatField()
-    hesaplama_tarihi = models.DateTimeField(auto_now_add=True)
+    # Arkadan yazılan kayıtlarda yazma anı değil hesaplama anı saklansın diye auto_now_add kullanılmaz
+    hesaplama_tarihi = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = 'Desi/Kg Hesaplama Geçmişi'
         verbose_name_plural = 'Desi/Kg Hesaplama Geçmişleri'
+        indexes = [
+            models.Index(fields=['hesaplama_tarihi'], name='desi_gecmis_tarih_idx'),
+            # Misafir (kullanici IS NULL) satırları bu indekse girmez; onlar email kısmi indeksiyle bulunur
+            models.Index(
+                fields=['kullanici', 'hesaplama_tarihi'], name='desi_gecmis_kul_tarih_idx',
+                condition=models.Q(kullanici__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.kullanici.username} - {self.hesaplama_tarihi}"
@@ -389,17 +702,31 @@ class HesaplamaDesiKgGecmisi(models.Model):
 class KargoUcretGecmis(models.Model):
     kullanici = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     email = models.EmailField()
+    email_normalize = NormalizeEmailField()
     desi_kg_degeri = models.DecimalField(max_digits=10, decimal_places=2)
     yuvarlanmis_desi_kg = models.DecimalField(max_digits=10, decimal_places=2)
     pazar_yeri = models.ForeignKey(Pazaryeri, on_delete=models.CASCADE)
     kargo_firma = models.ForeignKey(KargoFirma, on_delete=models.CASCADE)
     kargo_ucreti = models.DecimalField(max_digits=10, decimal_places=2)
-    hesaplama_tarihi = models.DateTimeField(auto_now_add=True)
+    hesaplama_tarihi = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = 'Kargo Ücreti Geçmişi'
         verbose_name_plural = 'Kargo Ücreti Geçmişleri'
         ordering = ['-hesaplama_tarihi']
+        indexes = [
+            models.Index(fields=['hesaplama_tarihi'], name='kargo_gecmis_tarih_idx'),
+            models.Index(
+                fields=['kullanici', 'hesaplama_tarihi'], name='kargo_gecmis_kul_tarih_idx',
+                condition=models.Q(kullanici__isnull=False)
+            ),
+            # Kullanıcıya bağlanmamış kayıtları email ile bulmak için kısmi indeks
+            models.Index(
+                fields=['email_normalize'],
+                condition=models.Q(kullanici__isnull=True),
+                name='kargo_gecmis_bagsiz_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.kullanici.username if self.kullanici else self.email} - {self.pazar_yeri.pazar_ismi} - {self.kargo_firma.firma_ismi} - {self.hesaplama_tarihi}"
@@ -407,15 +734,29 @@ class KargoUcretGecmis(models.Model):
 class KomisyonOraniGecmisi(models.Model):
     kullanici = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     email = models.EmailField()
+    email_normalize = NormalizeEmailField()
     pazar_yeri = models.ForeignKey(Pazaryeri, on_delete=models.CASCADE)
     kategori_yolu = models.ForeignKey(HesaplamaKategoriler, on_delete=models.CASCADE)
     komisyon_orani = models.DecimalField(max_digits=5, decimal_places=2)
-    hesaplama_tarihi = models.DateTimeField(auto_now_add=True)
+    hesaplama_tarihi = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = 'Komisyon Oranı Geçmişi'
         verbose_name_plural = 'Komisyon Oranı Geçmişleri'
         ordering = ['-hesaplama_tarihi']
+        indexes = [
+            models.Index(fields=['hesaplama_tarihi'], name='komisyon_gecmis_tarih_idx'),
+            models.Index(
+                fields=['kullanici', 'hesaplama_tarihi'], name='komisyon_gecmis_kul_tarih_idx',
+                condition=models.Q(kullanici__isnull=False)
+            ),
+            # Kullanıcıya bağlanmamış kayıtları email ile bulmak için kısmi indeks
+            models.Index(
+                fields=['email_normalize'],
+                condition=models.Q(kullanici__isnull=True),
+                name='komisyon_gecmis_bagsiz_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.kullanici.username if self.kullanici else self.email} - {self.pazar_yeri.pazar_ismi} - {self.kategori_yolu.adi} - {self.hesaplama_tarihi}"
@@ -423,6 +764,7 @@ class KomisyonOraniGecmisi(models.Model):
 class FiyatHesaplamaGecmisi(models.Model):
     kullanici = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     email = models.EmailField()
+    email_normalize = NormalizeEmailField()
     pazar_yeri = models.ForeignKey(Pazaryeri, on_delete=models.CASCADE)
     urun_maliyeti = models.DecimalField(max_digits=10, decimal_places=2)
     paketleme_bedeli = models.DecimalField(max_digits=10, decimal_places=2)
@@ -435,12 +777,42 @@ class FiyatHesaplamaGecmisi(models.Model):
     stopaj_bedeli = models.DecimalField(max_digits=10, decimal_places=2)
     satis_fiyati = models.DecimalField(max_digits=10, decimal_places=2)
     kdv_dahil_satis_fiyati = models.DecimalField(max_digits=10, decimal_places=2)
-    hesaplama_tarihi = models.DateTimeField(auto_now_add=True)
+    hesaplama_tarihi = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = 'Fiyat Hesaplama Geçmişi'
         verbose_name_plural = 'Fiyat Hesaplama Geçmişleri'
         ordering = ['-hesaplama_tarihi']
+        indexes = [
+            models.Index(fields=['hesaplama_tarihi'], name='fiyat_gecmis_tarih_idx'),
+            models.Index(
+                fields=['kullanici', 'hesaplama_tarihi'], name='fiyat_gecmis_kul_tarih_idx',
+                condition=models.Q(kullanici__isnull=False)
+            ),
+            # Kullanıcıya bağlanmamış kayıtları email ile bulmak için kısmi indeks
+            models.Index(
+                fields=['email_normalize'],
+                condition=models.Q(kullanici__isnull=True),
+                name='fiyat_gecmis_bagsiz_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.kullanici.username if self.kullanici else self.email} - {self.pazar_yeri.pazar_ismi} - {self.hesaplama_tarihi}"
+
+class GecmisBaglantisi(models.Model):
+    """
+    Kullanıcının misafirken yaptığı hesaplamaların hesabına bağlandığını işaretler.
+    Bağlama, kullanıcının o anki email adresi için bir kez yapılır; email
+    değişirse yeni adres için tekrar yapılır.
+    """
+    kullanici = models.OneToOneField(User, on_delete=models.CASCADE, related_name='gecmis_baglantisi')
+    email_normalize = models.CharField(max_length=254, help_text="Bağlamanın yapıldığı normalize email adresi")
+    baglama_tarihi = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Geçmiş Bağlantısı'
+        verbose_name_plural = 'Geçmiş Bağlantıları'
+
+    def __str__(self):
+        return f"{self.kullanici.username} - {self.email_normalize}"
@@ -0,0 +1,69 @@
+"""
+Performans ölçüm komutlarının (benchmark_*) ortak yardımcıları.
+
+Ölçümler asıl veritabanını kirletmesin diye geçici bir SQLite dosyası üzerinde
+çalışır. Bağlantı ayarları tüm thread'lerin ortak kullandığı sözlükte geçici
+olarak değiştirilir; SQLite her yeni bağlantıda bu sözlüğü okuduğu için
+ölçüm sırasında açılan tüm bağlantılar geçici dosyaya gider.
+"""
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .gecmis_kaydedici import gecmis_kaydedici
+
+
+def yuzdelik(degerler, oran):
+    """
+    Sıralanmış değerlerde verilen orana (0-1) karşılık gelen değeri döndürür
+    """
+    if not degerler:
+        return 0
+    sirali = sorted(degerler)
+    return sirali[min(int(len(sirali) * oran), len(sirali) - 1)]
+
+
+def _veritabanini_kopyala(kaynak, hedef):
+    """
+    SQLite veritabanını (WAL'da bekleyen sayfalar dahil) tutarlı bir anlık görüntü olarak kopyalar
+    """
+    kaynak_baglanti = sqlite3.connect(kaynak)
+    hedef_baglanti = sqlite3.connect(hedef)
+    try:
+        kaynak_baglanti.backup(hedef_baglanti)
+    finally:
+        hedef_baglanti.close()
+        kaynak_baglanti.close()
+
+
+@contextmanager
+def gecici_sqlite_veritabani(kopyala=False, secenekler=None):
+    """
+    Varsayılan bağlantıyı geçici bir SQLite dosyasına yönlendirir ve dosyanın yolunu verir.
+    kopyala True ise dosya asıl veritabanının kopyasıdır, değilse boştur (migrate edilmelidir).
+    secenekler verilirse bağlantının OPTIONS ayarı bununla değiştirilir.
+    """
+    baglanti = connections[DEFAULT_DB_ALIAS]
+    if baglanti.vendor != 'sqlite':
+        raise ValueError('Ölçümler yalnızca SQLite veritabanı ile çalışır.')
+
+    db_ayari = connections.settings[DEFAULT_DB_ALIAS]
+    asil_ad, asil_secenekler = db_ayari['NAME'], db_ayari.get('OPTIONS', {})
+    connections.close_all()
+    with tempfile.TemporaryDirectory() as klasor:
+        gecici_ad = os.path.join(klasor, 'olcum.sqlite3')
+        if kopyala:
+            _veritabanini_kopyala(str(asil_ad), gecici_ad)
+        db_ayari['NAME'] = gecici_ad
+        if secenekler is not None:
+            db_ayari['OPTIONS'] = secenekler
+        try:
+            yield gecici_ad
+        finally:
+            # Kuyrukta kalan geçmiş kayıtları asıl veritabanına değil geçici dosyaya yazılsın
+            gecmis_kaydedici.kapat()
+            connections.close_all()
+            db_ayari['NAME'], db_ayari['OPTIONS'] = asil_ad, asil_secenekler
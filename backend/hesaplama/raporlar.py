@@ -0,0 +1,136 @@
+"""
+Admin paneli için kullanıcı hesaplama raporu.
+
+Rapor kullanıcı sayfası başına sabit sayıda sorgu ile üretilir: sayfadaki
+kullanıcılar, bu kullanıcıların hesaplamaları ve hesaplamaların fiyat
+belirlemeleri ayrı ayrı, aynı (kullanıcı, hesaplama) sırasıyla okunur ve
+Python'da sıralı birleştirme (merge join) ile eşleştirilir. Satırlar
+QuerySet.iterator() ile parça parça okunup JSON olarak akıtıldığı için bellek
+kullanımı sayfadaki hesaplama sayısından bağımsızdır.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+
+from .models import Hesaplamalar, FiyatBelirleme
+
+ITERATOR_PARCA_BOYUTU = 2000
+MISAFIR_GRUP_ADI = 'Misafir Kullanıcılar'
+
+FIYAT_BELIRLEME_ALANLARI = (
+    'urun_id', 'urun_ismi', 'urun_maliyeti', 'paketleme_maliyeti', 'trendyol_hizmet_bedeli',
+    'kargo_firmasi', 'kargo_ucreti', 'stopaj_degeri', 'desi_kg_degeri', 'urun_kategorisi',
+    'komisyon_orani', 'komisyon_tutari', 'kdv_orani', 'kar_orani', 'kar_tutari',
+    'satis_fiyati_kdv_haric', 'satis_fiyati_kdv_dahil'
+)
+# Raporda sayı olarak (float) gösterilen ondalık alanlar
+_ONDALIK_ALANLAR = frozenset(FIYAT_BELIRLEME_ALANLARI) - {'urun_id', 'urun_ismi', 'kargo_firmasi', 'urun_kategorisi'}
+
+
+def hesaplamasi_olan_kullanicilar(username=None):
+    """
+    En az bir hesaplaması olan kullanıcıları döndürür
+    """
+    kullanicilar = get_user_model().objects.filter(
+        Exists(Hesaplamalar.objects.filter(kullanici=OuterRef('pk')))
+    ).only('id', 'username')
+    if username:
+        kullanicilar = kullanicilar.filter(username=username)
+    return kullanicilar
+
+
+def _json(veri):
+    return json.dumps(veri, ensure_ascii=False)
+
+
+def _fiyat_belirleme_sozlugu(satir):
+    return {
+        alan: float(deger) if alan in _ONDALIK_ALANLAR else deger
+        for alan, deger in zip(FIYAT_BELIRLEME_ALANLARI, satir)
+    }
+
+
+def _hesaplamalari_akit(kullanici_filtresi, email_dahil=False):
+    """
+    Filtreye uyan hesaplamaları fiyat belirlemeleriyle birlikte (kullanici_id, hesaplama) olarak akıtır.
+    Hesaplamalar ve fiyat belirlemeleri aynı sırayla okunduğu için tek geçişte eşleştirilir.
+    """
+    hesaplamalar = Hesaplamalar.objects.filter(**kullanici_filtresi).order_by(
+        'kullanici_id', 'hesaplama_id'
+    ).values_list('kullanici_id', 'hesaplama_id', 'email', 'olusturulma_tarihi', 'toplam_fiyat')
+
+    fiyat_filtresi = {f'hesaplama__{alan}': deger for alan, deger in kullanici_filtresi.items()}
+    fiyat_belirlemeler = FiyatBelirleme.objects.filter(**fiyat_filtresi).order_by(
+        'hesaplama__kullanici_id', 'hesaplama_id', 'urun_id'
+    ).values_list('hesaplama_id', *FIYAT_BELIRLEME_ALANLARI).iterator(chunk_size=ITERATOR_PARCA_BOYUTU)
+
+    siradaki = next(fiyat_belirlemeler, None)
+    for kullanici_id, hesaplama_id, email, olusturulma_tarihi, toplam_fiyat in hesaplamalar.iterator(
+        chunk_size=ITERATOR_PARCA_BOYUTU
+    ):
+        fiyat_belirlemeler_data = []
+        while siradaki is not None and siradaki[0] == hesaplama_id:
+            fiyat_belirlemeler_data.append(_fiyat_belirleme_sozlugu(siradaki[1:]))
+            siradaki = next(fiyat_belirlemeler, None)
+
+        hesaplama = {'hesaplama_id': hesaplama_id}
+        if email_dahil:
+            hesaplama['email'] = email
+        hesaplama.update({
+            'olusturulma_tarihi': olusturulma_tarihi.strftime('%Y-%m-%d %H:%M:%S.%f'),
+            'toplam_fiyat': float(toplam_fiyat),
+            'fiyat_belirlemeler': fiyat_belirlemeler_data
+        })
+        yield kullanici_id, hesaplama
+
+
+def _gruplari_akit(akis, baslik_getir):
+    """
+    Kullanıcıya göre sıralı (kullanici_id, hesaplama) akışını
+    {"...": ..., "hesaplamalar": [...]} gruplarına bölerek JSON parçaları olarak yazar.
+    Kaç grup yazıldığını döndürür.
+    """
+    grup_sayisi = 0
+    aktif_kullanici_id = None
+    for kullanici_id, hesaplama in akis:
+        if grup_sayisi == 0 or kullanici_id != aktif_kullanici_id:
+            if grup_sayisi:
+                yield ']}, '
+            yield _json(baslik_getir(kullanici_id))[:-1] + ', "hesaplamalar": ['
+            grup_sayisi += 1
+            aktif_kullanici_id = kullanici_id
+        else:
+            yield ', '
+        yield _json(hesaplama)
+    if grup_sayisi:
+        yield ']}'
+    return grup_sayisi
+
+
+def kullanici_raporu_akisi(form, kullanicilar, sonraki=None, onceki=None, misafirler_dahil=False):
+    """
+    Sayfadaki kullanıcıların (ve istenirse misafirlerin) hesaplamalarını
+    {"form": ..., "next": ..., "previous": ..., "results": [...]} biçiminde JSON parçaları olarak üretir
+    """
+    yield '{"form": %s, "next": %s, "previous": %s, "results": [' % (_json(form), _json(sonraki), _json(onceki))
+
+    grup_sayisi = 0
+    kullanici_adlari = {kullanici.id: kullanici.username for kullanici in kullanicilar}
+    if kullanici_adlari:
+        grup_sayisi = yield from _gruplari_akit(
+            _hesaplamalari_akit({'kullanici_id__in': list(kullanici_adlari)}),
+            lambda kullanici_id: {'kullanici_id': kullanici_id, 'kullanici_name': kullanici_adlari[kullanici_id]}
+        )
+
+    if misafirler_dahil:
+        misafir_parcalari = _gruplari_akit(
+            _hesaplamalari_akit({'kullanici__isnull': True}, email_dahil=True),
+            lambda kullanici_id: {'kullanici_name': MISAFIR_GRUP_ADI}
+        )
+        ilk_parca = next(misafir_parcalari, None)
+        if ilk_parca is not None:
+            yield (', ' if grup_sayisi else '') + ilk_parca
+            yield from misafir_parcalari
+
+    yield ']}'
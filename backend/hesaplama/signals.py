@@ -1,43 +1,88 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.auth.signals import user_logged_in
 from django.db import transaction
-from .models import KargoUcretGecmis, KomisyonOraniGecmisi, FiyatHesaplamaGecmisi
-
-def link_previous_calculations(user):
-    """
-    Verilen kullanıcının email adresine göre önceki işlemlerini hesabına bağlar.
-    """
-    with transaction.atomic():
-        # Kargo ücreti hesaplama geçmişini güncelle
-        KargoUcretGecmis.objects.filter(
-            email__iexact=user.email,
-            kullanici__isnull=True
-        ).update(kullanici=user)
-        
-        # Komisyon oranı hesaplama geçmişini güncelle
-        KomisyonOraniGecmisi.objects.filter(
-            email__iexact=user.email,
-            kullanici__isnull=True
-        ).update(kullanici=user)
-        
-        # Fiyat hesaplama geçmişini güncelle
-        FiyatHesaplamaGecmisi.objects.filter(
-            email__iexact=user.email,
-            kullanici__isnull=True
-        ).update(kullanici=user)
+from django.db.backends.signals import connection_created
+from .models import (
+    DesiKgDeger, DesiKgKargoUcret, PazaryeriKargofirma, HesaplamaKomisyonOranlari, Pazaryeri,
+    KargoFirma, HesaplamaKategoriler
+)
+from .tarife import tarifeleri_gecersiz_kil
+from .kategori_arama import arama_indekslerini_gecersiz_kil
+from .form_onbellek import form_onbellegini_gecersiz_kil
+from .utils import gecmis_baglamayi_planla
+from .sqlite_profili import sqlite_profilini_uygula
 
 @receiver(post_save, sender=get_user_model())
-def update_user_calculations_on_save(sender, instance, created, **kwargs):
+def update_user_calculations_on_save(sender, instance, created, update_fields=None, **kwargs):
     """
-    Kullanıcı kayıt olduğunda veya güncellendiğinde çalışır.
+    Kullanıcı kayıt olduğunda veya email adresi değiştiğinde misafir hesaplamalarının bağlanmasını planlar.
     """
-    link_previous_calculations(instance)
+    # Girişte yalnızca last_login güncellenir; o durum user_logged_in ile ele alınır
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    gecmis_baglamayi_planla(instance)
 
 @receiver(user_logged_in)
 def update_user_calculations_on_login(sender, user, request, **kwargs):
     """
-    Kullanıcı her giriş yaptığında çalışır.
+    Kullanıcı giriş yaptığında, bağlama daha önce yapılmadıysa planlar.
+    """
+    gecmis_baglamayi_planla(user)
+
+@receiver(post_save, sender=DesiKgDeger)
+@receiver(post_delete, sender=DesiKgDeger)
+@receiver(post_save, sender=DesiKgKargoUcret)
+@receiver(post_delete, sender=DesiKgKargoUcret)
+@receiver(post_save, sender=PazaryeriKargofirma)
+@receiver(post_delete, sender=PazaryeriKargofirma)
+def invalidate_kargo_tarifesi(sender, instance, **kwargs):
+    """
+    Tarife tablolarına yazıldığında ilgili pazar yerinin derlenmiş tarifesini geçersiz kılar.
+    Transaction tamamlanmadan yeniden derlenmemesi için on_commit kullanılır.
+    """
+    pazar_yeri_id = instance.pazar_yeri_id
+    transaction.on_commit(lambda: tarifeleri_gecersiz_kil(pazar_yeri_id))
+
+@receiver(post_save, sender=HesaplamaKomisyonOranlari)
+@receiver(post_delete, sender=HesaplamaKomisyonOranlari)
+def invalidate_kategori_arama_indeksi(sender, instance, **kwargs):
+    """
+    Komisyon oranı kaydedildiğinde veya silindiğinde ilgili pazar yerinin kategori arama indeksini geçersiz kılar.
+    """
+    pazar_yeri_id = instance.pazar_yeri_id
+    transaction.on_commit(lambda: arama_indekslerini_gecersiz_kil(pazar_yeri_id))
+
+@receiver(post_save, sender=Pazaryeri)
+def invalidate_aktif_versiyon_onbellekleri(sender, instance, created, **kwargs):
+    """
+    Pazar yeri kaydedildiğinde (ör. aktif sürüm işaretçisi elle değiştirildiğinde)
+    derlenmiş tarifeyi ve kategori arama indeksini geçersiz kılar.
+    """
+    if created:
+        return
+    pazar_yeri_id = instance.id
+    transaction.on_commit(lambda: tarifeleri_gecersiz_kil(pazar_yeri_id))
+    transaction.on_commit(lambda: arama_indekslerini_gecersiz_kil(pazar_yeri_id))
+
+@receiver(post_save, sender=Pazaryeri)
+@receiver(post_delete, sender=Pazaryeri)
+@receiver(post_save, sender=KargoFirma)
+@receiver(post_delete, sender=KargoFirma)
+@receiver(post_save, sender=HesaplamaKategoriler)
+@receiver(post_delete, sender=HesaplamaKategoriler)
+@receiver(post_save, sender=HesaplamaKomisyonOranlari)
+@receiver(post_delete, sender=HesaplamaKomisyonOranlari)
+def invalidate_form_onbellegi(sender, instance, **kwargs):
+    """
+    Form seçeneklerini besleyen tablolara yazıldığında önbellekteki form verilerini geçersiz kılar.
+    """
+    transaction.on_commit(form_onbellegini_gecersiz_kil)
+
+@receiver(connection_created)
+def apply_sqlite_profili(sender, connection, **kwargs):
+    """
+    Yeni açılan SQLite bağlantısına settings.SQLITE_PROFILI ile seçilen PRAGMA'ları uygular.
     """
-    link_previous_calculations(user) 
\ No newline at end of file
+    sqlite_profilini_uygula(connection)
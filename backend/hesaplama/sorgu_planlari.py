@@ -0,0 +1,70 @@
+"""
+Sık çalışan sorgular ve sorgu planlarında tam tablo taramalarının bulunması.
+
+Aynı sorgu listesi hem explain_sorgular yönetim komutunda hem de sorguların
+indekslerini kullandığını doğrulayan testlerde (tests.SorguPlaniTestleri) kullanılır.
+"""
+import re
+
+from django.utils import timezone
+
+from .models import (
+    DesiKgDeger, DesiKgKargoUcret, PazaryeriKargofirma, HesaplamaKategoriler,
+    HesaplamaKomisyonOranlari, KargoUcretGecmis, FiyatHesaplamaGecmisi, Hesaplamalar
+)
+
+# Sorgu planında tam tablo taramasını gösteren satırlar (SQLite: "SCAN tablo", PostgreSQL: "Seq Scan on tablo").
+# SQLite'ta indeksle arama "SEARCH" olarak görünür; "SCAN tablo USING INDEX ..." ise indeksin
+# tamamının (ör. yalnızca sıralama için) okunduğunu gösterir ve o da tam tarama sayılır.
+TAM_TARAMA_DESENLERI = [
+    re.compile(r'\bSCAN (?!CONSTANT ROW)(?P<tablo>\w+)'),
+    re.compile(r'Seq Scan on (?P<tablo>\w+)'),
+]
+
+
+def sicak_sorgular(pazar_yeri_id):
+    """
+    View'ların sık çalıştırdığı sorguları (ad, queryset) olarak döndürür
+    """
+    kategori = HesaplamaKategoriler.objects.aktif(pazar_yeri_id).first()
+    kategori_id = kategori.id if kategori else 0
+    bir_hafta_once = timezone.now() - timezone.timedelta(days=7)
+    return [
+        ('tarife: desi değerleri', DesiKgDeger.objects.aktif(pazar_yeri_id).values_list(
+            'desi_degeri', flat=True)),
+        ('tarife: kargo firmaları', PazaryeriKargofirma.objects.aktif(pazar_yeri_id).values_list(
+            'kargo_firma_id', flat=True)),
+        ('tarife: kargo ücretleri', DesiKgKargoUcret.objects.aktif(pazar_yeri_id).filter(
+            kargo_firma_id__in=[1, 2, 3]
+        ).values_list('kargo_firma_id', 'desi_kg_deger__desi_degeri', 'ucret')),
+        ('komisyon: kategori yolu seçenekleri', HesaplamaKomisyonOranlari.objects.aktif(pazar_yeri_id).order_by(
+            'kategori_yolu_metni').values_list('id', 'kategori_yolu_metni')),
+        ('komisyon: yaprak kategori oranı', HesaplamaKomisyonOranlari.objects.aktif(pazar_yeri_id).filter(
+            yaprak_kategori_id=kategori_id).values_list('komisyon_orani', flat=True)),
+        ('kategori ağacı: alt kategoriler', HesaplamaKategoriler.objects.aktif(pazar_yeri_id).filter(
+            ust_kategori_id=kategori_id).order_by('adi', 'id')),
+        ('kategori ağacı: kök kategoriler', HesaplamaKategoriler.objects.aktif(pazar_yeri_id).filter(
+            ust_kategori__isnull=True).order_by('adi', 'id')),
+        ('kategori ağacı: üst kategori yolu', HesaplamaKategoriler.objects.filter(
+            versiyon_id=kategori.versiyon_id if kategori else 0, sol__lte=1, sag__gte=1).order_by('sol')),
+        ('geçmiş: misafir kayıtlarını bağlama', KargoUcretGecmis.objects.filter(
+            email_normalize='ornek@ornek.com', kullanici__isnull=True)),
+        ('geçmiş: kullanıcının son kayıtları', KargoUcretGecmis.objects.filter(
+            kullanici_id=1).order_by('-hesaplama_tarihi')[:50]),
+        ('geçmiş: tarih aralığı', FiyatHesaplamaGecmisi.objects.filter(
+            hesaplama_tarihi__gte=bir_hafta_once).order_by('-hesaplama_tarihi')),
+        ('rapor: kullanıcı hesaplamaları', Hesaplamalar.objects.filter(
+            kullanici_id__in=[1, 2, 3]).order_by('kullanici_id', 'hesaplama_id')),
+    ]
+
+
+def tam_taramalar(plan):
+    """
+    Sorgu planında (QuerySet.explain() çıktısı) tamamı taranan tabloların adlarını döndürür
+    """
+    return [
+        eslesme.group('tablo')
+        for satir in plan.splitlines()
+        for desen in TAM_TARAMA_DESENLERI
+        if (eslesme := desen.search(satir))
+    ]
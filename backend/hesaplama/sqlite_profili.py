@@ -0,0 +1,50 @@
+"""
+Tek sunuculu kurulumlar için SQLite bağlantı profilleri.
+
+settings.SQLITE_PROFILI ile seçilen profilin PRAGMA'ları her yeni SQLite
+bağlantısı açıldığında (connection_created sinyali) uygulanır. Profil
+seçilmezse bağlantı ayarlarına dokunulmaz. journal_mode veritabanı dosyasına
+kalıcı olarak yazıldığı için WAL yalnızca bir profille açıkça seçildiğinde açılır.
+
+- klasik: SQLite'ın kendi varsayılanları (geri alma günlüğü, her commit'te tam
+  fsync). Her geçmiş kaydı yazılırken okuyucular bekler; karşılaştırma için tutulur.
+- wal: Okuyucular yazıcıyı beklemez.
+- performans: WAL ile birlikte commit başına fsync yerine checkpoint'te fsync
+  (synchronous=NORMAL; elektrik kesintisinde son commit'ler kaybolabilir ama
+  veritabanı bozulmaz), bellek eşlemeli okuma, büyük sayfa önbelleği ve kilit
+  bekleme süresi.
+"""
+from django.conf import settings
+
+SQLITE_PROFILLERI = {
+    'klasik': [
+        ('journal_mode', 'DELETE'),
+        ('synchronous', 'FULL'),
+    ],
+    'wal': [
+        ('journal_mode', 'WAL'),
+    ],
+    'performans': [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('mmap_size', 256 * 1024 * 1024),
+        # Negatif değer KiB cinsindendir (64 MB)
+        ('cache_size', -64000),
+        ('busy_timeout', 20000),
+        ('temp_store', 'MEMORY'),
+    ],
+}
+
+
+def sqlite_profilini_uygula(connection, profil=None):
+    """
+    Verilen (verilmezse settings.SQLITE_PROFILI) profilin PRAGMA'larını bağlantıya uygular
+    """
+    profil = profil or getattr(settings, 'SQLITE_PROFILI', '')
+    if not profil or connection.vendor != 'sqlite':
+        return
+    if profil not in SQLITE_PROFILLERI:
+        raise ValueError(f'Bilinmeyen SQLite profili: {profil}. Geçerli profiller: {", ".join(SQLITE_PROFILLERI)}')
+    with connection.cursor() as cursor:
+        for pragma, deger in SQLITE_PROFILLERI[profil]:
+            cursor.execute(f'PRAGMA {pragma}={deger}')
@@ -0,0 +1,85 @@
+"""
+Pazar yeri başına derlenen verilerin süreç içi (per-process) kopyaları.
+
+Derlenmiş kargo tarifeleri (tarife.py) ve kategori arama indeksleri
+(kategori_arama.py) bu yapıyı kullanır. Kopyalar süreç içinde tutulur, sürüm
+numarası ise Django cache'inde. Sürüm artırıldığında bu süreçteki kopyalar
+hemen, diğer süreçlerdekiler bir sonraki okumada temizlenir; bunun için birden
+fazla worker çalışan kurulumlarda paylaşımlı bir cache backend'i (Redis,
+Memcached) zorunludur (bkz. checks.py).
+
+- Kopyalar en fazla settings.SUREC_ONBELLEGI_MAKSIMUM_YAS saniye kullanılır; sürüm
+  bildirimi bir worker'a ulaşmasa da eski veri bu sürenin sonunda yenilenir.
+- Sürüm numarası zamandan (time.time_ns) başlatılır; anahtar cache'ten düşüp
+  yeniden oluşturulduğunda eski numaralar tekrar kullanılmaz ve sürüme bağlı
+  önbellek anahtarları (ör. fiyat matrisi) eski kayıtlarla çakışmaz.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VARSAYILAN_MAKSIMUM_YAS = 60
+
+
+class SurecOnbellegi:
+    """
+    {pazar_yeri_id: derlenmiş veri} kopyaları ve cache'teki sürüm numarası
+    """
+
+    def __init__(self, surum_anahtari):
+        self.surum_anahtari = surum_anahtari
+        self._kilit = threading.Lock()
+        self._kopyalar = {}
+        self._yerel_surum = None
+        self._temizlenme_zamani = time.monotonic()
+
+    def surum(self):
+        """
+        Güncel sürüm numarasını döndürür; bu veriye bağlı önbellek anahtarlarında kullanılır
+        """
+        return cache.get_or_set(self.surum_anahtari, time.time_ns, None)
+
+    def _surumu_kontrol_et(self):
+        """
+        Cache'teki sürüm değiştiyse veya kopyalar maksimum yaşı aştıysa yerel kopyaları temizler
+        """
+        surum = self.surum()
+        maksimum_yas = getattr(settings, 'SUREC_ONBELLEGI_MAKSIMUM_YAS', VARSAYILAN_MAKSIMUM_YAS)
+        if surum != self._yerel_surum or time.monotonic() - self._temizlenme_zamani > maksimum_yas:
+            self._kopyalar.clear()
+            self._yerel_surum = surum
+            self._temizlenme_zamani = time.monotonic()
+
+    def getir(self, pazar_yeri_idleri, derle):
+        """
+        Pazar yerlerinin kopyalarını {pazar_yeri_id: veri} olarak döndürür. Yerel kopyası
+        olmayanlar derle(eksik_idler) ile ({pazar_yeri_id: veri} döndürür) tek seferde derlenir.
+        """
+        with self._kilit:
+            self._surumu_kontrol_et()
+            eksikler = [pazar_yeri_id for pazar_yeri_id in dict.fromkeys(pazar_yeri_idleri)
+                        if pazar_yeri_id not in self._kopyalar]
+            if eksikler:
+                self._kopyalar.update(derle(eksikler))
+            return {pazar_yeri_id: self._kopyalar[pazar_yeri_id] for pazar_yeri_id in pazar_yeri_idleri}
+
+    def gecersiz_kil(self, pazar_yeri_id=None):
+        """
+        Sürümü artırıp kopyaları geçersiz kılar; pazar_yeri_id verilmezse hepsini temizler
+        """
+        try:
+            surum = cache.incr(self.surum_anahtari)
+        except ValueError:
+            surum = time.time_ns()
+            cache.set(self.surum_anahtari, surum, None)
+
+        with self._kilit:
+            # Arada başka bir süreç de sürümü artırdıysa tüm kopyaları temizle
+            if pazar_yeri_id is None or self._yerel_surum is None or surum != self._yerel_surum + 1:
+                self._kopyalar.clear()
+                self._temizlenme_zamani = time.monotonic()
+            else:
+                self._kopyalar.pop(pazar_yeri_id, None)
+            self._yerel_surum = surum
@@ -0,0 +1,280 @@
+"""
+Kargo tarifelerinin süreç içi (per-process) derlenmiş hali.
+
+Her pazar yeri için DesiKgDeger, PazaryeriKargofirma ve DesiKgKargoUcret
+tablolarının aktif sürümü bir kez okunur; (pazar_yeri_id, kargo_firma_id)
+çifti başına sıralı desi kırılımları ve ücretleri tutulur. Böylece fiyat
+sorguları veritabanına gitmeden ikili arama (bisect) ile cevaplanır.
+
+Desi/kg değerinden tarife basamağına tek bir kural ile geçilir (basamak_bul):
+- Değer, pazar yerinin DesiKgDeger kırılımlarından kendisine eşit veya büyük
+  olan ilkine yuvarlanır; ondalıklı değerler ve kırılım aralıkları böylece
+  aynı şekilde çözülür.
+- En yüksek kırılımı aşan değerlerde basamak en yüksek kırılımdır ve aşan kısım
+  yukarı yuvarlanmış kg olarak tutulur. Kargo ücreti, firmanın son iki
+  kırılımından derleme sırasında hesaplanan kg başı ücretle uzatılır.
+
+Tablolara yazıldığında signals.py üzerinden, yeni sürüm etkinleştirildiğinde
+versiyonlar.py üzerinden tarifeler geçersiz kılınır (bkz. surec_onbellegi.py).
+"""
+import bisect
+import math
+from decimal import Decimal
+from typing import NamedTuple
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS
+
+from .fiyatlama import kurusa_yuvarla
+from .models import DesiKgDeger, DesiKgKargoUcret, PazaryeriKargofirma
+from .surec_onbellegi import SurecOnbellegi
+
+TARIFE_SURUM_ANAHTARI = 'hesaplama:kargo_tarife_surumu'
+
+# Hacimsel desi = en * boy * yükseklik (cm) / DESI_BOLENI
+DESI_BOLENI = 3000
+
+_tarifeler = SurecOnbellegi(TARIFE_SURUM_ANAHTARI)
+
+
+class DesiBasamagi(NamedTuple):
+    """
+    Bir desi/kg değerinin karşılık geldiği tarife basamağı.
+    desi_degeri pazar yerindeki kırılımdır; en yüksek kırılım aşıldıysa asim_kg aşan kg sayısıdır.
+    """
+    desi_degeri: float
+    asim_kg: int = 0
+
+    @property
+    def yuvarlanmis_desi_kg(self):
+        """
+        Ücretin hesaplandığı desi/kg değeri; tam sayı kırılımlarda int döner
+        """
+        deger = self.desi_degeri + self.asim_kg
+        return int(deger) if float(deger).is_integer() else deger
+
+
+def _basamak_bul(basamaklar, desi_kg):
+    """
+    Sıralı kırılımlarda desi_kg değerinin basamağını bulur, kırılım yoksa None
+    """
+    if not basamaklar:
+        return None
+    desi_kg = float(desi_kg)
+    index = bisect.bisect_left(basamaklar, desi_kg)
+    if index < len(basamaklar):
+        return DesiBasamagi(basamaklar[index])
+    return DesiBasamagi(basamaklar[-1], math.ceil(desi_kg - basamaklar[-1]))
+
+
+class KargoTarifesi:
+    """
+    Bir pazar yeri - kargo firma çifti için sıralı desi kırılımları ve ücretleri.
+
+    basamaklar pazar yerinin tüm kırılımlarıdır; firmanın ücreti tanımlı olmayan
+    basamaklarda tarife bulunamaz. kg_basi_ucret, firma pazar yerinin en yüksek
+    kırılımında ücret tanımladıysa son iki kırılımın kg başı ücret farkıdır
+    (azalan veya tanımsızsa None, bu durumda en yüksek kırılım aşılamaz).
+    """
+    __slots__ = (
+        'pazar_yeri_id', 'kargo_firma_id', 'desi_degerleri', 'ucretler',
+        'basamaklar', 'kg_basi_ucret', '_basamak_dizisi', '_ucret_dizisi'
+    )
+
+    def __init__(self, pazar_yeri_id, kargo_firma_id, satirlar, basamaklar=None):
+        satirlar = sorted(satirlar)
+        self.pazar_yeri_id = pazar_yeri_id
+        self.kargo_firma_id = kargo_firma_id
+        self.desi_degerleri = [desi for desi, _ in satirlar]
+        self.ucretler = [ucret for _, ucret in satirlar]
+        self.basamaklar = self.desi_degerleri if basamaklar is None else basamaklar
+
+        self.kg_basi_ucret = None
+        if len(satirlar) > 1 and self.basamaklar and self.desi_degerleri[-1] == self.basamaklar[-1]:
+            kg_basi_ucret = (self.ucretler[-1] - self.ucretler[-2]) / Decimal(
+                str(self.desi_degerleri[-1] - self.desi_degerleri[-2])
+            )
+            if kg_basi_ucret >= 0:
+                self.kg_basi_ucret = kg_basi_ucret
+
+        # Vektörel arama için ücretler pazar yeri basamaklarına hizalanır (tanımsız basamak NaN)
+        self._basamak_dizisi = np.asarray(self.basamaklar, dtype=np.float64)
+        self._ucret_dizisi = np.full(len(self.basamaklar), np.nan)
+        for desi_degeri, ucret in satirlar:
+            index = bisect.bisect_left(self.basamaklar, desi_degeri)
+            if index < len(self.basamaklar) and self.basamaklar[index] == desi_degeri:
+                self._ucret_dizisi[index] = float(ucret)
+
+    def ucret_bul(self, desi_degeri):
+        """
+        Verilen desi/kg kırılımına karşılık gelen ücreti döndürür, yoksa None
+        """
+        index = bisect.bisect_left(self.desi_degerleri, desi_degeri)
+        if index < len(self.desi_degerleri) and self.desi_degerleri[index] == desi_degeri:
+            return self.ucretler[index]
+        return None
+
+    def basamak_ucreti(self, basamak):
+        """
+        DesiBasamagi için ücreti döndürür; en yüksek kırılımın üzeri kg başı ücretle uzatılır.
+        Ücret tanımlı değilse None döner.
+        """
+        if basamak is None:
+            return None
+        if not basamak.asim_kg:
+            return self.ucret_bul(basamak.desi_degeri)
+        if self.kg_basi_ucret is None:
+            return None
+        return kurusa_yuvarla(self.ucretler[-1] + self.kg_basi_ucret * basamak.asim_kg)
+
+    def basamak_bul(self, desi_kg):
+        """
+        Desi/kg değerinin pazar yeri kırılımlarındaki basamağını döndürür
+        """
+        return _basamak_bul(self.basamaklar, desi_kg)
+
+    def ucretleri_bul(self, desi_kg_degerleri):
+        """
+        Desi/kg değerleri dizisi için (ücretler, bulundu) NumPy dizilerini basamak_bul ile
+        aynı kurala göre döndürür. Tarifesi olmayan değerlerin ücreti 0, bulundu değeri False olur.
+        """
+        aranan = np.asarray(desi_kg_degerleri, dtype=np.float64)
+        if not self.desi_degerleri:
+            return np.zeros(aranan.shape), np.zeros(aranan.shape, dtype=bool)
+        index = np.searchsorted(self._basamak_dizisi, aranan)
+        asim = index == len(self._basamak_dizisi)
+        ucretler = self._ucret_dizisi[np.minimum(index, len(self._basamak_dizisi) - 1)]
+        if self.kg_basi_ucret is None:
+            ucretler = np.where(asim, np.nan, ucretler)
+        elif asim.any():
+            # Uzatılan ücretler basamak_ucreti ile birebir aynı olsun diye farklı aşım değerleri Decimal ile hesaplanır
+            asim_kg, ters = np.unique(np.ceil(aranan[asim] - self._basamak_dizisi[-1]), return_inverse=True)
+            uzatilan = np.asarray([
+                float(self.basamak_ucreti(DesiBasamagi(self.basamaklar[-1], int(kg)))) for kg in asim_kg
+            ])
+            ucretler = np.array(ucretler, dtype=np.float64)
+            ucretler[asim] = uzatilan[ters]
+        bulundu = ~np.isnan(ucretler)
+        return np.where(bulundu, ucretler, 0), bulundu
+
+
+class PazarYeriTarifesi:
+    """
+    Bir pazar yerinin desi kırılımları ve hizmet veren kargo firmalarının tarifeleri
+    """
+    __slots__ = ('pazar_yeri_id', 'desi_degerleri', 'kargo_tarifeleri')
+
+    def __init__(self, pazar_yeri_id, desi_degerleri, kargo_tarifeleri):
+        self.pazar_yeri_id = pazar_yeri_id
+        self.desi_degerleri = desi_degerleri
+        self.kargo_tarifeleri = kargo_tarifeleri
+
+    def basamak_bul(self, desi_kg):
+        """
+        Desi/kg değerinin tarife basamağını döndürür; pazar yerinde kırılım yoksa None
+        """
+        return _basamak_bul(self.desi_degerleri, desi_kg)
+
+    def kargo_ucretleri(self, basamak):
+        """
+        Verilen DesiBasamagi'nda ücreti tanımlı kargo firmalarının (kargo_firma_id, ücret)
+        listesini ucuzdan pahalıya döndürür
+        """
+        ucretler = []
+        for kargo_firma_id, kargo_tarifesi in self.kargo_tarifeleri.items():
+            ucret = kargo_tarifesi.basamak_ucreti(basamak)
+            if ucret is not None:
+                ucretler.append((kargo_firma_id, ucret))
+        return sorted(ucretler, key=lambda satir: (satir[1], satir[0]))
+
+
+def desi_kg_hesapla(en, boy, yukseklik, net_agirlik=0):
+    """
+    Ürün ölçülerinden (cm) hacimsel desiyi ve kullanılacak desi/kg değerini
+    (hacimsel desi ile net ağırlığın büyüğü) döndürür
+    """
+    desi = (en * boy * yukseklik) / DESI_BOLENI
+    return desi, max(desi, net_agirlik)
+
+
+def _pazar_yeri_tarifelerini_derle(pazar_yeri_idleri):
+    """
+    Pazar yerlerinin tarife tablolarını (pazar yeri sayısından bağımsız olarak) üç sorguda
+    okuyup {pazar_yeri_id: derlenmiş tarife} sözlüğünü oluşturur.
+    Derlenen tarife süreç içinde önbelleğe alındığı için replikadan değil, birincil
+    veritabanından okunur; gecikmeli bir replikadan eski tarife derlenmez.
+    """
+    if len(pazar_yeri_idleri) == 1:
+        # Tek pazar yerinde aktif sürüm alt sorguyla çözülür; sorgular versiyon indekslerini kullanır
+        def aktif(model):
+            return model.objects.using(DEFAULT_DB_ALIAS).aktif(pazar_yeri_idleri[0])
+    else:
+        def aktif(model):
+            return model.objects.using(DEFAULT_DB_ALIAS).aktif().filter(pazar_yeri_id__in=pazar_yeri_idleri)
+
+    desi_degerleri = {pazar_yeri_id: set() for pazar_yeri_id in pazar_yeri_idleri}
+    for pazar_yeri_id, desi_degeri in aktif(DesiKgDeger).values_list('pazar_yeri_id', 'desi_degeri'):
+        desi_degerleri[pazar_yeri_id].add(desi_degeri)
+
+    satirlar = {pazar_yeri_id: {} for pazar_yeri_id in pazar_yeri_idleri}
+    for pazar_yeri_id, kargo_firma_id in aktif(PazaryeriKargofirma).values_list('pazar_yeri_id', 'kargo_firma_id'):
+        satirlar[pazar_yeri_id][kargo_firma_id] = []
+
+    ucretler = aktif(DesiKgKargoUcret).values_list(
+        'pazar_yeri_id', 'kargo_firma_id', 'desi_kg_deger__desi_degeri', 'ucret'
+    )
+
+    # Aynı desi değeri için birden fazla satır varsa ilk kaydı kullan (.first() davranışı)
+    gorulen = set()
+    for pazar_yeri_id, kargo_firma_id, desi_degeri, ucret in ucretler.order_by('id'):
+        firma_satirlari = satirlar[pazar_yeri_id].get(kargo_firma_id)
+        if firma_satirlari is None or (pazar_yeri_id, kargo_firma_id, desi_degeri) in gorulen:
+            continue
+        gorulen.add((pazar_yeri_id, kargo_firma_id, desi_degeri))
+        firma_satirlari.append((desi_degeri, ucret))
+
+    tarifeler = {}
+    for pazar_yeri_id in pazar_yeri_idleri:
+        basamaklar = sorted(desi_degerleri[pazar_yeri_id])
+        tarifeler[pazar_yeri_id] = PazarYeriTarifesi(pazar_yeri_id, basamaklar, {
+            kargo_firma_id: KargoTarifesi(pazar_yeri_id, kargo_firma_id, firma_satirlari, basamaklar)
+            for kargo_firma_id, firma_satirlari in satirlar[pazar_yeri_id].items()
+        })
+    return tarifeler
+
+
+def pazar_yeri_tarifelerini_getir(pazar_yeri_idleri):
+    """
+    Pazar yerlerinin derlenmiş tarifelerini {pazar_yeri_id: tarife} olarak döndürür.
+    Yerel kopyası olmayanlar birlikte, tek seferde derlenir.
+    """
+    return _tarifeler.getir(pazar_yeri_idleri, _pazar_yeri_tarifelerini_derle)
+
+
+def pazar_yeri_tarifesi_getir(pazar_yeri_id):
+    """
+    Pazar yerinin derlenmiş tarifesini döndürür, gerekirse veritabanından derler
+    """
+    return pazar_yeri_tarifelerini_getir([pazar_yeri_id])[pazar_yeri_id]
+
+
+def kargo_tarifesi_getir(pazar_yeri_id, kargo_firma_id):
+    """
+    (pazar_yeri_id, kargo_firma_id) çiftinin tarifesini döndürür.
+    Kargo firması pazar yerine hizmet vermiyorsa None döner.
+    """
+    return pazar_yeri_tarifesi_getir(pazar_yeri_id).kargo_tarifeleri.get(kargo_firma_id)
+
+
+def tarife_surumu():
+    """
+    Tarifelerin güncel sürüm numarasını döndürür; tarifeye bağlı önbellek anahtarlarında kullanılır
+    """
+    return _tarifeler.surum()
+
+
+def tarifeleri_gecersiz_kil(pazar_yeri_id=None):
+    """
+    Derlenmiş tarifeleri geçersiz kılar; pazar_yeri_id verilmezse hepsini temizler
+    """
+    _tarifeler.gecersiz_kil(pazar_yeri_id)
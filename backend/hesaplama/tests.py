@@ -1,3 +1,462 @@
-from django.test import TestCase
-
-# Create your tests here.
+import itertools
+import os
+import queue
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .fiyat_matrisi import fiyat_matrisi_getir
+from .fiyatlama import kurusa_yuvarla, kurustan_decimal, satis_fiyati_hesapla, satis_fiyatlari_hesapla
+from .form_onbellek import form_onbellegini_gecersiz_kil
+from .gecmis_kaydedici import GecmisKaydedici
+from .kategori_arama import arama_indekslerini_gecersiz_kil
+from .models import (
+    DesiKgDeger, DesiKgKargoUcret, FiyatHesaplamaGecmisi, HesaplamaDesiKgGecmisi, HesaplamaKategoriler,
+    HesaplamaKomisyonOranlari, Hesaplamalar, KargoFirma, KargoUcretGecmis, Pazaryeri, PazaryeriKargofirma,
+    VeriVersiyonu
+)
+from .sorgu_planlari import sicak_sorgular, tam_taramalar
+from .surec_onbellegi import SurecOnbellegi
+from .tarife import tarifeleri_gecersiz_kil
+from .versiyonlar import versiyonu_etkinlestir
+
+FIYAT_ALANLARI = ('satis_fiyati', 'kdv_dahil_satis_fiyati', 'komisyon_bedeli', 'kar_bedeli', 'stopaj_bedeli')
+
+
+class FiyatlamaEslikTestleri(SimpleTestCase):
+    """
+    satis_fiyati_hesapla (Decimal) ile satis_fiyatlari_hesapla (NumPy) aynı sonucu vermeli
+    """
+
+    def assertEsit(self, satirlar):
+        sutunlar = list(zip(*satirlar))
+        fiyatlar = satis_fiyatlari_hesapla(*sutunlar)
+        for index, satir in enumerate(satirlar):
+            with self.subTest(satir=satir):
+                try:
+                    beklenen = satis_fiyati_hesapla(*satir)
+                except ValueError:
+                    self.assertFalse(fiyatlar['gecerli'][index])
+                    continue
+                self.assertTrue(fiyatlar['gecerli'][index])
+                for alan in FIYAT_ALANLARI:
+                    self.assertEqual(kurustan_decimal(fiyatlar[alan][index]), getattr(beklenen, alan), alan)
+
+    def test_girdi_izgarasi(self):
+        satirlar = list(itertools.product(
+            [Decimal('0'), Decimal('0.01'), Decimal('19.99'), Decimal('1234.56')],
+            [Decimal('0'), Decimal('45.90')],
+            [Decimal('0'), Decimal('2.50')],
+            [Decimal('0'), Decimal('8.49')],
+            [Decimal('0'), Decimal('12.75'), Decimal('21.5')],
+            [Decimal('0'), Decimal('15'), Decimal('33.33')],
+            [Decimal('0'), Decimal('10'), Decimal('20')],
+            [Decimal('1')],
+        ))
+        self.assertEsit(satirlar)
+
+    def test_rastgele_girdiler(self):
+        rastgele = np.random.default_rng(0)
+
+        def iki_basamak(en_fazla):
+            return Decimal(int(rastgele.integers(0, en_fazla * 100))).scaleb(-2)
+
+        satirlar = [
+            (iki_basamak(5000), iki_basamak(300), iki_basamak(50), iki_basamak(10),
+             iki_basamak(40), iki_basamak(60), iki_basamak(25), Decimal('1'))
+            for _ in range(2000)
+        ]
+        self.assertEsit(satirlar)
+
+    def test_yarim_kurus_yukari_yuvarlanir(self):
+        # 0.02 TL / (1 - 0.20) = 0.025 TL: ROUND_HALF_UP ile 0.03, bankacı yuvarlamasıyla 0.02 olurdu
+        satir = (Decimal('0.02'), Decimal('0'), Decimal('0'), Decimal('0'),
+                 Decimal('10'), Decimal('9'), Decimal('0'), Decimal('1'))
+        self.assertEqual(satis_fiyati_hesapla(*satir).satis_fiyati, Decimal('0.03'))
+        self.assertEqual(int(satis_fiyatlari_hesapla(*satir)['satis_fiyati']), 3)
+        self.assertEsit([satir])
+
+    def test_iki_basamaktan_fazla_girdiler(self):
+        # Girdiler önce iki basamağa ROUND_HALF_UP ile yuvarlanır; Decimal ve float girdiler aynı sonucu verir
+        satirlar = [
+            (Decimal('10.005'), Decimal('45.999'), Decimal('2.504'), Decimal('0'),
+             Decimal('12.345'), Decimal('15.555'), Decimal('20.005'), Decimal('1')),
+            (Decimal('0.125'), Decimal('1.115'), Decimal('0.005'), Decimal('8.49'),
+             Decimal('18.125'), Decimal('9.995'), Decimal('18'), Decimal('1')),
+        ]
+        self.assertEsit(satirlar)
+        for satir in satirlar:
+            yuvarlanmis = [kurusa_yuvarla(deger) for deger in satir]
+            self.assertEqual(satis_fiyati_hesapla(*satir), satis_fiyati_hesapla(*yuvarlanmis))
+            vektorel = satis_fiyatlari_hesapla(*[np.asarray([float(deger)]) for deger in satir])
+            self.assertEqual(kurustan_decimal(vektorel['satis_fiyati'][0]), satis_fiyati_hesapla(*satir).satis_fiyati)
+
+    def test_oranlar_toplami_100_ise_gecersiz(self):
+        satir = (Decimal('100'), Decimal('10'), Decimal('5'), Decimal('0'),
+                 Decimal('40'), Decimal('59'), Decimal('20'), Decimal('1'))
+        with self.assertRaises(ValueError):
+            satis_fiyati_hesapla(*satir)
+        sinirda = (*satir[:5], Decimal('58.99'), *satir[6:])
+        fiyatlar = satis_fiyatlari_hesapla(*zip(satir, sinirda))
+        self.assertEqual(fiyatlar['gecerli'].tolist(), [False, True])
+        self.assertEqual(int(fiyatlar['satis_fiyati'][0]), 0)
+        self.assertEsit([satir, (*satir[:5], Decimal('60'), *satir[6:])])
+
+    def test_sonuclar_kurusa_yuvarlanir_kdv_yuvarlanmamis_fiyattan(self):
+        # Tek ürün sonuçları kuruşa yuvarlanır, KDV dahil fiyat ise yuvarlanmamış satış fiyatından
+        # hesaplanır: 1.11 / 0.99 = 1.1212... -> 1.12; KDV dahil 1.1212... * 1.2 = 1.3454... -> 1.35
+        # (yuvarlanmış fiyattan hesaplansaydı 1.12 * 1.2 = 1.344 -> 1.34 olurdu)
+        fiyat = satis_fiyati_hesapla(Decimal('1.11'), Decimal('0'), Decimal('0'), Decimal('0'),
+                                     Decimal('0'), Decimal('0'), Decimal('20'), Decimal('1'))
+        self.assertEqual(fiyat.satis_fiyati, Decimal('1.12'))
+        self.assertEqual(fiyat.kdv_dahil_satis_fiyati, Decimal('1.35'))
+        self.assertEqual(fiyat.stopaj_bedeli, Decimal('0.01'))
+
+
+class VersiyonluModelTestleri(TestCase):
+    """
+    Etkinleştirilmiş sürümler değişmez; tek kayıt değişiklikleri aktif sürümün kopyasına yazılır
+    """
+
+    def setUp(self):
+        self.pazar_yeri = Pazaryeri.objects.create(pazar_ismi='Test')
+        self.firma = KargoFirma.objects.create(firma_ismi='Test Kargo')
+        self.versiyon = VeriVersiyonu.objects.create(pazar_yeri=self.pazar_yeri, tur=VeriVersiyonu.KARGO)
+        self.desi = DesiKgDeger.objects.create(pazar_yeri=self.pazar_yeri, versiyon=self.versiyon, desi_degeri=1)
+        self.ucret = DesiKgKargoUcret.objects.create(
+            pazar_yeri=self.pazar_yeri, versiyon=self.versiyon, desi_kg_deger=self.desi,
+            kargo_firma=self.firma, ucret=Decimal('10.00')
+        )
+        versiyonu_etkinlestir(self.versiyon)
+
+    def aktif_versiyon_id(self):
+        self.pazar_yeri.refresh_from_db()
+        return self.pazar_yeri.aktif_kargo_versiyonu_id
+
+    def test_taslak_surum_yerinde_degisir(self):
+        taslak = VeriVersiyonu.objects.create(pazar_yeri=self.pazar_yeri, tur=VeriVersiyonu.KARGO)
+        desi = DesiKgDeger.objects.create(pazar_yeri=self.pazar_yeri, versiyon=taslak, desi_degeri=2)
+        desi.desi_degeri = 3
+        desi.save()
+        self.assertEqual(desi.versiyon_id, taslak.id)
+        self.assertEqual(self.aktif_versiyon_id(), self.versiyon.id)
+
+    def test_aktif_surum_kaydi_kopyaya_yazilir(self):
+        self.ucret.ucret = Decimal('12.00')
+        self.ucret.save()
+
+        yeni_versiyon_id = self.aktif_versiyon_id()
+        self.assertNotEqual(yeni_versiyon_id, self.versiyon.id)
+        self.assertEqual(DesiKgKargoUcret.objects.get(versiyon=self.versiyon).ucret, Decimal('10.00'))
+        kopya = DesiKgKargoUcret.objects.get(versiyon_id=yeni_versiyon_id)
+        self.assertEqual(kopya.id, self.ucret.id)
+        self.assertEqual(kopya.ucret, Decimal('12.00'))
+        self.assertEqual(kopya.desi_kg_deger.versiyon_id, yeni_versiyon_id)
+
+        # Geri dönüşte içe aktarılan veri aynen gelir
+        versiyonu_etkinlestir(self.versiyon)
+        self.assertEqual(DesiKgKargoUcret.objects.aktif(self.pazar_yeri.id).get().ucret, Decimal('10.00'))
+
+    def test_aktif_surumden_silme_kopyada_yapilir(self):
+        DesiKgKargoUcret.objects.aktif(self.pazar_yeri.id).delete()
+        self.assertFalse(DesiKgKargoUcret.objects.aktif(self.pazar_yeri.id).exists())
+        self.assertTrue(DesiKgKargoUcret.objects.filter(versiyon=self.versiyon).exists())
+
+    def test_eski_surum_degistirilemez(self):
+        eski_kayit = DesiKgKargoUcret.objects.get(id=self.ucret.id)
+        self.ucret.ucret = Decimal('12.00')
+        self.ucret.save()
+        with self.assertRaises(PermissionDenied):
+            eski_kayit.save()
+        with self.assertRaises(PermissionDenied):
+            DesiKgKargoUcret.objects.filter(versiyon=self.versiyon).delete()
+
+    @override_settings(VERI_VERSIYONU_SAKLAMA_SAYISI=2)
+    def test_degisiklik_basina_tek_surum_ve_eski_surumler_temizlenir(self):
+        for i in range(5):
+            onceki_sayi = VeriVersiyonu.objects.count()
+            ucret = DesiKgKargoUcret.objects.aktif(self.pazar_yeri.id).get()
+            ucret.ucret = Decimal('11.00') + i
+            ucret.save()
+            # Yeni kopya eklenir, saklama sınırını aşan en eski sürüm silinir
+            self.assertLessEqual(VeriVersiyonu.objects.count(), onceki_sayi + 1)
+
+        eskiler = VeriVersiyonu.objects.filter(pazar_yeri=self.pazar_yeri).exclude(id=self.aktif_versiyon_id())
+        self.assertEqual(eskiler.count(), 2)
+        self.assertFalse(VeriVersiyonu.objects.filter(id=self.versiyon.id).exists())
+        self.assertEqual(DesiKgKargoUcret.objects.count(), 3)
+        self.assertEqual(DesiKgKargoUcret.objects.aktif(self.pazar_yeri.id).get().ucret, Decimal('15.00'))
+
+
+@override_settings(HESAPLAMA_GECMIS_ARKA_PLANDA=True)
+class GecmisKaydediciTestleri(TestCase):
+    """
+    Kuyruğa bırakılan geçmiş kayıtları boşaltmada veya kuyruk doluyken doğrudan yazılmalı
+    """
+
+    def setUp(self):
+        self.kullanici = User.objects.create_user('test', 'test@example.com')
+        # Yazıcı thread'i yerine kuyruğu tüketmeyen bir thread; kayıtlar yalnızca bosalt() ile yazılır
+        self.kaydedici = GecmisKaydedici(maksimum_tampon=2)
+        self.kaydedici._pid = os.getpid()
+        self.kaydedici._kuyruk = queue.Queue(maxsize=2)
+        self.kaydedici._durdur = threading.Event()
+        self.kaydedici._thread = threading.Thread(target=self.kaydedici._durdur.wait, daemon=True)
+        self.kaydedici._thread.start()
+        self.addCleanup(self.kaydedici._durdur.set)
+
+    def gecmis(self, desi_kg):
+        return HesaplamaDesiKgGecmisi(
+            kullanici=self.kullanici, email=self.kullanici.email,
+            en=10, boy=10, yukseklik=10, net_agirlik=1, desi_kg=desi_kg
+        )
+
+    def test_kuyruktaki_kayitlar_bosaltmada_yazilir(self):
+        self.kaydedici.kaydet(self.gecmis(1))
+        self.kaydedici.kaydet(self.gecmis(2))
+        self.assertFalse(HesaplamaDesiKgGecmisi.objects.exists())
+
+        kuyruga_alinma = timezone.now()
+        with mock.patch('django.utils.timezone.now', return_value=kuyruga_alinma + timedelta(minutes=5)):
+            self.kaydedici.bosalt()
+
+        kayitlar = HesaplamaDesiKgGecmisi.objects.order_by('desi_kg')
+        self.assertEqual([kayit.desi_kg for kayit in kayitlar], [1, 2])
+        # Tarih yazma anı değil kuyruğa alınma anıdır
+        for kayit in kayitlar:
+            self.assertLessEqual(kayit.hesaplama_tarihi, kuyruga_alinma)
+
+    def test_kuyruk_doluysa_dogrudan_yazilir(self):
+        self.kaydedici.kaydet(self.gecmis(1))
+        self.kaydedici.kaydet(self.gecmis(2))
+        with self.assertLogs('hesaplama.gecmis_kaydedici', 'WARNING'):
+            self.kaydedici.kaydet(self.gecmis(3))
+        self.assertEqual(list(HesaplamaDesiKgGecmisi.objects.values_list('desi_kg', flat=True)), [3])
+
+        self.kaydedici.bosalt()
+        self.assertEqual(HesaplamaDesiKgGecmisi.objects.count(), 3)
+
+    def test_bosaltma_sonradan_gelen_kayitlari_beklemez(self):
+        self.kaydedici.kaydet(self.gecmis(1))
+        yaz = self.kaydedici._yaz
+
+        def yazarken_yeni_kayit_gelir(parti):
+            # Boşaltma sürerken başka bir thread'in kuyruğa aldığı, henüz yazılmamış kayıt
+            self.kaydedici._sira_al()
+            yaz(parti)
+
+        with mock.patch.object(self.kaydedici, '_yaz', yazarken_yeni_kayit_gelir):
+            self.assertTrue(self.kaydedici.bosalt(zaman_asimi=0.1))
+        self.assertEqual(HesaplamaDesiKgGecmisi.objects.count(), 1)
+
+        # Çağrıdan önce kuyruğa alınıp yazılmamış kayıt ise beklenir
+        self.assertFalse(self.kaydedici.bosalt(zaman_asimi=0.1))
+
+
+class SorguPlaniTestleri(TestCase):
+    """
+    Sık çalışan sorgular (bkz. sorgu_planlari.sicak_sorgular) tam tablo taraması yapmamalı
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        kullanici = User.objects.create_user('test', 'test@example.com')
+        firma = KargoFirma.objects.create(firma_ismi='Test Kargo')
+        cls.pazar_yeri = Pazaryeri.objects.create(pazar_ismi='Test')
+
+        kargo = VeriVersiyonu.objects.create(pazar_yeri=cls.pazar_yeri, tur=VeriVersiyonu.KARGO)
+        PazaryeriKargofirma.objects.create(pazar_yeri=cls.pazar_yeri, versiyon=kargo, kargo_firma=firma)
+        for desi in range(1, 6):
+            desi_kg = DesiKgDeger.objects.create(pazar_yeri=cls.pazar_yeri, versiyon=kargo, desi_degeri=desi)
+            DesiKgKargoUcret.objects.create(
+                pazar_yeri=cls.pazar_yeri, versiyon=kargo, desi_kg_deger=desi_kg, kargo_firma=firma, ucret=desi * 10
+            )
+        versiyonu_etkinlestir(kargo)
+
+        komisyon = VeriVersiyonu.objects.create(pazar_yeri=cls.pazar_yeri, tur=VeriVersiyonu.KOMISYON)
+        kok = HesaplamaKategoriler.objects.create(
+            pazar_yeri=cls.pazar_yeri, versiyon=komisyon, adi='Elektronik', seviye=1, sol=1, sag=4, alt_kategori_sayisi=1
+        )
+        alt = HesaplamaKategoriler.objects.create(
+            pazar_yeri=cls.pazar_yeri, versiyon=komisyon, adi='Telefon', seviye=2, ust_kategori=kok, sol=2, sag=3
+        )
+        HesaplamaKomisyonOranlari.objects.create(
+            pazar_yeri=cls.pazar_yeri, versiyon=komisyon, kategori_1=kok, kategori_2=alt, komisyon_orani=Decimal('15'),
+            gecerlilik_tarihi=timezone.now().date()
+        )
+        versiyonu_etkinlestir(komisyon)
+
+        for sahibi in (kullanici, None):
+            KargoUcretGecmis.objects.create(
+                kullanici=sahibi, email='test@example.com', desi_kg_degeri=1, yuvarlanmis_desi_kg=1,
+                pazar_yeri=cls.pazar_yeri, kargo_firma=firma, kargo_ucreti=10
+            )
+            FiyatHesaplamaGecmisi.objects.create(
+                kullanici=sahibi, email='test@example.com', pazar_yeri=cls.pazar_yeri, kargo_firma=firma,
+                urun_maliyeti=100, paketleme_bedeli=0, hizmet_bedeli=0, urun_desi_kg=1, kargo_ucreti=10,
+                komisyon_orani=15, stopaj_orani=1, stopaj_bedeli=2, satis_fiyati=150, kdv_dahil_satis_fiyati=180
+            )
+            Hesaplamalar.objects.create(kullanici=sahibi, toplam_fiyat=100)
+
+    def test_sicak_sorgular_indeks_kullanir(self):
+        if connection.vendor == 'postgresql':
+            # Küçük tablolarda PostgreSQL indeks olsa da sıralı taramayı seçer; kalan taramalar indekssizdir
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for ad, sorgu in sicak_sorgular(self.pazar_yeri.id):
+            with self.subTest(sorgu=ad):
+                plan = sorgu.explain()
+                self.assertEqual(tam_taramalar(plan), [], plan)
+
+
+@override_settings(HESAPLAMA_GECMIS_ARKA_PLANDA=False)
+class HesaplamaSorguSayisiTestleri(TestCase):
+    """
+    Hesaplama endpoint'lerinin önbellekler ısındıktan sonraki istek başına sorgu sayısı
+    (geçmiş kaydının INSERT'ü dahil). Gecikme ölçümleri benchmark_hesaplama komutundadır;
+    buradaki sınırlar sorgu sayısındaki gerilemeleri test sırasında yakalar.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.firma = KargoFirma.objects.create(firma_ismi='Test Kargo')
+        cls.pazar_yeri = Pazaryeri.objects.create(pazar_ismi='Test')
+
+        kargo = VeriVersiyonu.objects.create(pazar_yeri=cls.pazar_yeri, tur=VeriVersiyonu.KARGO)
+        PazaryeriKargofirma.objects.create(pazar_yeri=cls.pazar_yeri, versiyon=kargo, kargo_firma=cls.firma)
+        for desi in range(1, 6):
+            desi_kg = DesiKgDeger.objects.create(pazar_yeri=cls.pazar_yeri, versiyon=kargo, desi_degeri=desi)
+            DesiKgKargoUcret.objects.create(
+                pazar_yeri=cls.pazar_yeri, versiyon=kargo, desi_kg_deger=desi_kg, kargo_firma=cls.firma,
+                ucret=desi * 10
+            )
+        versiyonu_etkinlestir(kargo)
+
+        komisyon = VeriVersiyonu.objects.create(pazar_yeri=cls.pazar_yeri, tur=VeriVersiyonu.KOMISYON)
+        kok = HesaplamaKategoriler.objects.create(
+            pazar_yeri=cls.pazar_yeri, versiyon=komisyon, adi='Elektronik', seviye=1, sol=1, sag=4
+        )
+        alt = HesaplamaKategoriler.objects.create(
+            pazar_yeri=cls.pazar_yeri, versiyon=komisyon, adi='Telefon', seviye=2, ust_kategori=kok, sol=2, sag=3
+        )
+        cls.komisyon_orani = HesaplamaKomisyonOranlari.objects.create(
+            pazar_yeri=cls.pazar_yeri, versiyon=komisyon, kategori_1=kok, kategori_2=alt,
+            komisyon_orani=Decimal('15'), gecerlilik_tarihi=timezone.now().date()
+        )
+        versiyonu_etkinlestir(komisyon)
+
+    def setUp(self):
+        # Süreç içi önbellekler önceki testlerin (aynı ID'li) verilerini tutmasın
+        tarifeleri_gecersiz_kil()
+        arama_indekslerini_gecersiz_kil()
+        form_onbellegini_gecersiz_kil()
+
+    def assertSorguSayisiEnFazla(self, url, veri, sinir):
+        self.assertEqual(self.client.post(url, veri, content_type='application/json').status_code, 200)
+        with CaptureQueriesContext(connection) as sorgular:
+            yanit = self.client.post(url, veri, content_type='application/json')
+        self.assertEqual(yanit.status_code, 200, yanit.content)
+        self.assertLessEqual(len(sorgular), sinir, '\n'.join(sorgu['sql'] for sorgu in sorgular))
+
+    def test_kargo_ucret_hesaplama(self):
+        self.assertSorguSayisiEnFazla('/api/hesap/username-guest/kargo-ucret-hesap/', {
+            'email': 'test@example.com', 'pazar_yeri': self.pazar_yeri.id,
+            'kargo_firma': self.firma.id, 'desi_kg_degeri': 2.4
+        }, 3)
+
+    def test_komisyon_orani_bulma(self):
+        self.assertSorguSayisiEnFazla('/api/hesap/username-guest/komisyon-orani-bulma/', {
+            'email': 'test@example.com', 'pazar_yeri': self.pazar_yeri.id,
+            'kategori_yolu': self.komisyon_orani.id
+        }, 4)
+
+    def test_marketplace_fiyat_hesaplama(self):
+        self.assertSorguSayisiEnFazla('/api/hesap/username-guest/marketplace-fiyat-hesap/', {
+            'email': 'test@example.com', 'pazar_yeri': self.pazar_yeri.id, 'kargo_firma': self.firma.id,
+            'urun_desi_kg': 2.4, 'urun_maliyeti': 100, 'paketleme_bedeli': 5, 'komisyon_orani': 20,
+            'kar_orani': 25, 'kdv_orani': 20
+        }, 3)
+
+
+class FiyatMatrisiOnbellekTestleri(TestCase):
+    """
+    Önbellekteki fiyat matrisi, sürüm sayaçlarına güvenilemese de eski tarifeyle okunmamalı
+    """
+
+    def setUp(self):
+        self.firma = KargoFirma.objects.create(firma_ismi='Test Kargo')
+        self.pazar_yeri = Pazaryeri.objects.create(pazar_ismi='Test')
+        self.tarife_yukle(Decimal('10.00'))
+        tarifeleri_gecersiz_kil()
+
+    def tarife_yukle(self, ucret):
+        versiyon = VeriVersiyonu.objects.create(pazar_yeri=self.pazar_yeri, tur=VeriVersiyonu.KARGO)
+        PazaryeriKargofirma.objects.create(pazar_yeri=self.pazar_yeri, versiyon=versiyon, kargo_firma=self.firma)
+        desi_kg = DesiKgDeger.objects.create(pazar_yeri=self.pazar_yeri, versiyon=versiyon, desi_degeri=1)
+        DesiKgKargoUcret.objects.create(
+            pazar_yeri=self.pazar_yeri, versiyon=versiyon, desi_kg_deger=desi_kg, kargo_firma=self.firma, ucret=ucret
+        )
+        versiyonu_etkinlestir(versiyon)
+
+    def kargo_ucreti(self):
+        matris = fiyat_matrisi_getir({
+            'urun_maliyeti': Decimal('100'), 'paketleme_bedeli': Decimal('5'), 'urun_desi_kg': Decimal('1'),
+            'kar_orani': Decimal('25'), 'kdv_orani': Decimal('20'), 'komisyon_orani': Decimal('15'),
+        })
+        return matris['pazar_yerleri'][0]['fiyatlar'][0]['kargo_ucreti']
+
+    def test_aktif_tarife_degisince_eski_matris_okunmaz(self):
+        # Sürüm sayaçları silinip aynı değerden yeniden başlamış gibi sabit tutulur
+        with mock.patch('hesaplama.fiyat_matrisi.form_surumu', return_value=1):
+            self.assertEqual(self.kargo_ucreti(), 10.0)
+            self.tarife_yukle(Decimal('20.00'))
+            tarifeleri_gecersiz_kil(self.pazar_yeri.id)
+            self.assertEqual(self.kargo_ucreti(), 20.0)
+
+
+class SurecOnbellegiTestleri(SimpleTestCase):
+    """
+    Süreç içi kopyalar sürüm değişince veya maksimum yaşı aşınca yeniden derlenmeli
+    """
+
+    def setUp(self):
+        self.anahtar = 'test:surec_onbellegi_surumu'
+        cache.delete(self.anahtar)
+        self.addCleanup(cache.delete, self.anahtar)
+        self.derlemeler = []
+        self.onbellek = SurecOnbellegi(self.anahtar)
+
+    def derle(self, idler):
+        self.derlemeler.append(list(idler))
+        return {pazar_yeri_id: len(self.derlemeler) for pazar_yeri_id in idler}
+
+    def test_diger_surecin_gecersiz_kilmasi_gorulur(self):
+        self.onbellek.getir([1], self.derle)
+        self.onbellek.getir([1], self.derle)
+        SurecOnbellegi(self.anahtar).gecersiz_kil(1)
+        self.assertEqual(self.onbellek.getir([1], self.derle), {1: 2})
+
+    def test_maksimum_yasi_asan_kopyalar_yenilenir(self):
+        self.onbellek.getir([1], self.derle)
+        with override_settings(SUREC_ONBELLEGI_MAKSIMUM_YAS=0):
+            self.assertEqual(self.onbellek.getir([1], self.derle), {1: 2})
+
+    def test_surum_anahtari_dusunce_eski_numaralar_tekrar_kullanilmaz(self):
+        surumler = {self.onbellek.surum()}
+        self.onbellek.gecersiz_kil()
+        surumler.add(self.onbellek.surum())
+        cache.delete(self.anahtar)
+        self.onbellek.gecersiz_kil()
+        self.assertNotIn(self.onbellek.surum(), surumler)
+        self.assertGreater(self.onbellek.surum(), max(surumler))
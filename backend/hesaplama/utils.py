@@ -1,46 +1,105 @@
-from django.db import transaction
-from .models import KargoUcretGecmis, KomisyonOraniGecmisi, FiyatHesaplamaGecmisi
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from .models import (
+    KargoUcretGecmis, KomisyonOraniGecmisi, FiyatHesaplamaGecmisi, GecmisBaglantisi, email_normalize_et
+)
+from .gecmis_kaydedici import gecmis_kaydedici, BOSALTMA_ARALIGI
+
+logger = logging.getLogger(__name__)
+
+# Misafir hesaplamalarını bağlama işleri istek dışında, sırayla tek thread'de çalışır
+_baglama_havuzu = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gecmis-baglama')
+
+# Diğer worker süreçlerinin kuyruklarındaki misafir kayıtları birkaç boşaltma aralığı içinde
+# yazılır; bu kayıtlar için bağlama, işaret yazıldıktan sonra bu gecikmelerle tekrarlanır (saniye)
+TEKRAR_BAGLAMA_GECIKMELERI = (3 * BOSALTMA_ARALIGI, 30 * BOSALTMA_ARALIGI)
+
 
 def check_and_link_calculations(user, email):
     """
-    Hesaplama işleminden önce kullanıcı durumunu kontrol eder ve gerekirse geçmiş hesaplamaları bağlar.
+    Hesaplama işleminden önce kullanıcı durumunu kontrol eder.
+    Geçmiş hesaplamaların bağlanması artık her hesaplamada değil, kayıt ve
+    giriş sırasında bir kez yapılır (bkz. gecmis_baglamayi_planla).
     
     Args:
         user: Request'ten gelen kullanıcı nesnesi
         email: İşlemde kullanılan email adresi
         
     Returns:
-        bool: İşlemin başarılı olup olmadığı
+        bool: Giriş yapan kullanıcının emaili ile işlem emaili eşleşiyorsa (veya misafirse) True
+    """
+    if user.is_authenticated:
+        return email_normalize_et(user.email) == email_normalize_et(email)
+    return True
+
+
+def _misafir_kayitlarini_bagla(user, email):
+    for model in (KargoUcretGecmis, KomisyonOraniGecmisi, FiyatHesaplamaGecmisi):
+        # (email_normalize) WHERE kullanici IS NULL kısmi indeksini kullanır
+        model.objects.filter(email_normalize=email, kullanici__isnull=True).update(kullanici=user)
+
+
+def gecmis_hesaplamalari_bagla(user):
+    """
+    Kullanıcının email adresiyle misafirken yapılmış hesaplamaları hesabına bağlar
+    ve bağlamanın yapıldığını işaretler. Bağlama yapıldıysa True döner.
     """
+    email = email_normalize_et(user.email)
+    if not email:
+        return False
+
+    # Misafir kayıtları hâlâ geçmiş kaydedicinin kuyruğunda olabilir; bağlantı işareti
+    # yazılmadan önce bu süreçte kuyruğa alınmış olanlar veritabanına yazılmalı
+    if not gecmis_kaydedici.bosalt():
+        logger.warning('Geçmiş kuyruğu boşaltılamadı, bağlama ertelendi (kullanıcı #%s)', user.id)
+        return False
+
+    with transaction.atomic():
+        _misafir_kayitlarini_bagla(user, email)
+        GecmisBaglantisi.objects.update_or_create(kullanici=user, defaults={'email_normalize': email})
+    return True
+
+
+def _arka_planda_bagla(user_id, tekrar=False):
+    """
+    İlk bağlamadan sonra, diğer worker'ların kuyruklarından gecikmeli yazılan misafir
+    kayıtları için bağlamayı TEKRAR_BAGLAMA_GECIKMELERI sonunda tekrarlar (tekrar=True).
+    """
+    from django.contrib.auth import get_user_model
     try:
-        # Kullanıcı giriş yapmış mı kontrol et
-        if user.is_authenticated:
-            # Giriş yapan kullanıcının emaili ile işlem emaili eşleşiyor mu kontrol et
-            if user.email.lower() != email.lower():
-                return False
-                
-            # Transaction başlat
-            with transaction.atomic():
-                # Kargo ücreti hesaplama geçmişini güncelle
-                KargoUcretGecmis.objects.filter(
-                    email__iexact=email,
-                    kullanici__isnull=True
-                ).update(kullanici=user)
-                
-                # Komisyon oranı hesaplama geçmişini güncelle
-                KomisyonOraniGecmisi.objects.filter(
-                    email__iexact=email,
-                    kullanici__isnull=True
-                ).update(kullanici=user)
-                
-                # Fiyat hesaplama geçmişini güncelle
-                FiyatHesaplamaGecmisi.objects.filter(
-                    email__iexact=email,
-                    kullanici__isnull=True
-                ).update(kullanici=user)
-                
-        return True
-        
-    except Exception as e:
-        print(f"Hesaplama geçmişi bağlama hatası: {str(e)}")
-        return False 
\ No newline at end of file
+        user = get_user_model().objects.filter(id=user_id).first()
+        if user is None:
+            return
+        if tekrar:
+            email = email_normalize_et(user.email)
+            if email:
+                _misafir_kayitlarini_bagla(user, email)
+        elif gecmis_hesaplamalari_bagla(user):
+            for gecikme in TEKRAR_BAGLAMA_GECIKMELERI:
+                zamanlayici = threading.Timer(gecikme, _baglama_havuzu.submit, (_arka_planda_bagla, user_id, True))
+                zamanlayici.daemon = True
+                zamanlayici.start()
+    except Exception:
+        logger.exception('Hesaplama geçmişi bağlanamadı (kullanıcı #%s)', user_id)
+    finally:
+        connection.close()
+
+
+def gecmis_baglamayi_planla(user):
+    """
+    Kullanıcının mevcut email adresi için bağlama henüz yapılmadıysa, işlem
+    commit edildikten sonra arka planda bir kez yapılmasını planlar.
+    """
+    email = email_normalize_et(user.email)
+    if not email or GecmisBaglantisi.objects.filter(kullanici_id=user.id, email_normalize=email).exists():
+        return
+
+    if getattr(settings, 'HESAPLAMA_GECMIS_ARKA_PLANDA', True):
+        user_id = user.id
+        transaction.on_commit(lambda: _baglama_havuzu.submit(_arka_planda_bagla, user_id))
+    else:
+        gecmis_hesaplamalari_bagla(user)
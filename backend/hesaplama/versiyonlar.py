@@ -0,0 +1,170 @@
+"""
+Kargo tarifesi ve komisyon tablosu sürümlerinin etkinleştirilmesi.
+
+İçe aktarmalar verileri yeni bir VeriVersiyonu altına yazar; okuyucular her zaman
+Pazaryeri üzerindeki aktif sürüm işaretçisinin gösterdiği kayıtları görür. Yeni
+sürüme geçiş ve eski sürüme geri dönüş bu işaretçinin tek bir UPDATE ile
+değiştirilmesidir; okuyucular yarım kalmış veri görmez ve beklemez.
+
+Etkinleştirilmiş sürümler değişmez. Tek tek kayıt değişiklikleri aktif sürümün
+bir kopyasına yazılır ve kopya etkinleştirilir (aktif_versiyonu_kopyalayarak_degistir).
+"""
+from itertools import groupby
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Pazaryeri, VeriVersiyonu, VersiyonluModel, DesiKgDeger, DesiKgKargoUcret,
+    PazaryeriKargofirma, HesaplamaKategoriler, HesaplamaKomisyonOranlari, KomisyonOraniGecmisi
+)
+from .tarife import tarifeleri_gecersiz_kil
+from .kategori_arama import arama_indekslerini_gecersiz_kil
+from .form_onbellek import form_onbellegini_gecersiz_kil
+
+
+def versiyonu_etkinlestir(versiyon):
+    """
+    Sürümü pazar yerinin aktif sürümü yapar ve önceki aktif sürümün ID'sini döndürür.
+    Önceki sürüm silinmez; tekrar etkinleştirilerek geri dönülebilir. Saklama sınırını
+    aşan en eski sürümler temizlenir (bkz. eski_versiyonlari_temizle).
+    """
+    alan = f'aktif_{versiyon.tur}_versiyonu'
+    simdi = timezone.now()
+
+    with transaction.atomic():
+        pazar_yeri = Pazaryeri.objects.select_for_update().get(id=versiyon.pazar_yeri_id)
+        onceki_versiyon_id = getattr(pazar_yeri, f'{alan}_id')
+        if onceki_versiyon_id == versiyon.id:
+            return onceki_versiyon_id
+
+        if onceki_versiyon_id is not None:
+            VeriVersiyonu.objects.filter(id=onceki_versiyon_id).update(gecerlilik_bitis_tarihi=simdi)
+
+        # Komisyon oranlarının geçerlilik tarihi, sürümün ilk etkinleştirildiği gündür
+        if versiyon.tur == VeriVersiyonu.KOMISYON and versiyon.gecerlilik_tarihi is None:
+            HesaplamaKomisyonOranlari.objects.filter(versiyon=versiyon).update(gecerlilik_tarihi=simdi.date())
+
+        versiyon.gecerlilik_tarihi = simdi
+        versiyon.gecerlilik_bitis_tarihi = None
+        versiyon.save(update_fields=['gecerlilik_tarihi', 'gecerlilik_bitis_tarihi'])
+
+        # İşaretçi değişimi: okuyucular commit anından itibaren yeni sürümü görür
+        Pazaryeri.objects.filter(id=pazar_yeri.id).update(**{alan: versiyon})
+        eski_versiyonlari_temizle(pazar_yeri.id, versiyon.tur)
+
+        if versiyon.tur == VeriVersiyonu.KARGO:
+            transaction.on_commit(lambda: tarifeleri_gecersiz_kil(pazar_yeri.id))
+        else:
+            transaction.on_commit(lambda: arama_indekslerini_gecersiz_kil(pazar_yeri.id))
+            transaction.on_commit(form_onbellegini_gecersiz_kil)
+
+    return onceki_versiyon_id
+
+
+# Sürüm türüne göre kopyalanacak tablolar; başvurulan tablolar başvuranlardan önce gelir.
+# İkinci eleman, kendine başvuran tablolarda üst kayıtların önce kopyalanması için sıralama alanıdır.
+KOPYALANACAK_TABLOLAR = {
+    VeriVersiyonu.KARGO: [
+        (PazaryeriKargofirma, None),
+        (DesiKgDeger, None),
+        (DesiKgKargoUcret, None),
+    ],
+    VeriVersiyonu.KOMISYON: [
+        (HesaplamaKategoriler, 'seviye'),
+        (HesaplamaKomisyonOranlari, None),
+    ],
+}
+
+
+def eski_versiyonlari_temizle(pazar_yeri_id, tur, saklanacak=None):
+    """
+    Yerini başka bir sürüme bırakmış sürümlerden en son kullanılan `saklanacak` tanesi
+    (varsayılan: VERI_VERSIYONU_SAKLAMA_SAYISI) dışındakileri kayıtlarıyla birlikte siler
+    ve silinen sürüm sayısını döndürür. Taslak ve aktif sürümlere dokunulmaz; kategorilerine
+    komisyon geçmişi kayıtlarının başvurduğu sürümler geçmiş silinmesin diye saklanır.
+    """
+    if saklanacak is None:
+        saklanacak = settings.VERI_VERSIYONU_SAKLAMA_SAYISI
+
+    silinecekler = list(
+        VeriVersiyonu.objects.filter(pazar_yeri_id=pazar_yeri_id, tur=tur, gecerlilik_bitis_tarihi__isnull=False)
+        .order_by('-gecerlilik_bitis_tarihi', '-id')
+        .values_list('id', flat=True)[saklanacak:]
+    )
+    if tur == VeriVersiyonu.KOMISYON and silinecekler:
+        gecmisi_olanlar = set(
+            KomisyonOraniGecmisi.objects.filter(kategori_yolu__versiyon_id__in=silinecekler)
+            .values_list('kategori_yolu__versiyon_id', flat=True)
+        )
+        silinecekler = [id for id in silinecekler if id not in gecmisi_olanlar]
+    if not silinecekler:
+        return 0
+
+    # Kayıtlar, başvuranlardan başlanarak tablo başına tek DELETE ile silinir; eski sürümlerin
+    # kayıtları okunmadığından satır başına sinyal ve önbellek geçersiz kılma gerekmez
+    with transaction.atomic():
+        for model, _ in reversed(KOPYALANACAK_TABLOLAR[tur]):
+            sorgu = model._base_manager.filter(versiyon_id__in=silinecekler)
+            sorgu._raw_delete(sorgu.db)
+        VeriVersiyonu.objects.filter(id__in=silinecekler).delete()
+    return len(silinecekler)
+
+
+def versiyonu_kopyala(versiyon, aciklama=''):
+    """
+    Sürümün kayıtlarını yeni bir taslak sürüme kopyalar.
+    (yeni_versiyon, {model: {eski_id: yeni_id}}) döndürür.
+    """
+    yeni = VeriVersiyonu.objects.create(pazar_yeri_id=versiyon.pazar_yeri_id, tur=versiyon.tur, aciklama=aciklama)
+    eslemeler = {}
+
+    for model, sira_alani in KOPYALANACAK_TABLOLAR[versiyon.tur]:
+        esleme = eslemeler[model] = {}
+        iliskiler = [
+            alan for alan in model._meta.concrete_fields
+            if alan.is_relation and issubclass(alan.related_model, VersiyonluModel)
+        ]
+        kayitlar = model._base_manager.filter(versiyon=versiyon).order_by(*filter(None, [sira_alani, 'id']))
+        gruplar = groupby(kayitlar, attrgetter(sira_alani)) if sira_alani else [(None, kayitlar)]
+
+        for _, grup in gruplar:
+            eski_idler, kopyalar = [], []
+            for kayit in grup:
+                eski_idler.append(kayit.pk)
+                kayit.pk = None
+                kayit._state.adding = True
+                kayit.versiyon = yeni
+                for alan in iliskiler:
+                    hedef_id = getattr(kayit, alan.attname)
+                    if hedef_id is not None:
+                        setattr(kayit, alan.attname, eslemeler[alan.related_model][hedef_id])
+                kopyalar.append(kayit)
+            model._base_manager.bulk_create(kopyalar, batch_size=1000)
+            esleme.update(zip(eski_idler, (kopya.pk for kopya in kopyalar)))
+
+    return yeni, eslemeler
+
+
+def aktif_versiyonu_kopyalayarak_degistir(pazar_yeri_id, tur, degistir):
+    """
+    Pazar yerinin aktif sürümünü kopyalar, degistir(yeni_versiyon, eslemeler) ile kopyayı
+    değiştirir ve kopyayı etkinleştirir; degistir'in sonucunu döndürür.
+
+    Pazar yeri satırı işlem boyunca kilitlenir; aynı pazar yerinde eşzamanlı değişiklikler
+    sırayla yeni sürüm oluşturur ve birbirinin yazdıklarını kaybetmez.
+    """
+    with transaction.atomic():
+        pazar_yeri = Pazaryeri.objects.select_for_update().get(id=pazar_yeri_id)
+        aktif_versiyon = getattr(pazar_yeri, f'aktif_{tur}_versiyonu')
+        aciklama = 'Tek kayıt değişikliği'
+        if aktif_versiyon is None:
+            yeni, eslemeler = VeriVersiyonu.objects.create(pazar_yeri=pazar_yeri, tur=tur, aciklama=aciklama), {}
+        else:
+            yeni, eslemeler = versiyonu_kopyala(aktif_versiyon, aciklama=f'{aciklama} (#{aktif_versiyon.id} kopyası)')
+
+        sonuc = degistir(yeni, eslemeler)
+        versiyonu_etkinlestir(yeni)
+    return sonuc
@@ -0,0 +1,80 @@
+"""
+Okuma replikaları için veritabanı yönlendiricisi.
+
+settings.DATABASES içinde 'replica' ile başlayan bağlantılar tanımlıysa tarife
+ve komisyon tablolarının okumaları bu replikalara dağıtılır. Hesaplama geçmişi,
+kullanıcı ve oturum tabloları dahil diğer tüm okumalar ile bütün yazmalar ve
+migration'lar birincil veritabanında (default) kalır.
+
+Replikalar birincil veritabanının gerisinde kalabileceği için:
+- Birincil bağlantıda açık bir transaction varken (Excel aktarımı, sürüm
+  etkinleştirme) okumalar birincilde yapılır.
+- Bir istek (thread veya async görev) replikaya yönlendirilen bir tabloya
+  yazdıktan sonra REPLIKA_GECIKME_PAYI saniye boyunca aynı isteğin bu
+  tablolardan okumaları birincilde yapılır; diğer isteklerin okumaları
+  replikada kalır.
+- Süreç içi önbelleğe alınan tarifeler ve kategori arama indeksleri her zaman
+  birincilden derlenir (bkz. tarife.py, kategori_arama.py).
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Okumaları replikaya gidebilen tarife ve komisyon tabloları
+REPLIKADAN_OKUNAN_MODELLER = frozenset({
+    'hesaplama.pazaryeri',
+    'hesaplama.kargofirma',
+    'hesaplama.veriversiyonu',
+    'hesaplama.desikgdeger',
+    'hesaplama.desikgkargoucret',
+    'hesaplama.pazaryerikargofirma',
+    'hesaplama.hesaplamakategoriseviyeleri',
+    'hesaplama.hesaplamakategoriler',
+    'hesaplama.hesaplamakomisyonoranlari',
+})
+
+
+# Geçerli isteğin replikaya yönlendirilen tablolara son yazdığı an (time.monotonic)
+_son_yazma = ContextVar('replika_son_yazma', default=None)
+
+
+def _model_etiketi(model):
+    return f'{model._meta.app_label}.{model._meta.model_name}'
+
+
+class OkumaReplikasiYonlendiricisi:
+    """
+    Tarife/komisyon okumalarını replikalara, diğer her şeyi birincil veritabanına yönlendirir
+    """
+
+    def __init__(self):
+        self.replikalar = [alias for alias in settings.DATABASES if alias.startswith('replica')]
+        self.gecikme_payi = getattr(settings, 'REPLIKA_GECIKME_PAYI', 5)
+
+    def _birincilden_okunmali(self):
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return True
+        son_yazma = _son_yazma.get()
+        return son_yazma is not None and time.monotonic() - son_yazma < self.gecikme_payi
+
+    def db_for_read(self, model, **hints):
+        if not self.replikalar or _model_etiketi(model) not in REPLIKADAN_OKUNAN_MODELLER:
+            return DEFAULT_DB_ALIAS
+        if self._birincilden_okunmali():
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replikalar)
+
+    def db_for_write(self, model, **hints):
+        if self.replikalar and _model_etiketi(model) in REPLIKADAN_OKUNAN_MODELLER:
+            _son_yazma.set(time.monotonic())
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replikalar birincil veritabanının kopyası olduğu için tüm ilişkilere izin verilir
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS